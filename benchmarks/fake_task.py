@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""A stand in for Taskwarrior's task command when benchmarking.
+
+task export writes FAKE_TASK_COUNT synthetic tasks, and task ... done
+completes every id given, each after sleeping FAKE_TASK_LATENCY seconds.
+install writes a task executable running this into a directory, so putting
+that directory first on PATH is all it takes for tasker to run it.
+"""
+import json
+import os
+import stat
+import sys
+import time
+
+from synthetic import export_tasks
+
+
+def install(directory: str, count: int=1000, latency: float=0.0) -> dict:
+    """Write a task executable into the given directory, returning the
+    environment to run tasker with so it uses it.
+
+    Parameters
+    ----------
+    directory: str
+        The directory to write task into.
+    count: int=1000
+        The number of tasks task export writes.
+    latency: float=0.0
+        The seconds task takes before doing anything.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "task")
+    with open(path, 'w') as fout:
+        fout.write(f"#!/bin/sh\nexec '{sys.executable}' "
+                   f"'{os.path.abspath(__file__)}' \"$@\"\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+    env = dict(os.environ)
+    env["PATH"] = directory + os.pathsep + env.get("PATH", "")
+    env["FAKE_TASK_COUNT"] = str(count)
+    env["FAKE_TASK_LATENCY"] = str(latency)
+    return env
+
+
+def main(args: list[str]) -> int:
+    """Act like task with the given arguments, returning its exit code"""
+    time.sleep(float(os.environ.get("FAKE_TASK_LATENCY", "0")))
+
+    if len(args) > 0 and args[-1] == "export":
+        out = sys.stdout
+        out.write("[")
+        separator = "\n"
+        for task in export_tasks(int(os.environ.get("FAKE_TASK_COUNT",
+                                                    "1000"))):
+            out.write(separator + json.dumps(task))
+            separator = ",\n"
+        out.write("\n]\n")
+        return 0
+    elif len(args) > 0 and args[-1] == "done":
+        for arg in args[:-1]:
+            if arg.isdigit():
+                print(f"Completed task {arg} 'synthetic task {arg}'.")
+        return 0
+
+    print(f"fake task doesn't understand: {' '.join(args)}",
+          file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
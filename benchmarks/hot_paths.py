@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Measures the hot paths of tasker on synthetic databases and exports.
+
+Each hot path is run on synthetic data of each of the given sizes, from a
+data.json of that many recurring tasks to a task export of that many
+tasks, served by the fake task in fake_task.py. The throughput, latency
+percentiles, and peak memory of each are printed and can be saved as a
+baseline to compare later runs against.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fake_task
+import synthetic  # Puts src on sys.path for the imports below
+from tasker.database import load_database
+from tasker.schedule import Schedule, write_schedules
+from tasker.util import run_task_export
+
+# The date the proposed schedules are made for, a Monday
+DATE = datetime.date(2024, 1, 1)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the given percentile of the values, by nearest rank"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(run, setup=None, runs: int=5) -> dict:
+    """Return the latencies, in milliseconds, of calling run the given
+    number of times, with the peak memory of one more call.
+
+    Parameters
+    ----------
+    run: Callable
+        The code to measure, given what setup returns if setup is given.
+        It returns the number of items it went through.
+    setup: Callable=None
+        Called before each call of run, without being measured.
+    runs: int=5
+        The number of times to measure run.
+    """
+    latencies = []
+    items = 0
+    for _ in range(runs):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        items = run(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    args = () if setup is None else (setup(),)
+    tracemalloc.start()
+    try:
+        run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(latencies)
+    return {'items': items,
+            'p50_ms': median,
+            'p90_ms': percentile(latencies, 0.9),
+            'p99_ms': percentile(latencies, 0.99),
+            'items_per_s': items / (median / 1000) if median > 0 else 0.0,
+            'peak_mib': peak / (1024 * 1024)}
+
+
+def render(fmt: str):
+    """Return a run writing a week of the schedule in the given format"""
+    def run(schedule: Schedule) -> int:
+        days = [(DATE + datetime.timedelta(days=i), schedule.copy())
+                for i in range(7)]
+        write_schedules(io.StringIO(), days, fmt=fmt)
+        return 7 * len(schedule.tasks)
+    return run
+
+
+def measure_size(size: int, directory: str, runs: int,
+                 latency: float) -> dict[str, dict]:
+    """Return the measurements of each hot path on data of the given size,
+    writing the synthetic database into the given directory.
+    """
+    results = {}
+    path = os.path.join(directory, f"data-{size}.json")
+    synthetic.write_database(path, size)
+
+    def load() -> int:
+        return len(load_database(path).tasks)
+    results["database.load"] = measure(load, runs=runs)
+
+    database = load_database(path)
+
+    def propose() -> int:
+        database.invalidate()
+        return len(database.proposed_schedule(DATE).tasks)
+    results["database.proposed_schedule"] = measure(propose, runs=runs)
+
+    def propose_cached() -> int:
+        return len(database.proposed_schedule(DATE).tasks)
+    results["database.proposed_schedule_cached"] = measure(propose_cached,
+                                                           runs=runs)
+
+    schedule = synthetic.schedule(size)
+    tasks = [t.copy() for t in schedule.tasks]
+
+    def add_tasks() -> int:
+        empty = Schedule(day_start=schedule.day_start,
+                         day_end=schedule.day_end)
+        for t in tasks:
+            empty.add_task(t)
+        return len(tasks)
+    results["schedule.add_task"] = measure(add_tasks, runs=runs)
+
+    def fill_gaps(copy: Schedule) -> int:
+        return len(copy.tasks_with_filled_gaps())
+    results["schedule.tasks_with_filled_gaps"] = measure(
+            fill_gaps, setup=schedule.copy, runs=runs)
+
+    for fmt in ["text", "latex", "json"]:
+        results[f"render.{fmt}"] = measure(render(fmt),
+                                           setup=lambda: schedule, runs=runs)
+
+    # Export through the fake task, without the cache so task runs each time
+    previous = dict(os.environ)
+    os.environ.update(fake_task.install(os.path.join(directory, "bin"),
+                                        count=size, latency=latency))
+    try:
+        def export() -> int:
+            return len(run_task_export(["status:pending"], use_cache=False,
+                                       backend="task"))
+        results["util.run_task_export"] = measure(export, runs=runs)
+    finally:
+        os.environ.clear()
+        os.environ.update(previous)
+
+    return results
+
+
+def main(sizes: list[int], runs: int, latency: float, baseline: str,
+         tolerance: float, save_baseline: bool) -> int:
+    """Print the measurements of each hot path at each size, returning 1 if
+    any has a median latency more than tolerance slower than the baseline.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for name, result in measure_size(size, directory, runs,
+                                             latency).items():
+                results[f"{name}[{size}]"] = result
+
+    previous = {}
+    if baseline is not None and os.path.isfile(baseline) \
+            and not save_baseline:
+        with open(baseline, 'r') as fin:
+            previous = json.load(fin)
+
+    failed = False
+    print(f"{'hot path':46} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'items/s':>11} {'peak MiB':>9}")
+    for name, result in results.items():
+        status = "ok"
+        if name in previous and result['p50_ms'] \
+                > previous[name]['p50_ms'] * (1 + tolerance):
+            status = f"regressed from {previous[name]['p50_ms']:.2f} ms"
+        failed = failed or status != "ok"
+
+        print(f"{name:46} {result['p50_ms']:9.2f} {result['p90_ms']:9.2f} "
+              f"{result['p99_ms']:9.2f} {result['items_per_s']:11.0f} "
+              f"{result['peak_mib']:9.2f} {status}")
+
+    if save_baseline and baseline is not None:
+        with open(baseline, 'w') as fout:
+            json.dump(results, fout, indent=1)
+
+    return 1 if failed else 0
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    parser = argparse.ArgumentParser(
+            description="Measure the hot paths of tasker on synthetic "
+                        "databases and task exports.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-s", "--sizes", type=int, nargs="+",
+                        default=[100, 1000, 10000],
+                        help="The numbers of recurring tasks and exported "
+                             "tasks to measure with, up to 1000000.")
+    parser.add_argument("-n", "--runs", type=int, default=5,
+                        help="The number of times to measure each hot path "
+                             "at each size.")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="The seconds the fake task takes to start.")
+    parser.add_argument("--baseline", default=None,
+                        help="A JSON file of previous results to compare "
+                             "against.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Fail if a hot path is this fraction slower "
+                             "than the baseline.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to --baseline instead of "
+                             "comparing against it.")
+    args = parser.parse_args(args=args)
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(main(**vars(parse_arguments())))
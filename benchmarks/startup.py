@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Measures how long each console script takes to import"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Matches a console script in setup.py
+_ENTRY_POINT_PATTERN = re.compile(r"'(\w+) = ([\w.]+):(\w+)'")
+
+# Matches a line of python -X importtime output
+_IMPORT_TIME_PATTERN = re.compile(
+        r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def entry_points() -> dict[str, str]:
+    """Return the module of each console script in setup.py"""
+    with open(os.path.join(REPO_DIR, "setup.py"), 'r') as fin:
+        return {name: module
+                for name, module, _ in _ENTRY_POINT_PATTERN.findall(fin.read())}
+
+
+def import_times(module: str) -> tuple[int, dict[str, int]]:
+    """Return the cumulative import time, in microseconds, of importing
+    the given module in a fresh interpreter, along with the self import
+    time of each module it imported. Modules imported by the interpreter
+    itself on start up are not counted.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.join(REPO_DIR, "src")]
+            + [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p])
+    completed_process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, env=env)
+    if completed_process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n"
+                           + completed_process.stderr.decode("utf-8"))
+
+    # Modules are listed after the modules they import, indented deeper,
+    # so everything a module imported is just before it.
+    lines = [_IMPORT_TIME_PATTERN.match(line) for line in
+             completed_process.stderr.decode("utf-8").splitlines()]
+    lines = [match for match in lines if match is not None]
+    times = {}
+    for i, match in enumerate(lines):
+        if match.group(4) == module and len(match.group(3)) == 1:
+            cumulative = int(match.group(2))
+            times[module] = int(match.group(1))
+            for child in reversed(lines[:i]):
+                if len(child.group(3)) == 1:
+                    break
+                times[child.group(4)] = int(child.group(1))
+            return cumulative, times
+    raise RuntimeError(f"python -X importtime didn't report {module}")
+
+
+def measure(module: str, runs: int) -> dict:
+    """Return the median import time, in milliseconds, of the given module
+    over the given number of runs, along with the modules that took the
+    longest.
+    """
+    totals = []
+    per_module = {}
+    for _ in range(runs):
+        cumulative, times = import_times(module)
+        totals.append(cumulative / 1000)
+        for name, us in times.items():
+            per_module.setdefault(name, []).append(us / 1000)
+
+    slowest = sorted(((statistics.median(ms), name)
+                      for name, ms in per_module.items()), reverse=True)
+    return {'median_ms': statistics.median(totals),
+            'min_ms': min(totals),
+            'max_ms': max(totals),
+            'modules': len(per_module),
+            'slowest': [[name, ms] for ms, name in slowest[:5]]}
+
+
+def main(runs: int, max_ms: float, baseline: str, tolerance: float,
+         save_baseline: bool) -> int:
+    """Print the import time of each console script, returning 1 if any is
+    over max_ms or more than tolerance slower than the baseline.
+    """
+    results = {name: measure(module, runs)
+               for name, module in entry_points().items()}
+
+    previous = {}
+    if baseline is not None and os.path.isfile(baseline) \
+            and not save_baseline:
+        with open(baseline, 'r') as fin:
+            previous = json.load(fin)
+
+    failed = False
+    for name, result in results.items():
+        status = "ok"
+        if max_ms is not None and result['median_ms'] > max_ms:
+            status = f"over {max_ms:.1f} ms"
+        elif name in previous and result['median_ms'] \
+                > previous[name]['median_ms'] * (1 + tolerance):
+            status = f"regressed from {previous[name]['median_ms']:.1f} ms"
+        failed = failed or status != "ok"
+
+        print(f"{name:24} {result['median_ms']:7.1f} ms "
+              f"({result['modules']} modules) {status}")
+        for module, ms in result['slowest']:
+            print(f"    {ms:7.2f} ms {module}")
+
+    if save_baseline and baseline is not None:
+        with open(baseline, 'w') as fout:
+            json.dump(results, fout, indent=1)
+
+    return 1 if failed else 0
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    parser = argparse.ArgumentParser(
+            description="Measure how long each console script takes to "
+                        "import with python -X importtime.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--runs", type=int, default=5,
+                        help="The number of fresh interpreters to measure "
+                             "each console script in.")
+    parser.add_argument("--max-ms", type=float, default=25.0,
+                        help="Fail if a console script's median import time "
+                             "is over this many milliseconds.")
+    parser.add_argument("--baseline", default=None,
+                        help="A JSON file of previous results to compare "
+                             "against.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Fail if a console script is this fraction "
+                             "slower than the baseline.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to --baseline instead of "
+                             "comparing against it.")
+    args = parser.parse_args(args=args)
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(main(**vars(parse_arguments())))
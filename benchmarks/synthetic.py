@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Generates synthetic databases, schedules, and task exports"""
+import argparse
+import json
+import os
+import random
+import sys
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "src"))
+
+# The day names a database task recurs on
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday",
+             "saturday", "sunday"]
+
+
+def _time(minutes: int) -> str:
+    return f"{minutes // 60:02}:{minutes % 60:02}:00"
+
+
+def database_tasks(count: int, seed: int=0):
+    """Yield count random recurring tasks as they are stored in data.json"""
+    rng = random.Random(seed)
+    for i in range(count):
+        start = rng.randrange(0, 23 * 60)
+        end = min(start + rng.choice([5, 15, 30, 45, 60, 90, 120]),
+                  24 * 60 - 1)
+        days = rng.sample(DAY_NAMES, rng.randint(1, 7))
+        yield {'name': f"task {i}",
+               'recur': [d for d in DAY_NAMES if d in days],
+               'usual_start': _time(start),
+               'usual_end': _time(end)}
+
+
+def write_database(path: str, count: int, seed: int=0) -> None:
+    """Write a data.json of count random recurring tasks, one task at a
+    time so even a million tasks don't have to fit in memory.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w') as fout:
+        fout.write('{"day_start": "00:00:00", "day_end": "23:59:00", '
+                   '"tasks": [')
+        separator = "\n"
+        for task in database_tasks(count, seed):
+            fout.write(separator + json.dumps(task))
+            separator = ",\n"
+        fout.write("\n]}\n")
+
+
+def schedule(count: int) -> "Schedule":
+    """Return a Schedule of the whole day with count tasks which don't
+    overlap. Past a task a minute, the tasks take no time at all.
+    """
+    from array import array
+    from tasker.schedule import Schedule
+    from tasker.schedule.task import to_time
+
+    last = 24 * 60 - 1
+    length = last // count if count > 0 else 0
+    starts = array('H', (i * last // count for i in range(count)))
+    ends = array('H', (start + length for start in starts))
+    return Schedule.from_columns(to_time(0), to_time(last),
+                                 [f"task {i}" for i in range(count)],
+                                 starts, ends)
+
+
+def export_tasks(count: int, seed: int=0):
+    """Yield count random pending tasks as task export gives them"""
+    rng = random.Random(seed)
+    for i in range(count):
+        task = {'id': i + 1,
+                'description': f"synthetic task {i}",
+                'entry': "20240101T000000Z",
+                'modified': "20240101T000000Z",
+                'status': "pending",
+                'uuid': f"{i:08x}-0000-4000-8000-000000000000",
+                'urgency': round(rng.uniform(0, 20), 4),
+                'estimate': f"PT{rng.choice([15, 30, 45, 60, 90])}M"}
+        if rng.random() < 0.7:
+            task['due'] = f"2024{rng.randint(1, 12):02}" \
+                          f"{rng.randint(1, 28):02}T000000Z"
+        if rng.random() < 0.5:
+            task['tags'] = rng.sample(["Reminder", "work", "home", "next"],
+                                      rng.randint(1, 2))
+        yield task
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    parser = argparse.ArgumentParser(
+            description="Write a synthetic data.json of recurring tasks.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("path", help="Where to write the database.")
+    parser.add_argument("-n", "--count", type=int, default=1000,
+                        help="The number of recurring tasks.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="The seed of the random tasks.")
+    args = parser.parse_args(args=args)
+    return args
+
+
+if __name__ == "__main__":
+    write_database(**vars(parse_arguments()))
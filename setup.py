@@ -18,7 +18,12 @@ setup(
             'check_off_tasks = tasker.cli.check_off_tasks:cli_interface',
             'reminder_tasks = tasker.cli.reminder_tasks:cli_interface',
             'todays_schedule = tasker.cli.todays_schedule:cli_interface',
-            'weeks_schedule_preview = tasker.cli.weeks_schedule_preview:cli_interface'
+            'weeks_schedule_preview = tasker.cli.weeks_schedule_preview:cli_interface',
+            'migrate_database = tasker.cli.migrate_database:cli_interface',
+            'free_time = tasker.cli.free_time:cli_interface',
+            'schedule_history = tasker.cli.schedule_history:cli_interface',
+            'taskerd = tasker.cli.taskerd:cli_interface',
+            'profile_schedules = tasker.cli.profile_schedules:cli_interface'
         ]
     }
 )
@@ -1,40 +1,191 @@
 #!/usr/bin/env python3
 """Checks all tasks with given filters"""
-import argparse
-from dateutil.parser import isoparse
+import itertools
 import os
 import sys
 
-from ..util import complete_task, run_task_export, time_till_due   
+from .. import daemon, trace
+from ..util import EXPORT_BACKENDS, BackgroundTaskCompleter, \
+                   TaskCompleter, isoparse, parse_due_dates, sort_by_due, \
+                   time_till_due
 
+# The rules a decisions file can give instead of task ids
+DECISION_RULES = ["all", "overdue", "nodue"]
 
-def main(filters: list[str]) -> int:
+
+class InvalidDecision(ValueError):
+    """Raised when a decisions file has something other than a task id or
+    a rule.
+    """
+
+
+def print_completions(outputs: dict[int, str], file=None) -> None:
+    """Print the output of task for each completed task id"""
+    for output in outputs.values():
+        print(output, end="", file=file)
+
+
+def parse_decisions(lines) -> tuple[set[int], set[str]]:
+    """Return the task ids and rules of the tasks to complete, from lines of
+    ids or rules separated by whitespace or commas, with # starting a
+    comment.
+
+    The rules are "all" for every task, "overdue" for tasks past their due
+    date, and "nodue" for tasks without a due date.
+
+    Raises
+    ------
+    InvalidDecision
+        If a line has something other than an id or a rule.
+    """
+    ids = set()
+    rules = set()
+    for number, line in enumerate(lines, start=1):
+        for word in line.split("#")[0].replace(",", " ").split():
+            try:
+                id = int(word)
+            except ValueError:
+                id = None
+            if id is not None and id > 0:
+                ids.add(id)
+            elif word.lower() in DECISION_RULES:
+                rules.add(word.lower())
+            else:
+                raise InvalidDecision(f"Line {number} of the decisions: "
+                                      f"{word} is neither a task id nor one "
+                                      f"of {', '.join(DECISION_RULES)}")
+    return ids, rules
+
+
+def review(tasks: list[dict], ids: set[int], rules: set[str],
+           completer: TaskCompleter, out) -> set[int]:
+    """Complete the tasks chosen by the given ids and rules without asking,
+    writing a line about each task to out. Return the ids that weren't
+    among the tasks.
+    """
+    import datetime
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    dues = parse_due_dates(tasks)
+    missing = set(ids)
+    for t, due in zip(tasks, dues):
+        missing.discard(t['id'])
+        if due is None:
+            done = t['id'] in ids or "all" in rules or "nodue" in rules
+            due = "NO DUE DATE"
+        else:
+            due = time_till_due(due, now=now)
+            done = t['id'] in ids or "all" in rules \
+                or ("overdue" in rules and due.total_seconds() < 0)
+        out.write(f"{t['id']} -- \"{t['description']}\" -- Due: {due} -- "
+                  f"{'completed' if done else 'kept'}\n")
+        if done:
+            print_completions(completer.add(t['id']), file=out)
+    return missing
+
+
+def main(filters: list[str], flush_every: int=0, backend: str=None,
+         sort: bool=True, limit: int=None, background: bool=False,
+         decisions: str=None) -> int:
     """Run through the tasks matching the given filter, asking the user if they 
     have been completed.
+
+    Parameters
+    ----------
+    filters: list[str]
+        The filters to use.
+    flush_every: int=0
+        Complete the tasks answered with "y" once this many have been
+        answered. The default of 0 completes them all at the end.
+    backend: str=None
+        The backend to read tasks with, see iter_task_export.
+    sort: bool=True
+        Rather to ask about the tasks in order of due date, which waits for
+        all of them to be exported. Otherwise the first task is asked about
+        as soon as it has been exported.
+    limit: int=None
+        Only ask about this many tasks.
+    background: bool=False
+        Rather to complete the tasks answered with "y" in the background
+        while asking about the next ones. Then each batch of flush_every
+        tasks, or each task with the default of 0, is completed as soon as
+        it's answered, and their output is printed in order once they're
+        done.
+    decisions: str=None
+        The path of a file of the task ids or rules of the tasks to
+        complete, see parse_decisions, or "-" to read them from stdin.
+        Then no one is asked anything, and the output is buffered.
     """
+    if decisions is not None:
+        if decisions == "-":
+            ids, rules = parse_decisions(sys.stdin)
+        else:
+            with open(decisions, 'r') as fin:
+                ids, rules = parse_decisions(fin)
+
+    if background:
+        completer = BackgroundTaskCompleter(flush_every=flush_every or 1)
+    else:
+        completer = TaskCompleter(flush_every=flush_every)
 
     # Get Reminder tasks
-    tasks = run_task_export(filters)
+    tasks = daemon.iter_task_export(filters, backend=backend)
 
     # Sort by due date
-    tasks.sort(key=lambda t: t.get("due", ""))
+    if sort:
+        tasks = sort_by_due(tasks, limit=limit)
+    elif limit is not None:
+        tasks = itertools.islice(tasks, limit)
 
-    # Go through each task
-    for t in tasks:
-        print(f"{t['id']} -- \"{t['description']}\" -- ", end="")
-        if t.get('due'):
-            due = time_till_due(isoparse(t['due']))
-        else:
-            due = "NO DUE DATE"
-        print(f"Due: {due}")
-        is_done = None
-        while is_done is None:
-            is_done = input("Completed?: ").lower()
-            if len(is_done) == 0:
+    # Complete the decided tasks, writing through one buffered writer
+    # rather than flushing each line to the terminal
+    if decisions is not None:
+        sys.stdout.flush()
+        out = open(sys.stdout.fileno(), 'w', buffering=64 * 1024,
+                   closefd=False)
+        try:
+            missing = review(list(tasks), ids, rules, completer, out)
+        finally:
+            print_completions(completer.close() if background
+                              else completer.flush(), file=out)
+            out.close()
+        if len(missing) > 0:
+            print("Not among the tasks: "
+                  + " ".join(f"{id}" for id in sorted(missing)),
+                  file=sys.stderr)
+    else:
+        # Go through each task, completing the queued ones even if the user
+        # stops part way through
+        try:
+            for t in tasks:
+                if background:
+                    print_completions(completer.finished())
+                print(f"{t['id']} -- \"{t['description']}\" -- ", end="")
+                if t.get('due'):
+                    due = time_till_due(isoparse(t['due']))
+                else:
+                    due = "NO DUE DATE"
+                print(f"Due: {due}")
                 is_done = None
-            elif is_done == "y":
-                print(complete_task(t['id']), end="")
-        print("-"*os.get_terminal_size().columns)
+                while is_done is None:
+                    is_done = input("Completed?: ").lower()
+                    if len(is_done) == 0:
+                        is_done = None
+                    elif is_done == "y":
+                        print_completions(completer.add(t['id']))
+                print("-"*os.get_terminal_size().columns)
+        finally:
+            if background:
+                print_completions(completer.close())
+            else:
+                print_completions(completer.flush())
+
+    # Report the tasks task failed to complete
+    if len(completer.failed) > 0:
+        print("Failed to complete: "
+              + " ".join(f"{id}" for id in completer.failed))
+        return 1
+    return 0
 
 
 def parse_arguments(args=None) -> None:
@@ -46,11 +197,37 @@ def parse_arguments(args=None) -> None:
         The default None results in argparse using the values passed into
         sys.args.
     """
+    import argparse
+
     parser = argparse.ArgumentParser(
             description="Run through the tasks matching the given filter, "
                         "asking the user if they have been completed.",
             formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument("filters", nargs='+', help="The filters to use.")
+    parser.add_argument("--flush-every", type=int, default=0,
+                        help="Complete the answered tasks after this many "
+                             "answers, 0 waits until the end.")
+    parser.add_argument("--backend", choices=EXPORT_BACKENDS, default=None,
+                        help="How to read tasks, defaults to "
+                             "$TASKER_EXPORT_BACKEND or task.")
+    parser.add_argument("--no-sort", dest="sort", action="store_false",
+                        help="Ask about tasks as soon as they are exported "
+                             "instead of by due date.")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Only ask about this many tasks, the ones due "
+                             "soonest unless --no-sort is given.")
+    parser.add_argument("--background", action="store_true",
+                        help="Complete each answered task, or batch of "
+                             "--flush-every tasks, in the background while "
+                             "asking about the next ones.")
+    parser.add_argument("--decisions", default=None,
+                        help="Complete the task ids or rules (all, overdue, "
+                             "nodue) in this file, or - for stdin, without "
+                             "asking.")
+    parser.add_argument("--profile", nargs="?", const="stderr", default=None,
+                        help="Report the time spent in each phase to "
+                             "stderr, or append it as JSON to the given "
+                             "file.")
     args = parser.parse_args(args=args)
     return args
 
@@ -58,8 +235,15 @@ def parse_arguments(args=None) -> None:
 def cli_interface() -> None:
     """Get program arguments from command line and run main"""
     args = parse_arguments()
-    main(**vars(args))
-    sys.exit(0)
+    profile = args.profile
+    del args.profile
+    if profile is not None:
+        trace.enable(profile)
+    try:
+        sys.exit(main(**vars(args)))
+    except InvalidDecision as exp:
+        print(exp, file=sys.stderr)
+        sys.exit(-1)
 
 
 # Execute only if this file is being run as the entry file.
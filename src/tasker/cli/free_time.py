@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Find free blocks of time in the proposed schedules"""
+import datetime
+import sys
+
+from .. import daemon
+
+
+def main(minutes: int, start: datetime.date=None, days: int=30,
+         all_fits: bool=False) -> list[tuple[datetime.datetime,
+                                             datetime.datetime]]:
+    """Return the free blocks at least the given number of minutes long in
+    the proposed schedules based on the recurring tasks.
+
+    Parameters
+    ----------
+    minutes: int
+        The length of the free blocks to find, in minutes.
+    start: datetime.date=None
+        The first date to look at, the default None uses today, only
+        looking from now on.
+    days: int=30
+        The number of days to look at.
+    all_fits: bool=False
+        Rather to return every free block, instead of only the earliest.
+    """
+    from ..schedule.occupancy import Occupancy
+
+    after = None
+    if start is None:
+        after = datetime.datetime.now()
+        start = after.date()
+    end = start + datetime.timedelta(days=days - 1)
+
+    occupancy = Occupancy.from_schedules(
+            daemon.schedules_between(start, end))
+    fits = occupancy.all_fits(minutes, after=after)
+    return fits if all_fits else fits[:1]
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+            description="Print the earliest free block of time, or all of "
+                        "them, in the proposed schedules based on the "
+                        "recurring tasks.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("minutes", type=int,
+                        help="The length of the free block, in minutes.")
+    parser.add_argument("-s", "--start", default=None,
+                        type=datetime.date.fromisoformat,
+                        help="The first date to look at, if not given from "
+                             "now on is looked at.")
+    parser.add_argument("-d", "--days", default=30, type=int,
+                        help="The number of days to look at.")
+    parser.add_argument("-a", "--all", dest="all_fits",
+                        action="store_true",
+                        help="Print every free block, not just the "
+                             "earliest.")
+    args = parser.parse_args(args=args)
+    return args
+
+
+def cli_interface() -> None:
+    """Get program arguments from command line and run main"""
+    args = parse_arguments()
+    try:
+        fits = main(**vars(args))
+    except ImportError as exp:
+        print(exp)
+        sys.exit(-1)
+
+    if len(fits) == 0:
+        print(f"No free block of {args.minutes} minutes found")
+        sys.exit(1)
+    for start, end in fits:
+        print(f"{start:%A %Y-%m-%d %H:%M}--{end:%H:%M}")
+    sys.exit(0)
+
+
+# Execute only if this file is being run as the entry file.
+if __name__ == "__main__":
+    cli_interface()
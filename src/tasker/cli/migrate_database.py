@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Move the database between JSON and SQLite storage"""
+import os
+import sys
+
+from ..database import SQLiteStorage, data_path, sqlite_path
+
+
+def main(direction: str, json_path: str, sqlite: str) -> int:
+    """Copy the database from JSON into SQLite, or back.
+
+    Parameters
+    ----------
+    direction: str
+        "import" to copy the JSON database, and its journal, into SQLite,
+        or "export" to copy the SQLite database into JSON.
+    json_path: str
+        The path of the JSON database file.
+    sqlite: str
+        The path of the SQLite database file.
+    """
+    storage = SQLiteStorage(sqlite)
+    try:
+        if direction == "import":
+            if not os.path.isfile(json_path):
+                print(f"No database at {json_path}")
+                return 1
+            storage.import_json(json_path)
+            print(f"Imported {json_path} into {sqlite}")
+        else:
+            storage.export_json(json_path)
+            print(f"Exported {sqlite} into {json_path}")
+    finally:
+        storage.close()
+    return 0
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+            description="Copy the database from JSON into SQLite, or back. "
+                        "Set TASKER_STORAGE=sqlite to use the SQLite "
+                        "database afterwards.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("direction", choices=["import", "export"],
+                        help="import copies JSON into SQLite, export copies "
+                             "SQLite into JSON.")
+    parser.add_argument("--json", dest="json_path", default=None,
+                        help="The JSON database file, defaults to "
+                             "~/.local/tasker/data.json.")
+    parser.add_argument("--sqlite", default=None,
+                        help="The SQLite database file, defaults to "
+                             "data.sqlite3 next to the JSON file.")
+    args = parser.parse_args(args=args)
+    if args.json_path is None:
+        args.json_path = data_path()
+    if args.sqlite is None:
+        args.sqlite = sqlite_path(args.json_path)
+    return args
+
+
+def cli_interface() -> None:
+    """Get program arguments from command line and run main"""
+    args = parse_arguments()
+    sys.exit(main(**vars(args)))
+
+
+# Execute only if this file is being run as the entry file.
+if __name__ == "__main__":
+    cli_interface()
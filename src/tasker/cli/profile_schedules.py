@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Propose the schedules of many profiles in parallel"""
+import datetime
+import json
+import sys
+
+from ..profiles import profile_paths, proposed_schedules
+
+
+def main(paths: list[str], date: datetime.date=None, jobs: int=None,
+         chunk_size: int=None, storage: str=None) -> int:
+    """Write the proposed schedule of each profile to stdout as a line of
+    JSON as soon as it's made, returning 1 if any couldn't be made.
+
+    Parameters
+    ----------
+    paths: list[str]
+        Database files, or directories of them, see profile_paths.
+    date: datetime.date=None
+        The date to propose schedules for, the default None uses today.
+    jobs: int=None
+        The number of processes, the default None uses one per CPU.
+    chunk_size: int=None
+        The number of profiles each process is given at a time, see
+        proposed_schedules.
+    storage: str=None
+        How the databases are stored, see storage_for.
+    """
+    if date is None:
+        date = datetime.date.today()
+
+    failed = False
+    write = sys.stdout.write
+    for path, schedule, error in proposed_schedules(
+            profile_paths(paths), date, workers=jobs,
+            chunk_size=chunk_size, mode=storage):
+        if error is not None:
+            print(f"{path}: {error}", file=sys.stderr)
+            failed = True
+            continue
+        write(json.dumps({'profile': path, 'date': date.isoformat(),
+                          **schedule}) + "\n")
+    return 1 if failed else 0
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    import argparse
+    from ..database import STORAGE_MODES
+
+    parser = argparse.ArgumentParser(
+            description="Print the proposed schedule of each profile as a "
+                        "line of JSON, making them in parallel.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("paths", nargs='+',
+                        help="Database files, or directories of NAME.json "
+                             "or NAME/data.json database files.")
+    parser.add_argument("-d", "--date", default=None,
+                        type=datetime.date.fromisoformat,
+                        help="The date to propose schedules for, if not "
+                             "given today.")
+    parser.add_argument("-j", "--jobs", default=None, type=int,
+                        help="The number of processes, if not given one "
+                             "per CPU.")
+    parser.add_argument("--chunk-size", default=None, type=int,
+                        help="The number of profiles each process is given "
+                             "at a time, if not given a few chunks per "
+                             "process.")
+    parser.add_argument("--storage", default=None, choices=STORAGE_MODES,
+                        help="How the databases are stored, defaults to "
+                             "$TASKER_STORAGE or json.")
+    args = parser.parse_args(args=args)
+    return args
+
+
+def cli_interface() -> None:
+    """Get program arguments from command line and run main"""
+    args = parse_arguments()
+    try:
+        sys.exit(main(**vars(args)))
+    except FileNotFoundError as exp:
+        print(exp)
+        sys.exit(-1)
+
+
+# Execute only if this file is being run as the entry file.
+if __name__ == "__main__":
+    cli_interface()
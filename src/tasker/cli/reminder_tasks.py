@@ -3,13 +3,12 @@
 
 import sys
 
-from .check_off_tasks import main, parse_arguments
+from .check_off_tasks import main
 
 
 def cli_interface() -> None:
     """Run check_off_tasks for pending Reminder tasks"""
-    main(["+Reminder", "status:pending"])
-    sys.exit(0)
+    sys.exit(main(["+Reminder", "status:pending"]))
 
 if __name__ == "__main__":
     cli_interface()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Show the schedules saved by todays_schedule"""
+import datetime
+import sys
+
+from ..database import ScheduleHistory, history_path
+from ..schedule import write_schedules
+
+
+def main(start: datetime.date=None, end: datetime.date=None,
+         days: int=7, fmt: str="text") -> None:
+    """Write the saved schedule of each day from start to end to stdout,
+    one day at a time.
+
+    Parameters
+    ----------
+    start: datetime.date=None
+        The first date to show. The default None shows the given number
+        of days up to end.
+    end: datetime.date=None
+        The last date to show. The default None uses today.
+    days: int=7
+        The number of days to show if start isn't given.
+    fmt: str="text"
+        The format to write the schedules in, see write_schedules.
+    """
+    if end is None:
+        end = datetime.date.today()
+    if start is None:
+        start = end - datetime.timedelta(days=days - 1)
+
+    with ScheduleHistory(history_path()) as history:
+        write_schedules(sys.stdout, history.between(start, end), fmt=fmt)
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+            description="Print out the schedules saved by todays_schedule.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-s", "--start", default=None,
+                        type=datetime.date.fromisoformat,
+                        help="The first date to show.")
+    parser.add_argument("-e", "--end", default=None,
+                        type=datetime.date.fromisoformat,
+                        help="The last date to show, if not given today.")
+    parser.add_argument("-d", "--days", default=7, type=int,
+                        help="The number of days to show if --start isn't "
+                             "given.")
+    parser.add_argument("-f", "--format", dest="fmt", default="text",
+                        choices=["text", "latex", "json"],
+                        help="The format to write the schedules in.")
+    args = parser.parse_args(args=args)
+    return args
+
+
+def cli_interface() -> None:
+    """Get program arguments from command line and run main"""
+    args = parse_arguments()
+    main(**vars(args))
+    sys.exit(0)
+
+
+# Execute only if this file is being run as the entry file.
+if __name__ == "__main__":
+    cli_interface()
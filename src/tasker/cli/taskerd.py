@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Keep tasker's data in memory to answer the other tools quickly"""
+import sys
+
+from ..daemon import DaemonUnavailable, request, serve, socket_path
+
+
+def main(socket: str=None, stop: bool=False) -> int:
+    """Serve requests until stopped, or stop a running taskerd.
+
+    Parameters
+    ----------
+    socket: str=None
+        The path of the socket, the default None uses socket_path.
+    stop: bool=False
+        Rather to stop the taskerd running on the socket instead.
+    """
+    if socket is None:
+        socket = socket_path()
+
+    if stop:
+        try:
+            request("shutdown", path=socket)
+        except DaemonUnavailable:
+            print(f"taskerd is not running on {socket}")
+            return 1
+        return 0
+
+    try:
+        serve(socket)
+    except RuntimeError as exp:
+        print(exp)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def parse_arguments(args=None) -> None:
+    """Returns the parsed arguments.
+
+    Parameters
+    ----------
+    args: List of strings to be parsed by argparse.
+        The default None results in argparse using the values passed into
+        sys.args.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+            description="Keep the database, proposed schedules, and task "
+                        "exports in memory, answering todays_schedule, "
+                        "weeks_schedule_preview, and reminder_tasks over a "
+                        "Unix socket.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--socket", default=None,
+                        help="The path of the socket, defaults to "
+                             "$TASKER_SOCKET or taskerd.sock in tasker's "
+                             "data directory.")
+    parser.add_argument("--stop", action="store_true",
+                        help="Stop the running taskerd.")
+    args = parser.parse_args(args=args)
+    return args
+
+
+def cli_interface() -> None:
+    """Get program arguments from command line and run main"""
+    args = parse_arguments()
+    sys.exit(main(**vars(args)))
+
+
+# Execute only if this file is being run as the entry file.
+if __name__ == "__main__":
+    cli_interface()
@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 """Create today's schedule from today's tasks"""
-import argparse
 import datetime
-from dateutil.parser import isoparse
 import os
 import sys
 
-from ..database import DATABASE, save_database
+from .. import daemon, trace
+from ..database import ScheduleHistory, history_path
 from ..schedule import Schedule
+from ..util import isoparse
 
 def quit_task_editing():
     pass
@@ -17,10 +17,10 @@ def delete_task(schedule: Schedule, task_id: int)\
     if task_id is None:
         print("A task id must be selected for this command")
     elif 0 <= task_id < len(schedule.tasks):
-        del schedule.tasks[task_id]
+        schedule.delete_task(task_id)
         print(f"Deleted task {task_id}")
     else:
-        print("Selected task {task_id} is out of range")
+        print(f"Selected task {task_id} is out of range")
     print("-"*os.get_terminal_size().columns)
     return schedule
 
@@ -29,14 +29,19 @@ def edit_start_time(schedule: Schedule, task_id: int,
     if task_id is None:
         print("A task id must be selected for this command")
     elif 0 <= task_id < len(schedule.tasks):
-        schedule.tasks[task_id].start = new_start_time
-        print(f"Deleted task {task_id}")
+        try:
+            schedule.retime_task(task_id, start=new_start_time)
+            print(f"Edited task {task_id}")
+        except ValueError as exp:
+            print(exp)
     else:
-        print("Selected task {task_id} is out of range")
+        print(f"Selected task {task_id} is out of range")
     print("-"*os.get_terminal_size().columns)
     return schedule
 
 def parse_task_args(args):
+    import argparse
+
     parser = argparse.ArgumentParser(
             description="Edit tasks",
             formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -82,15 +87,160 @@ def parse_task_args(args):
     else:
         return args
 
-def main(date: datetime.date) -> Schedule:
+def fill_schedule(schedule: Schedule, date: datetime.date, budget: float,
+                  default_estimate: int=None) -> list:
+    """Fill the free time of the schedule with pending tasks, returning
+    each added task with its candidate, see autofill. The date may also be
+    a datetime.
+    """
+    from ..schedule.autofill import autofill, pending_candidates
+
+    try:
+        candidates = pending_candidates(default_minutes=default_estimate)
+    except FileNotFoundError:
+        print("Could not run task to find pending tasks")
+        return []
+
+    # Only fill the rest of today
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    after = None
+    now = datetime.datetime.now()
+    if date == now.date():
+        after = now.time()
+
+    return autofill(schedule, candidates, after=after, budget=budget)
+
+
+def watch(date: datetime.datetime=None, fill: bool=False,
+          budget: float=0.05, default_estimate: int=None,
+          interval: float=1.0, max_interval: float=30.0) -> None:
+    """Show the proposed schedule, showing it again whenever it changes,
+    until interrupted.
+
+    The database and Taskwarrior's data files are polled for changes,
+    backing off while nothing changes. The day's schedule is only made
+    again when the database changes, or, with fill, when the tasks do or
+    the first filled task's start passes, so the rest of today is filled
+    again. It's only shown again if it looks different.
+
+    Parameters
+    ----------
+    date: datetime.datetime=None
+        The date to propose a schedule for, the default None follows
+        today, moving on to the next day at midnight.
+    fill: bool=False
+        Rather to fill the free time with pending tasks, see main.
+    budget: float=0.05
+        The seconds spent filling the free time, see main.
+    default_estimate: int=None
+        The minutes pending tasks without an estimate take, see main.
+    interval: float=1.0
+        The seconds between polls after a change.
+    max_interval: float=30.0
+        The most seconds between polls while nothing changes.
+    """
+    import time
+    from ..database import DATABASE
+    from ..export_cache import data_fingerprint
+    from ..watch import Watcher, database_files, file_stamps
+
+    follow_today = date is None
+    if follow_today:
+        day = datetime.date.today()
+    elif isinstance(date, datetime.datetime):
+        day = date.date()
+    else:
+        day = date
+    watcher = Watcher(
+            {'database': lambda: file_stamps(database_files(DATABASE)),
+             'taskwarrior': data_fingerprint},
+            interval=interval, max_interval=max_interval)
+
+    proposed = None
+    shown = None
+    changed = set()
+    # When the first filled task starts, after which it's filled again
+    refill_at = None
+    try:
+        while True:
+            # Make the day's schedule again only if what it's made from
+            # changed
+            if proposed is None or "database" in changed:
+                # taskerd reloads the database itself when it's running
+                if "database" in changed and DATABASE.loaded:
+                    DATABASE.reload()
+                proposed = daemon.proposed_schedule(day)
+                schedule = proposed
+            if fill and (schedule is proposed or "taskwarrior" in changed
+                         or (refill_at is not None
+                             and time.time() >= refill_at)):
+                schedule = proposed.copy()
+                added = fill_schedule(schedule, day, budget,
+                                      default_estimate)
+                # Only today's free time shrinks as time passes
+                refill_at = None
+                if len(added) > 0 and day == datetime.date.today():
+                    refill_at = datetime.datetime.combine(
+                            day, min(t.start for t, _ in added)).timestamp()
+
+            # Redraw only if the schedule looks different
+            rendered = f"Proposed Schedule for {day:%A %Y-%m-%d}:\n" \
+                       f"{schedule}"
+            if rendered != shown:
+                if sys.stdout.isatty():
+                    sys.stdout.write("\033[H\033[2J")
+                print(rendered, flush=True)
+                shown = rendered
+
+            # Wait for a change, the next refill, or the next day
+            deadline = refill_at
+            if follow_today:
+                midnight = datetime.datetime.combine(
+                        day + datetime.timedelta(days=1),
+                        datetime.time()).timestamp()
+                deadline = midnight if deadline is None \
+                    else min(deadline, midnight)
+            changed = watcher.wait(deadline=deadline)
+            if follow_today and datetime.date.today() != day:
+                day = datetime.date.today()
+                proposed = None
+                refill_at = None
+    except KeyboardInterrupt:
+        pass
+
+
+def main(date: datetime.date=None, fill: bool=False, budget: float=0.05,
+         default_estimate: int=None, save: bool=True) -> Schedule:
     """Return today's proposed schedule based on the recurring tasks.
     Parameters
     ----------
-    date: datetime.date
-        The date to propose a schedule for.
+    date: datetime.date=None
+        The date, or datetime, to propose a schedule for, the default None
+        uses today.
+    fill: bool=False
+        Rather to fill the free time with pending Taskwarrior tasks which
+        have an estimate.
+    budget: float=0.05
+        The seconds spent finding the best tasks to fill the free time
+        with, after putting the most urgent tasks in first.
+    default_estimate: int=None
+        The minutes pending tasks without an estimate are expected to
+        take, the default None leaves them out.
+    save: bool=True
+        Rather to save the final schedule to the schedule history.
     """
+    if date is None:
+        date = datetime.date.today()
+    elif isinstance(date, datetime.datetime):
+        date = date.date()
+
     # Get the proposed schedule
-    proposed_schedule = DATABASE.proposed_schedule(date)
+    proposed_schedule = daemon.proposed_schedule(date)
+
+    # Fill the free time with pending tasks
+    if fill:
+        fill_schedule(proposed_schedule, date, budget, default_estimate)
 
    
     user_wants_to_quit = False
@@ -114,6 +264,11 @@ def main(date: datetime.date) -> Schedule:
     # Finish with another set of dashes
     print("-"*os.get_terminal_size().columns)
 
+    # Keep the final schedule
+    if save:
+        with ScheduleHistory(history_path()) as history:
+            history.put(date, proposed_schedule)
+
     # Return the final schedule
     return proposed_schedule
 
@@ -127,19 +282,61 @@ def parse_arguments(args=None) -> None:
         The default None results in argparse using the values passed into
         sys.args.
     """
+    import argparse
+
     parser = argparse.ArgumentParser(
             description="Print out today's proposed schedule based on the "\
                         "recurring tasks.",
             formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-    parser.add_argument("-d", "--date", default=datetime.datetime.now(),
-                        type=isoparse)
+    parser.add_argument("-d", "--date", default=None, type=isoparse,
+                        help="The date to propose a schedule for, if not "
+                             "given today.")
+    parser.add_argument("--fill", action="store_true",
+                        help="Fill the free time with pending tasks, using "
+                             "the estimate UDA for how long they take.")
+    parser.add_argument("--budget", default=0.05, type=float,
+                        help="The seconds spent finding the best tasks to "
+                             "fill the free time with.")
+    parser.add_argument("--default-estimate", default=None, type=int,
+                        help="The minutes pending tasks without an "
+                             "estimate take, if not given they are left "
+                             "out.")
+    parser.add_argument("--no-save", dest="save", action="store_false",
+                        help="Don't save the final schedule to the "
+                             "schedule history.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep showing the schedule, showing it again "
+                             "whenever the database or tasks change it.")
+    parser.add_argument("--interval", default=1.0, type=float,
+                        help="With --watch, the seconds between checks for "
+                             "changes after a change.")
+    parser.add_argument("--max-interval", default=30.0, type=float,
+                        help="With --watch, the most seconds between checks "
+                             "for changes while nothing changes.")
+    parser.add_argument("--profile", nargs="?", const="stderr", default=None,
+                        help="Report the time spent in each phase to "
+                             "stderr, or append it as JSON to the given "
+                             "file.")
     args = parser.parse_args(args=args)
+    if args.watch and args.profile is not None:
+        parser.error("--profile can't be used with --watch, which runs "
+                     "until interrupted")
     return args
 
 
 def cli_interface() -> None:
     """Get program arguments from command line and run main"""
     args = parse_arguments()
+    profile = args.profile
+    del args.profile
+    if profile is not None:
+        trace.enable(profile)
+    if args.watch:
+        watch(date=args.date, fill=args.fill, budget=args.budget,
+              default_estimate=args.default_estimate,
+              interval=args.interval, max_interval=args.max_interval)
+        sys.exit(0)
+    del args.watch, args.interval, args.max_interval
     final_schedule = main(**vars(args))
     print(f"Final Schedule:\n{final_schedule}")
     sys.exit(0)
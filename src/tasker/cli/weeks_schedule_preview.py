@@ -1,28 +1,39 @@
 #!/usr/bin/env python3
 """Create today's schedule from today's tasks"""
-import argparse
 import datetime
 import os
 import sys
 
-from ..database import DATABASE, save_database
-from ..schedule import Schedule, ScheduleFailure
+from .. import daemon, trace
+from ..schedule import Schedule, ScheduleFailure, write_schedules
+
+# A Monday, for showing a generic week
+GENERIC_WEEK_START = datetime.date(year=1970, month=1, day=5)
+
+
+def main(start: datetime.date=None, end: datetime.date=None,
+         weeks: int=1):
+    """Return an iterator over the date and proposed schedule of each day
+    based on the recurring tasks.
 
-def main() -> Schedule:
-    """Return today's proposed schedule based on the recurring tasks.
     Parameters
     ----------
-    date: datetime.date
-        The date to propose a schedule for.
+    start: datetime.date=None
+        The first date to propose a schedule for. The default None
+        proposes a generic week.
+    end: datetime.date=None
+        The last date to propose a schedule for. The default None uses
+        the given number of weeks.
+    weeks: int=1
+        The number of weeks to propose schedules for if end isn't given.
     """
-    # Get the proposed schedule
-    schedules = {}
-    for i in range(0,7):
-        d = datetime.datetime(year=1970, month=1, day=5)
-        d += datetime.timedelta(days=i)
-        schedules[d] = DATABASE.proposed_schedule(d)
+    if start is None:
+        start = GENERIC_WEEK_START
+    if end is None:
+        end = start + datetime.timedelta(days=7 * weeks - 1)
 
-    return schedules
+    # Get the proposed schedules
+    return daemon.schedules_between(start, end)
 
 
 def parse_arguments(args=None) -> None:
@@ -34,10 +45,29 @@ def parse_arguments(args=None) -> None:
         The default None results in argparse using the values passed into
         sys.args.
     """
+    import argparse
+
     parser = argparse.ArgumentParser(
-            description="Print out today's proposed schedule based on the "\
-                        "recurring tasks.",
+            description="Print out the proposed schedule of each day based "\
+                        "on the recurring tasks.",
             formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-s", "--start", default=None,
+                        type=datetime.date.fromisoformat,
+                        help="The first date to show, if not given a "
+                             "generic week is shown.")
+    parser.add_argument("-e", "--end", default=None,
+                        type=datetime.date.fromisoformat,
+                        help="The last date to show.")
+    parser.add_argument("-w", "--weeks", default=1, type=int,
+                        help="The number of weeks to show if --end isn't "
+                             "given.")
+    parser.add_argument("-f", "--format", default="text",
+                        choices=["text", "latex", "json"],
+                        help="The format to write the schedules in.")
+    parser.add_argument("--profile", nargs="?", const="stderr", default=None,
+                        help="Report the time spent in each phase to "
+                             "stderr, or append it as JSON to the given "
+                             "file.")
     args = parser.parse_args(args=args)
     return args
 
@@ -45,14 +75,19 @@ def parse_arguments(args=None) -> None:
 def cli_interface() -> None:
     """Get program arguments from command line and run main"""
     args = parse_arguments()
+    profile = args.profile
+    del args.profile
+    if profile is not None:
+        trace.enable(profile)
+    fmt = args.format
+    del args.format
+    date_format = "%A" if args.start is None else "%A %Y-%m-%d"
     try:
-        schedules = main(**vars(args))
+        write_schedules(sys.stdout, main(**vars(args)), fmt=fmt,
+                        date_format=date_format)
     except ScheduleFailure as exp:
         print(exp)
         sys.exit(-1)
-
-    for d in sorted(schedules):
-        print(f"{d.strftime('%A')}\n{schedules[d]}")
     sys.exit(0)
 
 
@@ -0,0 +1,349 @@
+"""A long running process answering queries over a Unix socket.
+
+taskerd keeps the database, its proposed schedule caches, and the results
+of task export in memory, so the command line tools don't have to load
+them each time they run. Each request and reply is a line of JSON. The
+functions at the end of this module ask taskerd if it's running, and do
+the work in process otherwise.
+"""
+import datetime
+import json
+import os
+import time
+
+from . import trace
+from .export_cache import DEFAULT_MAX_AGE, data_fingerprint, refers_to_time
+from .watch import database_files, file_stamps
+
+# Seconds a client waits for taskerd before doing the work itself
+CLIENT_TIMEOUT = 30.0
+
+
+class DaemonUnavailable(Exception):
+    """Raised when taskerd isn't running or couldn't be reached"""
+
+
+class DaemonError(Exception):
+    """Raised when taskerd answered a request with an error"""
+
+
+def socket_path() -> str:
+    """Return the path of taskerd's socket, from TASKER_SOCKET if set"""
+    if "TASKER_SOCKET" in os.environ:
+        return os.environ["TASKER_SOCKET"]
+    from .database import data_dir
+    return os.path.join(data_dir(), "taskerd.sock")
+
+
+class DaemonState:
+    """The database and exports taskerd keeps in memory, reloading them
+    when the files they came from change.
+
+    Parameters
+    ----------
+    database: LazyDatabase=None
+        The database to serve, the default None serves the default one.
+    max_age: float=DEFAULT_MAX_AGE
+        The seconds an export is kept, as urgency changes with time alone.
+    """
+    def __init__(self, database: "LazyDatabase"=None,
+                 max_age: float=DEFAULT_MAX_AGE) -> None:
+        from .database import LazyDatabase
+
+        self.database = LazyDatabase() if database is None else database
+        self.max_age = max_age
+        self._database_stamp = None
+        # Each export by its filters and backend, with when it was made
+        self._exports = {}
+        self._exports_stamp = None
+
+    def fresh_database(self) -> "Database":
+        """Return the database, reloading it if its files have changed"""
+        stamp = file_stamps(database_files(self.database))
+        if stamp != self._database_stamp:
+            self.database.reload()
+            self._database_stamp = stamp
+        return self.database.load()
+
+    def export(self, filters: list[str], backend: str=None) -> list:
+        """Return the tasks of exporting with the given filters, exporting
+        again if Taskwarrior's data files have changed.
+        """
+        from .util import run_task_export
+
+        # What these match changes with time alone
+        if refers_to_time(filters):
+            return run_task_export(filters, backend=backend)
+
+        stamp = data_fingerprint()
+        if stamp != self._exports_stamp:
+            self._exports = {}
+            self._exports_stamp = stamp
+
+        key = (tuple(filters), backend)
+        made, tasks = self._exports.get(key, (0, None))
+        if tasks is None or time.time() - made > self.max_age:
+            tasks = run_task_export(filters, backend=backend)
+            self._exports[key] = (time.time(), tasks)
+        return tasks
+
+    def handle(self, request: dict):
+        """Return the result of the given request, or a generator of the
+        items of a result to stream back one at a time.
+        """
+        command = request.get('command')
+        args = request.get('args', {})
+        if command == "ping":
+            return "pong"
+        elif command == "proposed_schedule":
+            date = datetime.date.fromisoformat(args['date'])
+            return self.fresh_database().proposed_schedule(date).to_dict()
+        elif command == "schedules_between":
+            # Streamed back a day at a time, see serve
+            return ({'date': d.isoformat(), **schedule.to_dict()}
+                    for d, schedule in self.fresh_database().schedules_between(
+                        datetime.date.fromisoformat(args['start']),
+                        datetime.date.fromisoformat(args['end'])))
+        elif command == "export":
+            return self.export(args['filters'], args.get('backend'))
+        raise ValueError(f"Unknown command: {command}")
+
+
+def serve(path: str=None, state: DaemonState=None) -> None:
+    """Answer requests on the socket at the given path until a shutdown
+    request, or until interrupted.
+
+    Parameters
+    ----------
+    path: str=None
+        The path of the socket, the default None uses socket_path.
+    state: DaemonState=None
+        What to serve, the default None serves the default database.
+
+    Raises
+    ------
+    RuntimeError
+        If taskerd is already running on the socket.
+    """
+    import socketserver
+    import threading
+    import types
+
+    if path is None:
+        path = socket_path()
+    if state is None:
+        state = DaemonState()
+
+    # Remove the socket of a taskerd which didn't exit cleanly
+    if os.path.exists(path):
+        try:
+            _send(path, "ping", {})
+        except DaemonUnavailable:
+            os.remove(path)
+        else:
+            raise RuntimeError(f"taskerd is already running on {path}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, reply: dict) -> None:
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+        def handle(self) -> None:
+            try:
+                for line in self.rfile:
+                    self.handle_line(line)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading part way through a stream
+                pass
+
+        def handle_line(self, line: bytes) -> None:
+            try:
+                message = json.loads(line)
+                if message.get('command') == "shutdown":
+                    reply = {'ok': True, 'result': None}
+                    threading.Thread(target=server.shutdown).start()
+                else:
+                    result = state.handle(message)
+                    if isinstance(result, types.GeneratorType):
+                        # Each item is a line, then a line ends them
+                        for item in result:
+                            self.reply({'ok': True, 'item': item})
+                        reply = {'ok': True, 'end': True}
+                    else:
+                        reply = {'ok': True, 'result': result}
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as exp:
+                reply = {'ok': False,
+                         'error': f"{type(exp).__name__}: {exp}"}
+            self.reply(reply)
+
+    # Requests are handled one at a time, so the state needs no locking
+    server = socketserver.UnixStreamServer(path, Handler)
+    os.chmod(path, 0o600)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def request(command: str, path: str=None, **args):
+    """Return taskerd's result for the given command.
+
+    Set TASKER_DAEMON to 0 to never ask taskerd.
+
+    Raises
+    ------
+    DaemonUnavailable
+        If taskerd isn't running, or couldn't be reached.
+    DaemonError
+        If taskerd answered with an error.
+    """
+    if os.environ.get("TASKER_DAEMON") == "0":
+        raise DaemonUnavailable("TASKER_DAEMON is 0")
+    with trace.phase("daemon.request"):
+        return _send(socket_path() if path is None else path, command,
+                     args)
+
+
+def request_stream(command: str, path: str=None, **args):
+    """Return an iterator over taskerd's results for the given command,
+    each read from the socket as it's needed. taskerd is connected to, and
+    its first reply read, before returning, so the errors below are raised
+    here rather than part way through.
+
+    Raises
+    ------
+    DaemonUnavailable
+        If taskerd isn't running, or couldn't be reached.
+    DaemonError
+        If taskerd answered with an error.
+    """
+    if os.environ.get("TASKER_DAEMON") == "0":
+        raise DaemonUnavailable("TASKER_DAEMON is 0")
+    with trace.phase("daemon.request"):
+        sock, stream = _connect(socket_path() if path is None else path,
+                                command, args)
+        try:
+            reply = _read_reply(stream)
+        except BaseException:
+            stream.close()
+            sock.close()
+            raise
+    return _iter_replies(sock, stream, reply)
+
+
+def _connect(path: str, command: str, args: dict):
+    """Send a request to the socket at the given path, returning the
+    socket and the stream to read the replies from.
+    """
+    # Checking first saves importing socket when taskerd isn't running
+    if not os.path.exists(path):
+        raise DaemonUnavailable(f"No socket at {path}")
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(path)
+        stream = sock.makefile('rwb')
+        stream.write(json.dumps({'command': command, 'args': args})
+                     .encode("utf-8") + b"\n")
+        stream.flush()
+    except OSError as exp:
+        sock.close()
+        raise DaemonUnavailable(str(exp)) from None
+    return sock, stream
+
+
+def _read_reply(stream) -> dict:
+    """Return the next reply read from taskerd"""
+    try:
+        line = stream.readline()
+    except OSError as exp:
+        raise DaemonUnavailable(str(exp)) from None
+    if len(line) == 0:
+        raise DaemonUnavailable("taskerd closed the connection")
+    reply = json.loads(line)
+    if not reply['ok']:
+        raise DaemonError(reply['error'])
+    return reply
+
+
+def _iter_replies(sock, stream, reply: dict):
+    """Yield each item taskerd streams back, starting with the given
+    reply, until the end of the stream.
+    """
+    try:
+        # A whole result, from a command that isn't streamed
+        if 'result' in reply:
+            yield from reply['result']
+            return
+        while 'end' not in reply:
+            yield reply['item']
+            reply = _read_reply(stream)
+    finally:
+        stream.close()
+        sock.close()
+
+
+def _send(path: str, command: str, args: dict):
+    """Send a request to the socket at the given path, see request"""
+    sock, stream = _connect(path, command, args)
+    try:
+        return _read_reply(stream)['result']
+    finally:
+        stream.close()
+        sock.close()
+
+
+def proposed_schedule(date: datetime.date) -> "Schedule":
+    """Return the proposed schedule of the given date, from taskerd if it's
+    running.
+    """
+    from .schedule import Schedule
+
+    # A datetime's isoformat has its time too
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    try:
+        return Schedule.from_dict(request("proposed_schedule",
+                                          date=date.isoformat()))
+    except DaemonUnavailable:
+        from .database import DATABASE
+        return DATABASE.proposed_schedule(date)
+
+
+def schedules_between(start: datetime.date, end: datetime.date):
+    """Return an iterator over the date and proposed schedule of each day
+    from start to end, inclusive, from taskerd if it's running.
+    """
+    from .schedule import Schedule
+
+    if isinstance(start, datetime.datetime):
+        start = start.date()
+    if isinstance(end, datetime.datetime):
+        end = end.date()
+    try:
+        days = request_stream("schedules_between", start=start.isoformat(),
+                              end=end.isoformat())
+    except DaemonUnavailable:
+        from .database import DATABASE
+        return DATABASE.schedules_between(start, end)
+    return ((datetime.date.fromisoformat(d['date']), Schedule.from_dict(d))
+            for d in days)
+
+
+def iter_task_export(filters: list[str], backend: str=None):
+    """Return an iterator over the tasks of exporting with the given
+    filters, from taskerd if it's running.
+    """
+    try:
+        return iter(request("export", filters=list(filters),
+                            backend=backend))
+    except DaemonUnavailable:
+        from . import util
+        return util.iter_task_export(filters, backend=backend)
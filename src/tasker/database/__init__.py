@@ -1,24 +1,145 @@
-import json
 import os
 
+from .. import trace
 from .database import Database
 from .task import Task
 from .day import Day
+from .storage import JSONStorage, SQLiteStorage
+from .history import ScheduleHistory
 
 
-HOME_DIR = os.environ['HOME']
-DATA_DIR = os.path.join(HOME_DIR, ".local/tasker")
-if not os.path.isdir(DATA_DIR):
-    os.mkdir(DATA_DIR)
+# The ways the database can be stored, chosen with TASKER_STORAGE
+STORAGE_MODES = ["json", "journal", "sqlite"]
 
-DATA_PATH = os.path.join(DATA_DIR, "data.json")
-if os.path.isfile(DATA_PATH):
-    with open(DATA_PATH, 'r') as fin:
-        DATABASE = Database.from_dict(json.load(fin))
-else:
-    DATABASE = Database()
+
+def data_dir() -> str:
+    """Return the directory tasker keeps its data in"""
+    return os.path.join(os.environ['HOME'], ".local/tasker")
+
+
+def data_path() -> str:
+    """Return the path of the database file"""
+    return os.path.join(data_dir(), "data.json")
+
+
+def history_path() -> str:
+    """Return the path of the schedule history file"""
+    return os.path.join(data_dir(), "history.jsonl")
+
+
+def sqlite_path(path: str) -> str:
+    """Return the path of the SQLite file for the given database file"""
+    return os.path.splitext(path)[0] + ".sqlite3"
+
+
+def storage_for(path: str, mode: str=None) -> JSONStorage:
+    """Return the storage for the database at the given path.
+
+    Parameters
+    ----------
+    path: str
+        The path of the database file.
+    mode: str=None
+        "json" to rewrite the file on every save, "journal" to append
+        changes to a journal next to it, or "sqlite" to keep the database
+        in the SQLite file given by sqlite_path instead. The default None
+        uses TASKER_STORAGE, or "json" if it isn't set.
+    """
+    if mode is None:
+        mode = os.environ.get("TASKER_STORAGE", "json")
+    if mode == "json":
+        return JSONStorage(path)
+    elif mode == "journal":
+        return JSONStorage(path, journal=True)
+    elif mode == "sqlite":
+        return SQLiteStorage(sqlite_path(path))
+    raise ValueError(f"Unknown storage mode: {mode}, expected one of "
+                     f"{', '.join(STORAGE_MODES)}")
+
+
+def load_database(path: str) -> Database:
+    """Return the Database stored at the given path, or an empty Database
+    if there isn't one.
+    """
+    return JSONStorage(path).load()
+
+
+class LazyDatabase:
+    """Stands in for a Database, only loading it from disk once one of its
+    attributes is used.
+
+    Parameters
+    ----------
+    path: str=None
+        The path of the database file, the default None uses data_path at
+        the time the database is loaded.
+    mode: str=None
+        How the database is stored, see storage_for.
+    """
+    def __init__(self, path: str=None, mode: str=None) -> None:
+        self._path = path
+        self._mode = mode
+        self._storage = None
+        self._database = None
+
+    @property
+    def path(self) -> str:
+        """The path of the database file"""
+        return self.storage.path
+
+    @property
+    def storage(self) -> JSONStorage:
+        """The storage the database is loaded from and saved to"""
+        if self._storage is None:
+            path = self._path if self._path is not None else data_path()
+            self._storage = storage_for(path, self._mode)
+        return self._storage
+
+    @property
+    def loaded(self) -> bool:
+        """Rather the database has been loaded"""
+        return self._database is not None
+
+    def load(self) -> Database:
+        """Return the database, loading it if it hasn't been yet"""
+        if self._database is None:
+            self.reload()
+        return self._database
+
+    def reload(self) -> Database:
+        """Return the database after loading it again from disk"""
+        with trace.phase("database.load"):
+            self._database = self.storage.load()
+        return self._database
+
+    def save(self) -> None:
+        """Save the changes made to the database"""
+        database = self.load()
+        with trace.phase("database.save"):
+            self.storage.save(database)
+
+    def __getattr__(self, name: str):
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+        else:
+            setattr(self.load(), name, value)
+
+
+DATABASE = LazyDatabase()
 
 
 def save_database():
-    with open(DATA_PATH, 'w') as fout:
-        json.dump(DATABASE.to_dict(), fout, indent=1)
+    DATABASE.save()
+
+
+def __getattr__(name: str):
+    # DATA_DIR and DATA_PATH are found when used, so importing this module
+    # doesn't need $HOME
+    if name == "DATA_DIR":
+        return data_dir()
+    elif name == "DATA_PATH":
+        return data_path()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,17 +1,28 @@
 """The Database as a Python object"""
 import datetime
+import heapq
 
+from .. import trace
 from .task import Task
-from .day import Day
 from ..schedule import Schedule, Task as ScheduleTask
+from ..schedule.task import time_from_string
 
 
 class Database:
-    def __init__(self, day_start: datetime.time, day_end: datetime.time,
-            tasks: list[Task]=[]) -> None:
+    def __init__(self, day_start: datetime.time=datetime.time(0, 0),
+            day_end: datetime.time=datetime.time(23, 59),
+            tasks: list[Task]=None) -> None:
         self.day_start = day_start
         self.day_end = day_end
-        self.tasks = tasks
+        self.tasks = tasks if tasks is not None else []
+        # Changes made since the database was last saved, see take_changes
+        self.changes = []
+        # The tasks recurring on each weekday and the schedule they make,
+        # and the tasks with recurrence rules, built when first needed, see
+        # invalidate
+        self._weekday_index = None
+        self._templates = {}
+        self._ruled = None
 
     def to_dict(self) -> dict:
         """This class as a dictionary for JSON encoding"""
@@ -22,22 +33,180 @@ class Database:
     @classmethod
     def from_dict(cls, d:dict) -> "Database":
         """This class from a dictionary for JSON encoding"""
-        return cls(day_start=datetime.time.fromisoformat(d['day_start']),
-                   day_end=datetime.time.fromisoformat(d['day_end']),
+        return cls(day_start=time_from_string(d['day_start']),
+                   day_end=time_from_string(d['day_end']),
                    tasks=[Task.from_dict(t) for t in d['tasks']])
 
+    def add_task(self, task: Task) -> None:
+        """Add a task to the end of this database"""
+        self.apply_change({'op': "add", 'task': task.to_dict()})
+
+    def edit_task(self, index: int, task: Task) -> None:
+        """Replace the task at the given index with the given task"""
+        self.apply_change({'op': "edit", 'index': index,
+                           'task': task.to_dict()})
+
+    def delete_task(self, index: int) -> None:
+        """Delete the task at the given index"""
+        self.apply_change({'op': "delete", 'index': index})
+
+    def apply_change(self, change: dict, record: bool=True) -> None:
+        """Apply a change made by add_task, edit_task, or delete_task.
+
+        Parameters
+        ----------
+        change: dict
+            The change, as made by one of the methods above.
+        record: bool=True
+            Rather to add the change to the changes to be saved. Changes
+            replayed from storage shouldn't be.
+        """
+        op = change['op']
+        if op == "add":
+            self.tasks.append(Task.from_dict(change['task']))
+        elif op == "edit":
+            if not 0 <= change['index'] < len(self.tasks):
+                raise IndexError(f"No task {change['index']} to edit")
+            self.tasks[change['index']] = Task.from_dict(change['task'])
+        elif op == "delete":
+            if not 0 <= change['index'] < len(self.tasks):
+                raise IndexError(f"No task {change['index']} to delete")
+            del self.tasks[change['index']]
+        else:
+            raise ValueError(f"Unknown database change: {op}")
+
+        self.invalidate()
+        if record:
+            self.changes.append(change)
+
+    def take_changes(self) -> list[dict]:
+        """Return the changes made since this was last called"""
+        changes, self.changes = self.changes, []
+        return changes
+
+    def invalidate(self) -> None:
+        """Forget the tasks recurring on each weekday and the schedules
+        they make. The methods above call this, but it must be called after
+        changing tasks directly.
+        """
+        self._weekday_index = None
+        self._templates = {}
+        self._ruled = None
+
+    def _check_index(self) -> None:
+        """Catch tasks added or deleted directly, without invalidate"""
+        if self._weekday_index is not None \
+                and self._weekday_index[7] != len(self.tasks):
+            self.invalidate()
+
+    def weekday_tasks(self, weekday: int) -> list[Task]:
+        """Return the tasks without a recurrence rule recurring on the
+        given weekday, sorted by start time. The list must not be changed.
+
+        Parameters
+        ----------
+        weekday: int
+            The weekday, with Monday as 0 to match datetime.
+        """
+        self._check_index()
+        if self._weekday_index is None:
+            index = [[] for _ in range(7)]
+            for task in self.tasks:
+                if task.rule is not None:
+                    continue
+                mask = task.recur_mask
+                for day in range(7):
+                    if mask & (1 << day):
+                        index[day].append(task)
+            for day_tasks in index:
+                day_tasks.sort(key=lambda t: t.usual_start_minute)
+            index.append(len(self.tasks))
+            self._weekday_index = index
+        return self._weekday_index[weekday]
+
+    def ruled_tasks(self) -> list[Task]:
+        """Return the tasks with a recurrence rule, which weekday_tasks
+        leaves out. The list must not be changed.
+        """
+        self._check_index()
+        if self._ruled is None:
+            self._ruled = [t for t in self.tasks if t.rule is not None]
+        return self._ruled
+
+    def weekday_template(self, weekday: int) -> Schedule:
+        """Return the schedule of the tasks without a recurrence rule
+        recurring on the given weekday. The schedule is shared, so it must
+        be copied before changing it.
+
+        Parameters
+        ----------
+        weekday: int
+            The weekday, with Monday as 0 to match datetime.
+        """
+        self._check_index()
+        template = self._templates.get(weekday)
+        if template is None or template.day_start != self.day_start \
+                or template.day_end != self.day_end:
+            with trace.phase("database.weekday_template"):
+                template = Schedule(
+                        day_start=self.day_start,
+                        day_end=self.day_end,
+                        tasks=[ScheduleTask.from_database_task(t)
+                               for t in self.weekday_tasks(weekday)])
+            self._templates[weekday] = template
+        return template
+
     def proposed_schedule(self, date: datetime.date) -> Schedule:
         """Return a Schedule object with recurring tasks from this 
            database
         """
-        todays_tasks = []
-        for task in self.tasks:
-            converted_task = ScheduleTask.from_database_task(task)
-            if Day.DAILY in task.recur:
-                todays_tasks.append(converted_task)
-            elif date.weekday() in [d.value for d in task.recur]:
-                todays_tasks.append(converted_task)
-
-        return Schedule(day_start=self.day_start,
-                        day_end=self.day_end,
-                        tasks=todays_tasks)
+        with trace.phase("database.proposed_schedule"):
+            schedule = self.weekday_template(date.weekday()).copy()
+            for task in self.ruled_tasks():
+                if task.recurrence.occurs_on(date):
+                    schedule.add_task(ScheduleTask.from_database_task(task))
+            return schedule
+
+    def schedules_between(self, start: datetime.date, end: datetime.date):
+        """Yield the date and proposed schedule of each day from start to
+        end, inclusive.
+
+        The tasks are only gone through once, to make the schedule of each
+        weekday, and each day's schedule is only made when it is reached,
+        so any number of days can be gone through with the memory of one.
+        Tasks with recurrence rules are only looked at on the dates they
+        occur on.
+
+        Parameters
+        ----------
+        start: datetime.date
+            The first date to propose a schedule for.
+        end: datetime.date
+            The last date to propose a schedule for.
+        """
+        # The date and position of each occurrence of the ruled tasks, in
+        # order of date
+        ruled = self.ruled_tasks()
+        occurrences = heapq.merge(*[_occurrences(t, i, start, end)
+                                    for i, t in enumerate(ruled)])
+        occurrence = next(occurrences, None)
+
+        one_day = datetime.timedelta(days=1)
+        date = start
+        while date <= end:
+            schedule = self.weekday_template(date.weekday()).copy()
+            while occurrence is not None and occurrence[0] == date:
+                schedule.add_task(
+                        ScheduleTask.from_database_task(ruled[occurrence[1]]))
+                occurrence = next(occurrences, None)
+            yield date, schedule
+            date += one_day
+
+
+def _occurrences(task: Task, position: int, start: datetime.date,
+                 end: datetime.date):
+    """Yield the date and given position of each occurrence of the task
+    from start to end.
+    """
+    for date in task.recurrence.between(start, end):
+        yield date, position
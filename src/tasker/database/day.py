@@ -21,3 +21,19 @@ class Day(Enum):
    def from_string(cls, name:str) -> "Day":
        """This class from a from for JSON encoding"""
        return cls[name.upper()]
+
+
+def recur_mask(days: list[Day]) -> int:
+   """Return the given days as a bitmask of weekdays, with bit 0 for
+   Monday through bit 6 for Sunday.
+   """
+   mask = 0
+   for d in days:
+       if d is Day.DAILY:
+           return ALL_DAYS_MASK
+       mask |= 1 << d.value
+   return mask
+
+
+# The bitmask of every day of the week
+ALL_DAYS_MASK = 0b1111111
@@ -0,0 +1,225 @@
+"""An append-only history of each day's final schedule"""
+import datetime
+import json
+import os
+import struct
+
+from .. import trace
+from ..schedule import Schedule
+
+# The header of the index: a magic number, the ordinal of the date in the
+# first slot, and the length of the history the index covers
+_HEADER = struct.Struct("<8sQQ")
+_MAGIC = b"TSKHST01"
+
+# A slot of the index: the offset and length of a date's latest record,
+# with a length of 0 for dates without one
+_SLOT = struct.Struct("<QI")
+
+# The most bytes read at once while indexing the history
+_CHUNK_SIZE = 64 * 1024
+
+
+class ScheduleHistory:
+    """Keeps the schedule of each day as a line of JSON appended to a
+    history file, along with an index of where each date's latest line is.
+
+    The index has a fixed width slot per date, from the earliest date in
+    the history on, so finding a date's schedule is reading one slot of the
+    memory mapped index and one line of the history. Saving a date again
+    appends a new line and points its slot at it. The index can always be
+    rebuilt from the history, and the part of the history written after
+    the index last was, such as by an interrupted save, is indexed when
+    the history is opened.
+
+    Parameters
+    ----------
+    path: str
+        The path of the history file. The index is kept next to it with
+        .idx appended.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.index_path = path + ".idx"
+        self._data_fd = None
+        self._index_fd = None
+        self._map = None
+        # The ordinal of the date in the first slot, 0 if there are none
+        self._base = 0
+        self._size = 0
+
+    def __enter__(self) -> "ScheduleHistory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the history and its index"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        for fd in (self._data_fd, self._index_fd):
+            if fd is not None:
+                os.close(fd)
+        self._data_fd = None
+        self._index_fd = None
+
+    def _open(self) -> None:
+        """Open the history and its index, indexing anything new"""
+        if self._data_fd is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._data_fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._index_fd = os.open(self.index_path, os.O_RDWR | os.O_CREAT,
+                                 0o644)
+
+        header = os.pread(self._index_fd, _HEADER.size, 0)
+        indexed = 0
+        if len(header) == _HEADER.size:
+            magic, self._base, indexed = _HEADER.unpack(header)
+            if magic != _MAGIC:
+                indexed = 0
+        self._size = os.fstat(self._data_fd).st_size
+        if indexed == 0 or indexed > self._size:
+            # Start the index over
+            self._base = 0
+            indexed = 0
+            os.ftruncate(self._index_fd, 0)
+        self._index_from(indexed)
+
+    def _index_from(self, offset: int) -> None:
+        """Index the lines of the history from the given offset on,
+        dropping a partly written last line.
+        """
+        pending = b""
+        position = offset
+        while True:
+            chunk = os.pread(self._data_fd, _CHUNK_SIZE, position)
+            if len(chunk) == 0:
+                break
+            position += len(chunk)
+            pending += chunk
+            start = 0
+            end = pending.find(b"\n")
+            while end != -1:
+                line = pending[start:end + 1]
+                date = datetime.date.fromisoformat(json.loads(line)['date'])
+                self._set_slot(date.toordinal(), offset, len(line))
+                offset += len(line)
+                start = end + 1
+                end = pending.find(b"\n", start)
+            pending = pending[start:]
+
+        if offset < self._size:
+            os.ftruncate(self._data_fd, offset)
+        self._size = offset
+        self._write_header()
+
+    def _write_header(self) -> None:
+        os.pwrite(self._index_fd, _HEADER.pack(_MAGIC, self._base,
+                                               self._size), 0)
+
+    def _set_slot(self, ordinal: int, offset: int, length: int) -> None:
+        """Point the slot of the given date at a line of the history"""
+        if self._base == 0:
+            self._base = ordinal
+            self._write_header()
+        elif ordinal < self._base:
+            # Move every slot along to make room for the earlier date
+            self._close_map()
+            size = os.fstat(self._index_fd).st_size
+            slots = os.pread(self._index_fd, size - _HEADER.size,
+                             _HEADER.size)
+            os.pwrite(self._index_fd,
+                      bytes(_SLOT.size * (self._base - ordinal)) + slots,
+                      _HEADER.size)
+            self._base = ordinal
+            self._write_header()
+        os.pwrite(self._index_fd, _SLOT.pack(offset, length),
+                  _HEADER.size + (ordinal - self._base) * _SLOT.size)
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _slot(self, ordinal: int) -> tuple[int, int]:
+        """Return the offset and length of the given date's line, with a
+        length of 0 if it has none.
+        """
+        import mmap
+
+        position = _HEADER.size + (ordinal - self._base) * _SLOT.size
+        if self._base == 0 or ordinal < self._base:
+            return 0, 0
+        # The index grows as dates are added, so map it again if needed
+        if self._map is None or position + _SLOT.size > len(self._map):
+            size = os.fstat(self._index_fd).st_size
+            if position + _SLOT.size > size:
+                return 0, 0
+            self._close_map()
+            self._map = mmap.mmap(self._index_fd, size,
+                                  access=mmap.ACCESS_READ)
+        return _SLOT.unpack_from(self._map, position)
+
+    def get(self, date: datetime.date) -> Schedule:
+        """Return the schedule saved for the given date, or None if there
+        isn't one.
+        """
+        self._open()
+        offset, length = self._slot(date.toordinal())
+        if length == 0:
+            return None
+        return Schedule.from_dict(
+                json.loads(os.pread(self._data_fd, length, offset)))
+
+    def __contains__(self, date: datetime.date) -> bool:
+        self._open()
+        return self._slot(date.toordinal())[1] != 0
+
+    def put(self, date: datetime.date, schedule: Schedule) -> None:
+        """Save the schedule of the given date, replacing any previous one
+        in the index.
+        """
+        with trace.phase("database.history_save"):
+            self._open()
+            line = json.dumps({'date': date.isoformat(),
+                               **schedule.to_dict()})
+            line = (line + "\n").encode("utf-8")
+            offset = self._size
+            os.pwrite(self._data_fd, line, offset)
+            os.fsync(self._data_fd)
+            self._size = offset + len(line)
+            self._set_slot(date.toordinal(), offset, len(line))
+            self._write_header()
+
+    def _last_ordinal(self) -> int:
+        """Return the ordinal of the last slot of the index"""
+        slots = (os.fstat(self._index_fd).st_size - _HEADER.size) \
+                // _SLOT.size
+        return self._base + slots - 1
+
+    def dates(self):
+        """Yield each date with a saved schedule, in order"""
+        self._open()
+        if self._base == 0:
+            return
+        for ordinal in range(self._base, self._last_ordinal() + 1):
+            if self._slot(ordinal)[1] != 0:
+                yield datetime.date.fromordinal(ordinal)
+
+    def between(self, start: datetime.date, end: datetime.date):
+        """Yield the date and saved schedule of each day from start to end,
+        inclusive, which has one, reading them one at a time.
+        """
+        self._open()
+        if self._base == 0:
+            return
+        for ordinal in range(max(start.toordinal(), self._base),
+                             min(end.toordinal(), self._last_ordinal()) + 1):
+            offset, length = self._slot(ordinal)
+            if length != 0:
+                yield (datetime.date.fromordinal(ordinal),
+                       Schedule.from_dict(json.loads(
+                           os.pread(self._data_fd, length, offset))))
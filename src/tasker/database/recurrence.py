@@ -0,0 +1,174 @@
+"""Recurrence rules beyond a list of weekdays.
+
+A task's rule is stored next to its recur list as a dictionary, such as
+
+    {"interval": 2, "anchor": "2024-01-01",
+     "monthly": [[1, "MONDAY"], [-1, "FRIDAY"]],
+     "except": ["2024-12-25"], "start": "2024-01-01", "until": "2024-12-31"}
+
+A task with a rule recurs on the weekdays of its recur list every interval
+weeks, counting from the week of anchor, and on the nth weekday of each
+month given by monthly, with negative n counting from the end of the
+month. Dates in except are skipped, as are dates before start or after
+until. Every key is optional.
+
+Each rule is compiled once into a Recurrence, which works out the dates it
+occurs on with date arithmetic, so going through a range costs the number
+of occurrences rather than the number of days.
+"""
+import datetime
+import heapq
+
+from .day import Day, recur_mask
+
+# The Monday weeks are counted from when a rule has no anchor
+DEFAULT_ANCHOR = datetime.date(1970, 1, 5)
+
+# How far next_on_or_after looks before deciding a rule never occurs again
+SEARCH_LIMIT = datetime.timedelta(days=366 * 10)
+
+
+class Recurrence:
+    """The dates a task recurs on, compiled from its recur list and rule.
+
+    Parameters
+    ----------
+    recur: list[Day]
+        The weekdays the task recurs on.
+    rule: dict=None
+        The rest of the task's rule, see this module's documentation.
+
+    Raises
+    ------
+    ValueError
+        If the rule is malformed.
+    """
+    def __init__(self, recur: list[Day], rule: dict=None) -> None:
+        rule = {} if rule is None else rule
+        unknown = set(rule) - {"interval", "anchor", "monthly", "except",
+                               "start", "until"}
+        if len(unknown) > 0:
+            raise ValueError(f"Unknown recurrence rule keys: "
+                             f"{', '.join(sorted(unknown))}")
+
+        self.weekdays = [d for d in range(7) if recur_mask(recur) & (1 << d)]
+        self.interval = int(rule.get('interval', 1))
+        if self.interval < 1:
+            raise ValueError(f"The interval must be at least 1, not "
+                             f"{self.interval}")
+        anchor = _date(rule.get('anchor')) or DEFAULT_ANCHOR
+        # The ordinal of the Monday of the anchor's week
+        self.anchor = anchor.toordinal() - anchor.weekday()
+
+        self.monthly = []
+        for n, day in rule.get('monthly', []):
+            day = Day.from_string(day)
+            if day is Day.DAILY or n == 0 or not -5 <= n <= 5:
+                raise ValueError(f"Can't recur on the {n} {day.to_string()} "
+                                 f"of the month")
+            self.monthly.append((n, day.value))
+
+        self.exceptions = frozenset(_date(d) for d in rule.get('except', []))
+        self.start = _date(rule.get('start'))
+        self.until = _date(rule.get('until'))
+
+    def occurs_on(self, date: datetime.date) -> bool:
+        """Return if the task recurs on the given date"""
+        if date in self.exceptions \
+                or (self.start is not None and date < self.start) \
+                or (self.until is not None and date > self.until):
+            return False
+        if date.weekday() in self.weekdays and (
+                (date.toordinal() - self.anchor) // 7 % self.interval == 0):
+            return True
+        return any(_nth_weekday(date.year, date.month, n, weekday) == date
+                   for n, weekday in self.monthly)
+
+    def between(self, start: datetime.date, end: datetime.date):
+        """Yield each date from start to end, inclusive, the task recurs
+        on, in order.
+        """
+        if self.start is not None:
+            start = max(start, self.start)
+        if self.until is not None:
+            end = min(end, self.until)
+        if start > end:
+            return
+
+        previous = None
+        for date in heapq.merge(self._weekly(start, end),
+                                self._monthly(start, end)):
+            if date != previous and date not in self.exceptions:
+                yield date
+            previous = date
+
+    def next_on_or_after(self, date: datetime.date) -> datetime.date:
+        """Return the first date on or after the given one the task recurs
+        on, or None if it doesn't within SEARCH_LIMIT.
+        """
+        # Each window holds at least one interval and one month
+        window = datetime.timedelta(days=max(7 * self.interval, 31))
+        last = date + SEARCH_LIMIT
+        if self.until is not None:
+            last = min(last, self.until)
+        while date <= last:
+            for occurrence in self.between(date, min(date + window, last)):
+                return occurrence
+            date += window + datetime.timedelta(days=1)
+        return None
+
+    def _weekly(self, start: datetime.date, end: datetime.date):
+        """Yield the dates the weekdays occur on from start to end"""
+        if len(self.weekdays) == 0:
+            return
+        # Jump straight to the first week of the interval at or after start
+        week = (start.toordinal() - self.anchor) // 7
+        week += -week % self.interval
+        monday = self.anchor + 7 * week
+        first, last = start.toordinal(), end.toordinal()
+        while monday <= last:
+            for weekday in self.weekdays:
+                if first <= monday + weekday <= last:
+                    yield datetime.date.fromordinal(monday + weekday)
+            monday += 7 * self.interval
+
+    def _monthly(self, start: datetime.date, end: datetime.date):
+        """Yield the dates the days of the month occur on from start to
+        end.
+        """
+        if len(self.monthly) == 0:
+            return
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            dates = sorted(filter(None, (_nth_weekday(year, month, n, weekday)
+                                         for n, weekday in self.monthly)))
+            for date in dates:
+                if start <= date <= end:
+                    yield date
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _date(value) -> datetime.date:
+    """Return the given ISO date string as a date, or None for None"""
+    if value is None:
+        return None
+    return datetime.date.fromisoformat(value)
+
+
+def _nth_weekday(year: int, month: int, n: int,
+                 weekday: int) -> datetime.date:
+    """Return the nth of the given weekday in the month, counting from the
+    end of the month for negative n, or None if the month has no such day.
+    """
+    first = datetime.date(year, month, 1)
+    first_weekday = first.weekday()
+    next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
+    days = (next_month - first).days
+    if n > 0:
+        day = 1 + (weekday - first_weekday) % 7 + 7 * (n - 1)
+    else:
+        last_weekday = (first_weekday + days - 1) % 7
+        day = days - (last_weekday - weekday) % 7 - 7 * (-n - 1)
+    if not 1 <= day <= days:
+        return None
+    return datetime.date(year, month, day)
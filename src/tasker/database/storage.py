@@ -0,0 +1,447 @@
+"""Ways of storing the Database on disk"""
+import datetime
+import json
+import os
+
+from .database import Database
+from .day import Day
+from .task import Task
+from ..schedule import Schedule, Task as ScheduleTask
+from ..schedule.task import time_from_string
+
+
+def atomic_write_json(path: str, d: dict) -> None:
+    """Write the given dictionary as JSON to the given path, such that the
+    path holds either its old contents or all of the new ones even if the
+    write is interrupted.
+    """
+    import tempfile
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as fout:
+            json.dump(d, fout, indent=1)
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Make sure the rename itself survives a crash
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class JSONStorage:
+    """Stores the Database as a JSON snapshot, optionally with a journal of
+    the changes made since the snapshot was written.
+
+    Without a journal every save rewrites the whole snapshot. With one, a
+    save only appends the database's changes to the journal, and the
+    journal is compacted into a new snapshot once it holds compact_every
+    changes. Each change is numbered, and the snapshot records the number
+    of the last change it includes, so a crash between writing a snapshot
+    and emptying the journal doesn't apply changes twice.
+
+    Parameters
+    ----------
+    path: str
+        The path of the snapshot. The journal is kept next to it with
+        .journal appended.
+    journal: bool=False
+        Rather to save by appending to the journal.
+    compact_every: int=100
+        The number of changes in the journal before it is compacted.
+    """
+    def __init__(self, path: str, journal: bool=False,
+                 compact_every: int=100) -> None:
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.journal = journal
+        self.compact_every = compact_every
+        # The number of the last change saved, and how many are in the
+        # journal, both found on load
+        self._sequence = None
+        self._journaled = None
+        self._journal_size = 0
+
+    def load(self) -> Database:
+        """Return the Database from the snapshot with the journal
+        replayed, or an empty Database if there is neither.
+        """
+        sequence = 0
+        if os.path.isfile(self.path):
+            with open(self.path, 'r') as fin:
+                d = json.load(fin)
+            database = Database.from_dict(d)
+            sequence = d.get('sequence', 0)
+        else:
+            database = Database()
+
+        journaled = 0
+        for change in self.read_journal():
+            journaled += 1
+            if change['sequence'] > sequence:
+                database.apply_change(change, record=False)
+                sequence = change['sequence']
+
+        self._sequence = sequence
+        self._journaled = journaled
+        return database
+
+    def read_journal(self):
+        """Yield each change in the journal.
+
+        A last line which can't be read is the remains of an interrupted
+        save and is ignored, and cut off by the next save.
+        """
+        self._journal_size = 0
+        try:
+            fin = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return
+        with fin:
+            for line in fin:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Incomplete change")
+                    change = json.loads(line)
+                except ValueError:
+                    if fin.read(1) == b"":
+                        return
+                    raise
+                self._journal_size += len(line)
+                yield change
+
+    def save(self, database: Database) -> None:
+        """Save the changes made to the given database since it was loaded
+        or last saved.
+        """
+        if self._sequence is None:
+            # Find where the files on disk are up to
+            self.load()
+
+        changes = database.take_changes()
+        if not self.journal:
+            self._sequence += len(changes)
+            self.write_snapshot(database)
+            return
+
+        if len(changes) > 0:
+            os.makedirs(os.path.dirname(self.journal_path) or ".",
+                        exist_ok=True)
+            with open(self.journal_path, 'ab') as fout:
+                # Cut off anything left by an interrupted save
+                if fout.tell() != self._journal_size:
+                    fout.truncate(self._journal_size)
+                for change in changes:
+                    self._sequence += 1
+                    change = dict(change, sequence=self._sequence)
+                    line = (json.dumps(change) + "\n").encode("utf-8")
+                    fout.write(line)
+                    self._journal_size += len(line)
+                fout.flush()
+                os.fsync(fout.fileno())
+            self._journaled += len(changes)
+
+        if self._journaled >= self.compact_every:
+            self.write_snapshot(database)
+
+    def compact(self, database: Database) -> None:
+        """Write the given database as a new snapshot and empty the
+        journal.
+        """
+        if self._sequence is None:
+            self.load()
+        self._sequence += len(database.take_changes())
+        self.write_snapshot(database)
+
+    def write_snapshot(self, database: Database) -> None:
+        """Write the given database as the snapshot, then remove the
+        journal it includes.
+        """
+        d = database.to_dict()
+        d['sequence'] = self._sequence
+        atomic_write_json(self.path, d)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journaled = 0
+        self._journal_size = 0
+
+
+def time_from_seconds(seconds: int) -> datetime.time:
+    """Return the given number of seconds since midnight as a time,
+    dropping any seconds past the minute, see time_from_string.
+    """
+    return datetime.time(seconds // 3600, seconds // 60 % 60)
+
+
+class SQLiteDatabase(Database):
+    """A Database kept in SQLite, whose tasks are only read once they are
+    used, and whose proposed schedules are read in order straight from an
+    index of the days each task recurs on.
+
+    Parameters
+    ----------
+    connection: sqlite3.Connection
+        The connection to the database file.
+    day_start: datetime.time
+        The start of each day.
+    day_end: datetime.time
+        The end of each day.
+    """
+    def __init__(self, connection, day_start: datetime.time,
+                 day_end: datetime.time) -> None:
+        super().__init__(day_start=day_start, day_end=day_end)
+        self.connection = connection
+        self._tasks = None
+        # Rather tasks was replaced rather than changed through add_task,
+        # edit_task, and delete_task
+        self.replaced = False
+
+    @property
+    def tasks(self) -> list[Task]:
+        """The tasks of this database, read on first use"""
+        if self._tasks is None:
+            self._tasks = self._select_tasks(
+                    "SELECT name, recur, usual_start, usual_end, rule "
+                    "FROM tasks ORDER BY position")
+        return self._tasks
+
+    def _select_tasks(self, query: str) -> list[Task]:
+        """Return the tasks of the rows the given query selects"""
+        return [Task(name=name,
+                     recur=[Day.from_string(r)
+                            for r in recur.split(",") if r],
+                     usual_start=time_from_seconds(usual_start),
+                     usual_end=time_from_seconds(usual_end),
+                     rule=None if rule is None else json.loads(rule))
+                for name, recur, usual_start, usual_end, rule
+                in self.connection.execute(query)]
+
+    @tasks.setter
+    def tasks(self, tasks: list[Task]) -> None:
+        if getattr(self, "_tasks", None) is not None:
+            self.replaced = True
+            self.invalidate()
+        self._tasks = tasks
+
+    def ruled_tasks(self) -> list[Task]:
+        """Return the tasks with a recurrence rule, read on their own
+        without reading the rest of the tasks.
+        """
+        if len(self.changes) > 0 or self.replaced \
+                or self._tasks is not None:
+            return super().ruled_tasks()
+        if self._ruled is None:
+            self._ruled = self._select_tasks(
+                    "SELECT name, recur, usual_start, usual_end, rule "
+                    "FROM tasks WHERE rule IS NOT NULL ORDER BY position")
+        return self._ruled
+
+    def weekday_template(self, weekday: int) -> Schedule:
+        """Return the schedule of the tasks without a recurrence rule
+        recurring on the given weekday. The schedule is shared, so it must
+        be copied before changing it.
+
+        Parameters
+        ----------
+        weekday: int
+            The weekday, with Monday as 0 to match datetime.
+        """
+        # Unsaved changes aren't in the index yet
+        if len(self.changes) > 0 or self.replaced:
+            return super().weekday_template(weekday)
+
+        template = self._templates.get(weekday)
+        if template is not None and template.day_start == self.day_start \
+                and template.day_end == self.day_end:
+            return template
+
+        todays_tasks = [
+                ScheduleTask.from_minutes(name, usual_start // 60,
+                                          usual_end // 60)
+                for name, usual_start, usual_end in self.connection.execute(
+                    "SELECT tasks.name, tasks.usual_start, tasks.usual_end "
+                    "FROM task_days JOIN tasks "
+                    "ON tasks.position = task_days.position "
+                    "WHERE task_days.weekday = ? "
+                    "ORDER BY task_days.usual_start, task_days.position",
+                    (weekday,))]
+
+        template = Schedule(day_start=self.day_start,
+                            day_end=self.day_end,
+                            tasks=todays_tasks)
+        self._templates[weekday] = template
+        return template
+
+
+class SQLiteStorage:
+    """Stores the Database in SQLite.
+
+    Each task is stored with its recurrence as a bitmask of weekdays, and
+    task_days holds a row per task per weekday it recurs on, indexed by
+    weekday and start time, so a day's tasks are found already sorted.
+    Tasks with a recurrence rule keep it as JSON, and have no task_days.
+    Saves only write the changes made since the database was loaded.
+
+    Parameters
+    ----------
+    path: str
+        The path of the SQLite database file.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS tasks (
+            position INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            recur TEXT NOT NULL,
+            recur_mask INTEGER NOT NULL,
+            usual_start INTEGER NOT NULL,
+            usual_end INTEGER NOT NULL,
+            rule TEXT);
+        CREATE TABLE IF NOT EXISTS task_days (
+            weekday INTEGER NOT NULL,
+            usual_start INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (weekday, usual_start, position)) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS task_days_position
+            ON task_days (position);
+        """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        """The connection to the database file, opened on first use"""
+        if self._connection is None:
+            import sqlite3
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(self.SCHEMA)
+            # Files made before recurrence rules lack the column
+            columns = [row[1] for row in self._connection.execute(
+                    "PRAGMA table_info(tasks)")]
+            if "rule" not in columns:
+                self._connection.execute(
+                        "ALTER TABLE tasks ADD COLUMN rule TEXT")
+        return self._connection
+
+    def close(self) -> None:
+        """Close the connection to the database file"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def load(self) -> SQLiteDatabase:
+        """Return the Database in the file, or an empty Database if there
+        isn't one.
+        """
+        settings = dict(self.connection.execute(
+                "SELECT key, value FROM settings"))
+        empty = Database()
+        return SQLiteDatabase(
+                self.connection,
+                day_start=time_from_string(
+                    settings.get('day_start', empty.day_start.isoformat())),
+                day_end=time_from_string(
+                    settings.get('day_end', empty.day_end.isoformat())))
+
+    def save(self, database: Database) -> None:
+        """Save the given database, only writing the changes made since it
+        was loaded when it was loaded from this storage.
+        """
+        changes = database.take_changes()
+        incremental = isinstance(database, SQLiteDatabase) \
+                and database.connection is self.connection \
+                and not database.replaced
+
+        with self.connection:
+            self.connection.executemany(
+                    "INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                    [('day_start', database.day_start.isoformat()),
+                     ('day_end', database.day_end.isoformat())])
+            if incremental:
+                for change in changes:
+                    self.apply_change(change)
+            else:
+                self.connection.execute("DELETE FROM tasks")
+                self.connection.execute("DELETE FROM task_days")
+                for position, task in enumerate(database.tasks):
+                    self.insert_task(position, task)
+
+        if isinstance(database, SQLiteDatabase):
+            database.replaced = False
+
+    def insert_task(self, position: int, task: Task) -> None:
+        """Insert the given task, and its days, at the given position"""
+        # Times are stored as seconds since midnight
+        start = task.usual_start_minute * 60
+        self.connection.execute(
+                "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (position, task.name,
+                 ",".join(r.to_string() for r in task.recur),
+                 task.recur_mask, start,
+                 task.usual_end_minute * 60,
+                 None if task.rule is None else json.dumps(task.rule)))
+        if task.rule is not None:
+            return
+        self.connection.executemany(
+                "INSERT INTO task_days VALUES (?, ?, ?)",
+                [(weekday, start, position) for weekday in range(7)
+                 if task.recur_mask & (1 << weekday)])
+
+    def delete_task(self, position: int) -> None:
+        """Delete the task, and its days, at the given position"""
+        self.connection.execute("DELETE FROM tasks WHERE position = ?",
+                                (position,))
+        self.connection.execute("DELETE FROM task_days WHERE position = ?",
+                                (position,))
+
+    def apply_change(self, change: dict) -> None:
+        """Apply a change made by Database.add_task, edit_task, or
+        delete_task.
+        """
+        if change['op'] == "add":
+            (count,), = self.connection.execute(
+                    "SELECT COUNT(*) FROM tasks")
+            self.insert_task(count, Task.from_dict(change['task']))
+        elif change['op'] == "edit":
+            self.delete_task(change['index'])
+            self.insert_task(change['index'], Task.from_dict(change['task']))
+        elif change['op'] == "delete":
+            self.delete_task(change['index'])
+            # Close the gap, going through the positions in order so they
+            # stay unique
+            for table in ("tasks", "task_days"):
+                self.connection.execute(
+                        f"UPDATE {table} SET position = -position "
+                        f"WHERE position > ?", (change['index'],))
+                self.connection.execute(
+                        f"UPDATE {table} SET position = -position - 1 "
+                        f"WHERE position < 0")
+        else:
+            raise ValueError(f"Unknown database change: {change['op']}")
+
+    def import_json(self, path: str) -> None:
+        """Replace the contents of this storage with the Database in the
+        given JSON file, including its journal.
+        """
+        self.save(JSONStorage(path).load())
+
+    def export_json(self, path: str) -> None:
+        """Write the contents of this storage as a JSON database file"""
+        JSONStorage(path).compact(self.load())
@@ -1,23 +1,58 @@
 """A Task object within the Database"""
 import datetime
+import sys
 
-from .day import Day
+from .day import Day, recur_mask
+from .recurrence import Recurrence
+from ..schedule.task import time_from_string, to_minutes, to_time
 
 
 class Task:
-    def __init__(self, name: str, usual_start: datetime.time, 
-                 usual_end:datetime.time, recur: list[Day]=[]) -> None:
-        self.name = name
+    """A recurring task, with its usual start and end stored as minutes
+    since midnight in usual_start_minute and usual_end_minute.
+
+    A task recurs on the weekdays in recur, unless it has a rule, see the
+    recurrence module.
+    """
+    __slots__ = ("name", "recur", "rule", "usual_start_minute",
+                 "usual_end_minute", "_recurrence")
+
+    def __init__(self, name: str, usual_start: datetime.time,
+                 usual_end:datetime.time, recur: list[Day]=[],
+                 rule: dict=None) -> None:
+        self.name = sys.intern(name)
         self.recur = recur
-        self.usual_start = usual_start
-        self.usual_end = usual_end
+        self.rule = rule
+        # Rules are compiled straight away so malformed ones fail on load
+        self._recurrence = None if rule is None else Recurrence(recur, rule)
+        self.usual_start_minute = to_minutes(usual_start)
+        self.usual_end_minute = to_minutes(usual_end)
+
+    @property
+    def usual_start(self) -> datetime.time:
+        return to_time(self.usual_start_minute)
+
+    @usual_start.setter
+    def usual_start(self, usual_start: datetime.time) -> None:
+        self.usual_start_minute = to_minutes(usual_start)
+
+    @property
+    def usual_end(self) -> datetime.time:
+        return to_time(self.usual_end_minute)
+
+    @usual_end.setter
+    def usual_end(self, usual_end: datetime.time) -> None:
+        self.usual_end_minute = to_minutes(usual_end)
 
     def to_dict(self) -> dict:
         """This class as a dictionary for JSON encoding"""
-        return {'name': self.name,
-                'recur': self.recur,
-                'usual_start': self.usual_start.isoformat,
-                'usual_end': self.usual_end.isoformat}
+        d = {'name': self.name,
+             'recur': [r.to_string() for r in self.recur],
+             'usual_start': self.usual_start.isoformat(),
+             'usual_end': self.usual_end.isoformat()}
+        if self.rule is not None:
+            d['rule'] = self.rule
+        return d
 
 
     @classmethod
@@ -25,12 +60,26 @@ class Task:
         """This class from a dictionary for JSON encoding"""
         return cls(name=d['name'],
                    recur=[Day.from_string(r) for r in d['recur']],
-                   usual_start=datetime.time.\
-                               fromisoformat(d['usual_start']),
-                   usual_end=datetime.time.\
-                               fromisoformat(d['usual_end']))
+                   usual_start=time_from_string(d['usual_start']),
+                   usual_end=time_from_string(d['usual_end']),
+                   rule=d.get('rule'))
+
+    @property
+    def recur_mask(self) -> int:
+        """The days this task recurs on as a bitmask of weekdays"""
+        return recur_mask(self.recur)
+
+    @property
+    def recurrence(self) -> Recurrence:
+        """The dates this task recurs on, compiled from recur and rule the
+        first time it's used.
+        """
+        if self._recurrence is None:
+            self._recurrence = Recurrence(self.recur, self.rule)
+        return self._recurrence
 
     @property
     def length(self) -> datetime.timedelta:
         """The 'usual' timedelta between the start and end times"""
-        return self.usual_end - self.usual_start
+        return datetime.timedelta(
+                minutes=self.usual_end_minute - self.usual_start_minute)
@@ -0,0 +1,271 @@
+"""An on disk cache of task export results"""
+import json
+import os
+import re
+import time
+
+
+# Files in Taskwarrior's data directory that change whenever a task does
+DATA_FILES = ["pending.data", "completed.data", "undo.data",
+              "backlog.data", "taskchampion.sqlite3"]
+
+# Urgency and virtual tags such as +OVERDUE change with time alone, so
+# entries are also only trusted for this many seconds.
+DEFAULT_MAX_AGE = 15 * 60
+
+# The total size of all cached exports before the least recently used
+# ones are removed.
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Attributes holding dates, which filters may compare with a time relative
+# to now, such as due.before:3d, and urgency, which changes with time
+_TIME_ATTRIBUTES = frozenset(["due", "scheduled", "wait", "until", "entry",
+                              "modified", "start", "end", "urgency"])
+
+# Taskwarrior's named dates, which are all relative to now
+_NAMED_DATES = frozenset([
+        "now", "today", "tomorrow", "yesterday", "later", "someday",
+        "sod", "eod", "sow", "eow", "soww", "eoww", "socw", "eocw", "som",
+        "eom", "socm", "eocm", "soq", "eoq", "socq", "eocq", "soy", "eoy",
+        "socy", "eocy", "monday", "tuesday", "wednesday", "thursday",
+        "friday", "saturday", "sunday", "mon", "tue", "wed", "thu", "fri",
+        "sat", "sun", "goodfriday", "easter", "eastermonday", "ascension",
+        "pentecost", "midsommar", "midsommarafton", "juhannus"])
+
+# Matches a filter on an absolute date, which doesn't change with time
+_ABSOLUTE_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}(?:T[\d:]+Z?)?$")
+
+# Matches a virtual tag such as +OVERDUE, see taskdata
+_VIRTUAL_TAG_PATTERN = re.compile(r"^[+-][A-Z]+$")
+
+
+def default_cache_dir() -> str:
+    """Return the directory export results are cached in"""
+    cache_home = os.environ.get("XDG_CACHE_HOME",
+                                os.path.expanduser("~/.cache"))
+    return os.path.join(cache_home, "tasker", "exports")
+
+
+def taskrc_path() -> str:
+    """Return the path of Taskwarrior's configuration file"""
+    return os.environ.get("TASKRC", os.path.expanduser("~/.taskrc"))
+
+
+def read_taskrc() -> dict[str, str]:
+    """Return the settings in Taskwarrior's configuration file.
+
+    Included files are not followed.
+    """
+    settings = {}
+    try:
+        with open(taskrc_path(), 'r') as fin:
+            for line in fin:
+                key, sep, value = line.split("#")[0].partition("=")
+                if sep:
+                    settings[key.strip()] = value.strip()
+    except OSError:
+        pass
+    return settings
+
+
+def taskwarrior_data_dir() -> str:
+    """Return the path of Taskwarrior's data directory.
+
+    This follows Taskwarrior in checking TASKDATA, then data.location in the
+    configuration file, before falling back to ~/.task.
+    """
+    if "TASKDATA" in os.environ:
+        return os.path.expanduser(os.environ["TASKDATA"])
+
+    data_location = read_taskrc().get("data.location")
+    if data_location:
+        return os.path.expanduser(data_location)
+
+    return os.path.expanduser("~/.task")
+
+
+def data_fingerprint(data_dir: str=None) -> list:
+    """Return the modification time and size of Taskwarrior's data files.
+
+    Parameters
+    ----------
+    data_dir: str=None
+        Taskwarrior's data directory, the default None finds it with
+        taskwarrior_data_dir.
+
+    Returns
+    -------
+    list
+        A JSON encodable list that changes whenever any task does.
+    """
+    if data_dir is None:
+        data_dir = taskwarrior_data_dir()
+
+    fingerprint = []
+    for path in [taskrc_path()] + [os.path.join(data_dir, name)
+                                   for name in DATA_FILES]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            fingerprint.append(None)
+        else:
+            fingerprint.append([stat.st_mtime_ns, stat.st_size])
+    return fingerprint
+
+
+def refers_to_time(filters: list[str]) -> bool:
+    """Return if the given filters could match different tasks as time
+    passes, with nothing changing on disk, such as due.before:now or
+    +OVERDUE, so their exports mustn't be cached.
+    """
+    for f in filters:
+        if _VIRTUAL_TAG_PATTERN.match(f) is not None:
+            return True
+        name, sep, value = f.partition(":")
+        if sep and name.split(".")[0].lower() in _TIME_ATTRIBUTES \
+                and _ABSOLUTE_DATE_PATTERN.match(value) is None:
+            return True
+        # Catches named dates in expressions such as ( due < eow )
+        if not _NAMED_DATES.isdisjoint(re.findall(r"[a-z]+", f.lower())):
+            return True
+    return False
+
+
+class ExportCache:
+    """Caches the output of task export for a list of filters.
+
+    Each entry is a file holding a line of JSON describing when, and for
+    which state of Taskwarrior's data files, it was made, followed by the
+    output of task export. An entry is only used if the data files haven't
+    changed since, so the output itself is only parsed on a hit.
+
+    Parameters
+    ----------
+    cache_dir: str=None
+        The directory to store entries in, the default None uses
+        default_cache_dir.
+    max_bytes: int=DEFAULT_MAX_BYTES
+        The total size of the entries before the least recently used ones
+        are removed.
+    max_age: float=DEFAULT_MAX_AGE
+        The number of seconds an entry is used for, None for forever.
+    """
+    def __init__(self, cache_dir: str=None,
+                 max_bytes: int=DEFAULT_MAX_BYTES,
+                 max_age: float=DEFAULT_MAX_AGE) -> None:
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def entry_path(self, filters: list[str]) -> str:
+        """Return the path of the entry for the given filters"""
+        import hashlib
+        key = hashlib.sha1(json.dumps(filters).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, filters: list[str], fingerprint: list) -> str:
+        """Return the cached output of task export, or None if there isn't
+        a usable entry.
+
+        Parameters
+        ----------
+        filters: list[str]
+            The filters task export was run with.
+        fingerprint: list
+            The current data_fingerprint.
+
+        Returns
+        -------
+        str
+            The output of task export, None on a miss.
+        """
+        path = self.entry_path(filters)
+        try:
+            with open(path, 'r') as fin:
+                header = json.loads(fin.readline())
+                if header['filters'] != filters \
+                        or header['fingerprint'] != fingerprint:
+                    return None
+                if self.max_age is not None \
+                        and time.time() - header['created'] > self.max_age:
+                    return None
+                export = fin.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return export
+
+    def put(self, filters: list[str], fingerprint: list,
+            export: str) -> None:
+        """Store the output of task export for the given filters.
+
+        Parameters
+        ----------
+        filters: list[str]
+            The filters task export was run with.
+        fingerprint: list
+            The data_fingerprint from before task export was run.
+        export: str
+            The output of task export.
+        """
+        import tempfile
+
+        header = {'filters': filters,
+                  'fingerprint': fingerprint,
+                  'created': time.time()}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir,
+                                             suffix=".tmp")
+            with os.fdopen(fd, 'w') as fout:
+                fout.write(json.dumps(header))
+                fout.write("\n")
+                fout.write(export)
+            os.replace(temp_path, self.entry_path(filters))
+        except OSError:
+            # Caching is only an optimization
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the total size of
+        the entries is at most max_bytes.
+        """
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size,
+                                    entry.path))
+                    total += stat.st_size
+        except OSError:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        max_bytes, self.max_bytes = self.max_bytes, -1
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
@@ -0,0 +1,110 @@
+"""Proposes schedules for many databases at once.
+
+Each profile, such as a person or a room, has its own database. The
+profiles are split into chunks which are loaded and proposed for in a pool
+of processes, so thousands of small profiles keep every core busy without
+paying for a process round trip per profile. Results come back as each
+chunk finishes, not in the order the profiles were given.
+"""
+import datetime
+import os
+
+# Chunks made per worker, so a slow chunk doesn't leave the others idle
+CHUNKS_PER_WORKER = 4
+
+
+def profile_paths(paths: list[str]) -> list[str]:
+    """Return the database file of each of the given profiles.
+
+    A path is either a database file, or a directory of profiles holding a
+    database file per profile, as NAME.json or NAME/data.json.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a path doesn't exist.
+    """
+    profiles = []
+    for path in paths:
+        if not os.path.isdir(path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No profile at {path}")
+            profiles.append(path)
+            continue
+        for name in sorted(os.listdir(path)):
+            entry = os.path.join(path, name)
+            if name.endswith(".json") and os.path.isfile(entry):
+                profiles.append(entry)
+            elif os.path.isfile(os.path.join(entry, "data.json")):
+                profiles.append(os.path.join(entry, "data.json"))
+    return profiles
+
+
+def _propose_chunk(paths: list[str], date: datetime.date,
+                   mode: str=None) -> list[tuple[str, dict, str]]:
+    """Return the path, proposed schedule as a dictionary, and error of each
+    of the given database files, run in a worker process.
+    """
+    from .database import storage_for
+
+    results = []
+    for path in paths:
+        try:
+            schedule = storage_for(path, mode).load().proposed_schedule(date)
+        except Exception as exp:
+            results.append((path, None, f"{type(exp).__name__}: {exp}"))
+        else:
+            results.append((path, schedule.to_dict(), None))
+    return results
+
+
+def proposed_schedules(paths: list[str], date: datetime.date,
+                       workers: int=None, chunk_size: int=None,
+                       mode: str=None):
+    """Yield the path, proposed schedule as given by Schedule.to_dict, and
+    error of each of the given database files, as soon as the chunk it's in
+    is done.
+
+    The schedule is None, and the error says why, for a database which
+    couldn't be loaded; the error is None otherwise.
+
+    Parameters
+    ----------
+    paths: list[str]
+        The database files, such as from profile_paths.
+    date: datetime.date
+        The date to propose schedules for.
+    workers: int=None
+        The number of processes, the default None uses one per CPU.
+    chunk_size: int=None
+        The number of databases each process is given at a time. The
+        default None makes CHUNKS_PER_WORKER chunks per process.
+    mode: str=None
+        How the databases are stored, see storage_for.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(paths) // (workers * CHUNKS_PER_WORKER)))
+    chunks = [paths[i:i + chunk_size]
+              for i in range(0, len(paths), chunk_size)]
+
+    # Starting processes costs more than a single chunk
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _propose_chunk(chunk, date, mode)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) \
+            as executor:
+        futures = [executor.submit(_propose_chunk, chunk, date, mode)
+                   for chunk in chunks]
+        try:
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            # Don't start the remaining chunks if the caller stopped early
+            for future in futures:
+                future.cancel()
@@ -1,2 +1,3 @@
 from .schedule import Schedule, ScheduleFailure
 from .task import Task
+from .render import write_schedules
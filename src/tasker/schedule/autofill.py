@@ -0,0 +1,273 @@
+"""Fills the free time of a Schedule with pending Taskwarrior tasks"""
+import datetime
+import math
+import re
+import time
+
+from .. import trace
+from .schedule import Schedule
+from .task import Task, minutes_after
+
+# The Taskwarrior UDA holding how long a task is expected to take
+ESTIMATE_UDA = "estimate"
+
+# The most candidates, besides the ones already in a gap, the optimal
+# packing of a gap looks at
+PACKING_CANDIDATES = 64
+
+# Every task is worth something, even with no or negative urgency
+MINIMUM_VALUE = 0.01
+
+# Matches an ISO 8601 duration, as task export gives duration UDAs
+_DURATION_PATTERN = re.compile(
+        r"^P(?:(\d+)W)?(?:(\d+)D)?"
+        r"(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+def parse_duration(value) -> int:
+    """Return the given estimate in whole minutes, or None if it can't be
+    read. Numbers are taken to be minutes, and strings are read as ISO 8601
+    durations.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _DURATION_PATTERN.match(value) if isinstance(value, str) \
+            else None
+    if match is None:
+        return None
+    weeks, days, hours, minutes, seconds = (int(g) if g else 0
+                                            for g in match.groups())
+    return ((weeks * 7 + days) * 24 + hours) * 60 + minutes + seconds // 60
+
+
+class Candidate:
+    """A pending task which could be put in a schedule.
+
+    Parameters
+    ----------
+    id: int
+        The Taskwarrior id of the task.
+    name: str
+        The name to put in the schedule.
+    minutes: int
+        How long the task is expected to take.
+    urgency: float=0.0
+        Taskwarrior's urgency of the task.
+    due: str=""
+        Taskwarrior's due date of the task, which sorts as a date.
+    """
+    __slots__ = ("id", "name", "minutes", "urgency", "due")
+
+    def __init__(self, id: int, name: str, minutes: int,
+                 urgency: float=0.0, due: str="") -> None:
+        self.id = id
+        self.name = name
+        self.minutes = minutes
+        self.urgency = urgency
+        self.due = due
+
+    @property
+    def value(self) -> float:
+        """How much putting this task in a schedule is worth"""
+        return max(self.urgency, MINIMUM_VALUE)
+
+    @classmethod
+    def from_export(cls, task: dict, uda: str=ESTIMATE_UDA,
+                    default_minutes: int=None) -> "Candidate":
+        """Return the candidate for a task from task export, or None if it
+        has no usable estimate and there is no default.
+        """
+        minutes = parse_duration(task[uda]) if uda in task else None
+        if minutes is None:
+            minutes = default_minutes
+        if minutes is None or minutes <= 0:
+            return None
+        return cls(id=task.get('id', 0), name=task['description'],
+                   minutes=minutes, urgency=task.get('urgency', 0.0),
+                   due=task.get('due', ""))
+
+    def _order(self) -> tuple:
+        """Key putting the most urgent, and then soonest due, first"""
+        return (-self.urgency, self.due == "", self.due)
+
+
+def pending_candidates(filters: list[str]=[], uda: str=ESTIMATE_UDA,
+                       default_minutes: int=None, backend: str=None) \
+        -> list[Candidate]:
+    """Return the pending tasks matching the given filters which have an
+    estimate, most urgent first.
+
+    Parameters
+    ----------
+    filters: list[str]=[]
+        Filters for the tasks, on top of status:pending.
+    uda: str=ESTIMATE_UDA
+        The UDA holding how long each task is expected to take.
+    default_minutes: int=None
+        How long tasks without an estimate are expected to take, the
+        default None leaves them out.
+    backend: str=None
+        The backend to read tasks with, see iter_task_export.
+    """
+    from ..util import iter_task_export
+
+    with trace.phase("schedule.autofill_candidates"):
+        candidates = []
+        for task in iter_task_export(["status:pending"] + list(filters),
+                                     backend=backend):
+            candidate = Candidate.from_export(task, uda, default_minutes)
+            if candidate is not None:
+                candidates.append(candidate)
+        candidates.sort(key=Candidate._order)
+        return candidates
+
+
+def free_gaps(schedule: Schedule, after: datetime.time=None) \
+        -> list[list[int]]:
+    """Return the start and end, in minutes since midnight, of each ??? gap
+    in the schedule, only counting the time after the given time.
+    """
+    after = -1 if after is None else minutes_after(after)
+    gaps = []
+    for t in schedule.tasks_with_filled_gaps():
+        if t.name == "???":
+            start = max(t.start_minute, after)
+            if start < t.end_minute:
+                gaps.append([start, t.end_minute])
+    return gaps
+
+
+def _pack(items: list[Candidate], capacity: int, deadline: float) \
+        -> list[Candidate]:
+    """Return the items of the most value which fit in the capacity, or
+    None if the deadline passes first.
+
+    This is a 0/1 knapsack solved by dynamic programming over the
+    capacity, in steps of the largest unit all lengths are a multiple of.
+    """
+    unit = capacity
+    for item in items:
+        unit = math.gcd(unit, item.minutes)
+    capacity //= unit
+
+    best = [0.0] * (capacity + 1)
+    taken = []
+    for item in items:
+        if time.perf_counter() > deadline:
+            return None
+        weight = item.minutes // unit
+        value = item.value
+        took = bytearray(capacity + 1)
+        for w in range(capacity, weight - 1, -1):
+            with_item = best[w - weight] + value
+            if with_item > best[w]:
+                best[w] = with_item
+                took[w] = 1
+        taken.append(took)
+
+    # Walk back through the choices from the full capacity
+    chosen = []
+    w = capacity
+    for item, took in zip(reversed(items), reversed(taken)):
+        if took[w]:
+            chosen.append(item)
+            w -= item.minutes // unit
+    return chosen
+
+
+def plan(gaps: list[list[int]], candidates: list[Candidate],
+         budget: float=0.05) -> list[list[Candidate]]:
+    """Return the candidates to put in each gap.
+
+    Candidates are first put in the earliest gap they fit in, most urgent
+    first. Then, until the time budget runs out, each gap is packed
+    optimally from the candidates greedily put in it and the most urgent
+    candidates left over.
+
+    Parameters
+    ----------
+    gaps: list[list[int]]
+        The start and end, in minutes since midnight, of each gap.
+    candidates: list[Candidate]
+        The candidates, most urgent first.
+    budget: float=0.05
+        The seconds the optimal packing can take, 0 only uses the greedy
+        pass.
+    """
+    deadline = time.perf_counter() + budget
+
+    # Greedy pass
+    room = [end - start for start, end in gaps]
+    planned = [[] for _ in gaps]
+    left_over = []
+    smallest = min((c.minutes for c in candidates), default=0)
+    for n, candidate in enumerate(candidates):
+        for i, free in enumerate(room):
+            if candidate.minutes <= free:
+                planned[i].append(candidate)
+                room[i] -= candidate.minutes
+                break
+        else:
+            left_over.append(candidate)
+        # Stop once nothing more can fit
+        if max(room, default=0) < smallest:
+            left_over.extend(candidates[n + 1:])
+            break
+
+    # Optimal packing pass
+    if budget > 0:
+        for i, (start, end) in enumerate(gaps):
+            capacity = end - start
+            if room[i] == 0 or time.perf_counter() > deadline:
+                continue
+            items = planned[i] + [c for c in left_over
+                                  if c.minutes <= capacity
+                                  ][:PACKING_CANDIDATES]
+            chosen = _pack(items, capacity, deadline)
+            if chosen is None:
+                break
+            if sum(c.value for c in chosen) \
+                    > sum(c.value for c in planned[i]):
+                chosen_ids = {id(c) for c in chosen}
+                left_over = [c for c in planned[i] + left_over
+                             if id(c) not in chosen_ids]
+                left_over.sort(key=Candidate._order)
+                planned[i] = chosen
+                room[i] = capacity - sum(c.minutes for c in chosen)
+
+    return planned
+
+
+def autofill(schedule: Schedule, candidates: list[Candidate],
+             after: datetime.time=None, budget: float=0.05) \
+        -> list[tuple[Task, Candidate]]:
+    """Put candidates in the free time of the schedule, returning each
+    added task with its candidate.
+
+    Within a gap the tasks are put back to back from the start of the gap,
+    soonest due first.
+
+    Parameters
+    ----------
+    schedule: Schedule
+        The schedule to fill, which is changed.
+    candidates: list[Candidate]
+        The candidates, most urgent first, such as from
+        pending_candidates.
+    after: datetime.time=None
+        Only fill the time after this time, such as now.
+    budget: float=0.05
+        The seconds the optimal packing can take, see plan.
+    """
+    with trace.phase("schedule.autofill"):
+        gaps = free_gaps(schedule, after)
+        added = []
+        for (start, _), chosen in zip(gaps, plan(gaps, candidates, budget)):
+            chosen.sort(key=lambda c: (c.due == "", c.due, -c.urgency))
+            for candidate in chosen:
+                task = Task.from_minutes(candidate.name, start,
+                                         start + candidate.minutes)
+                schedule.add_task(task)
+                added.append((task, candidate))
+                start += candidate.minutes
+        return added
@@ -0,0 +1,239 @@
+"""A sorted collection of tasks which can be searched by time"""
+import random
+
+
+class _Node:
+    """A task in the tree, with the size and latest end of its subtree"""
+    __slots__ = ("task", "key", "priority", "left", "right", "size",
+                 "max_end")
+
+    def __init__(self, task, key: tuple, priority: float) -> None:
+        self.task = task
+        self.key = key
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.size = 1
+        self.max_end = task.end_minute
+
+    def update(self) -> None:
+        """Recompute size and max_end from the children"""
+        self.size = 1
+        self.max_end = self.task.end_minute
+        if self.left is not None:
+            self.size += self.left.size
+            if self.left.max_end > self.max_end:
+                self.max_end = self.left.max_end
+        if self.right is not None:
+            self.size += self.right.size
+            if self.right.max_end > self.max_end:
+                self.max_end = self.right.max_end
+
+
+def _merge(left: _Node, right: _Node) -> _Node:
+    """Return the tree of two trees, every key in left before right's"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+def _split(node: _Node, key: tuple) -> tuple:
+    """Return the trees of the keys before, and from, the given key"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.update()
+    return left, node
+
+
+def _remove(node: _Node, key: tuple) -> _Node:
+    """Return the tree without the node with the given key"""
+    if node is None:
+        raise KeyError(key)
+    if key == node.key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    node.update()
+    return node
+
+
+class IntervalTree:
+    """Tasks sorted by start time, in a treap which also knows the size and
+    latest end of each subtree. Times are the tasks' start_minute and
+    end_minute, minutes since midnight.
+
+    Adding, removing, finding the task at an index, and finding the tasks
+    overlapping a time range all take O(log n) expected time, plus the
+    number of tasks found. Tasks with the same start stay in the order they
+    were added. The tree can be indexed and iterated like a list.
+
+    A task's start or end must not be changed while it's in the tree;
+    remove it first and add it back afterwards. A task can only be in the
+    tree once.
+
+    Parameters
+    ----------
+    tasks: list=[]
+        Tasks to add, which must already be sorted by start time.
+    """
+    def __init__(self, tasks: list=[]) -> None:
+        self._root = None
+        # Changed by every add and remove, so users can tell if the tree
+        # changed since they last looked
+        self.version = 0
+        self._next_sequence = 0
+        # The key each task was added with, by identity
+        self._keys = {}
+        self._build(tasks)
+
+    def _new_node(self, task) -> _Node:
+        # Tasks are found by identity, so a second node couldn't be
+        if id(task) in self._keys:
+            raise ValueError(f"Task {task.name} is already in the tree")
+        key = (task.start_minute, self._next_sequence)
+        self._next_sequence += 1
+        self._keys[id(task)] = key
+        return _Node(task, key, random.random())
+
+    def _build(self, tasks: list) -> None:
+        """Build the tree from sorted tasks in linear time.
+
+        The right spine of the tree is kept on a stack. Each new task goes
+        at the bottom of the spine, above the nodes with lower priority,
+        which become its left subtree and are then complete.
+        """
+        spine = []
+        for task in tasks:
+            node = self._new_node(task)
+            last = None
+            while len(spine) > 0 and spine[-1].priority < node.priority:
+                last = spine.pop()
+                last.update()
+            node.left = last
+            if len(spine) > 0:
+                spine[-1].right = node
+            spine.append(node)
+
+        root = None
+        while len(spine) > 0:
+            root = spine.pop()
+            root.update()
+        self._root = root
+
+    def __len__(self) -> int:
+        return 0 if self._root is None else self._root.size
+
+    def __iter__(self):
+        stack = []
+        node = self._root
+        while len(stack) > 0 or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.task
+            node = node.right
+
+    def _node_at(self, index: int) -> _Node:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("IntervalTree index out of range")
+        node = self._root
+        while True:
+            left_size = 0 if node.left is None else node.left.size
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self._node_at(index).task
+
+    def __delitem__(self, index: int) -> None:
+        self.remove(self[index])
+
+    def __contains__(self, task) -> bool:
+        return id(task) in self._keys
+
+    def add(self, task) -> None:
+        """Add the given task after any tasks with the same start.
+
+        Raises
+        ------
+        ValueError
+            If the task is already in the tree.
+        """
+        node = self._new_node(task)
+        left, right = _split(self._root, node.key)
+        self._root = _merge(_merge(left, node), right)
+        self.version += 1
+
+    def remove(self, task) -> None:
+        """Remove the given task"""
+        key = self._keys.pop(id(task))
+        self._root = _remove(self._root, key)
+        self.version += 1
+
+    def index(self, task) -> int:
+        """Return the index of the given task"""
+        key = self._keys[id(task)]
+        index = 0
+        node = self._root
+        while node is not None:
+            left_size = 0 if node.left is None else node.left.size
+            if key == node.key:
+                return index + left_size
+            elif key < node.key:
+                node = node.left
+            else:
+                index += left_size + 1
+                node = node.right
+        raise ValueError("Task is not in the tree")
+
+    def overlapping(self, start: int, end: int) -> list:
+        """Return the tasks, sorted by start, which overlap the time range
+        [start, end) in minutes since midnight.
+        """
+        found = []
+        stack = []
+        node = self._root
+        while len(stack) > 0 or node is not None:
+            # Go left while the left subtree could hold an overlap
+            while node is not None:
+                stack.append(node)
+                if node.left is not None and node.left.max_end > start:
+                    node = node.left
+                else:
+                    node = None
+            node = stack.pop()
+            if node.task.start_minute >= end:
+                # This and everything after it starts too late
+                break
+            if node.task.end_minute > start:
+                found.append(node.task)
+            right = node.right
+            node = right if right is not None and right.max_end > start \
+                    else None
+        return found
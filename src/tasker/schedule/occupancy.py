@@ -0,0 +1,179 @@
+"""Which minutes of a run of days are taken, for finding free time.
+
+This needs NumPy, which can be installed with tasker's occupancy extra.
+"""
+import datetime
+
+from .task import minutes_after, to_minutes, to_time
+
+# The number of minutes in a day, the columns of an Occupancy
+MINUTES_PER_DAY = 24 * 60
+
+
+def _numpy():
+    """Return numpy, or raise an ImportError saying how to install it"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Occupancy needs NumPy, install it with "
+                          "pip install tasker[occupancy]") from None
+    return numpy
+
+
+def _length_in_minutes(length) -> int:
+    """Return the given timedelta or number of minutes as minutes"""
+    if isinstance(length, datetime.timedelta):
+        return int(length.total_seconds() // 60)
+    return int(length)
+
+
+class Occupancy:
+    """A days by minutes matrix of which minutes are taken.
+
+    A minute is taken if a task covers it, or if it's outside of the day's
+    start and end. Every query is an array operation over the whole
+    matrix, so searching months of days doesn't loop over them in Python.
+
+    Parameters
+    ----------
+    start: datetime.date
+        The date of the first row.
+    busy: numpy.ndarray
+        A boolean array of shape (days, MINUTES_PER_DAY), True where a
+        minute is taken.
+    """
+    def __init__(self, start: datetime.date, busy) -> None:
+        self.start = start
+        self.busy = busy
+
+    @classmethod
+    def from_schedules(cls, schedules) -> "Occupancy":
+        """Return the occupancy of the given schedules.
+
+        Parameters
+        ----------
+        schedules: Iterable[tuple[datetime.date, Schedule]]
+            The date and schedule of each of a run of consecutive days,
+            such as from Database.schedules_between.
+        """
+        np = _numpy()
+
+        start = None
+        rows = []
+        starts = []
+        ends = []
+        for day, (d, schedule) in enumerate(schedules):
+            if start is None:
+                start = d
+            # Everything outside of the day is taken
+            rows.extend((day, day))
+            starts.extend((0, to_minutes(schedule.day_end)))
+            ends.extend((to_minutes(schedule.day_start), MINUTES_PER_DAY))
+            _, task_starts, task_ends = schedule.to_columns()
+            rows.extend([day] * len(task_starts))
+            starts.extend(task_starts)
+            ends.extend(task_ends)
+        if start is None:
+            raise ValueError("Occupancy needs at least one schedule")
+        days = rows[-1] + 1
+
+        # Count the tasks starting and ending at each minute, and the
+        # minutes with a running count above zero are taken
+        rows = np.array(rows, dtype=np.intp)
+        counts = np.zeros((days, MINUTES_PER_DAY + 1), dtype=np.int32)
+        np.add.at(counts, (rows, np.array(starts, dtype=np.intp)), 1)
+        np.add.at(counts, (rows, np.array(ends, dtype=np.intp)), -1)
+        busy = np.cumsum(counts, axis=1)[:, :MINUTES_PER_DAY] > 0
+        return cls(start, busy)
+
+    @classmethod
+    def from_database(cls, database: "Database", start: datetime.date,
+                      end: datetime.date) -> "Occupancy":
+        """Return the occupancy of the database's proposed schedules from
+        start to end, inclusive.
+        """
+        return cls.from_schedules(database.schedules_between(start, end))
+
+    @property
+    def days(self) -> int:
+        """The number of days"""
+        return self.busy.shape[0]
+
+    def date(self, day: int) -> datetime.date:
+        """Return the date of the given row"""
+        return self.start + datetime.timedelta(days=int(day))
+
+    def _datetime(self, day: int, minute: int) -> datetime.datetime:
+        """Return the date and time of the given row and minute"""
+        return datetime.datetime.combine(self.date(day),
+                                         to_time(int(minute)))
+
+    def _free_blocks(self, length: int, after: datetime.datetime=None):
+        """Return the rows, starts, and ends of each block of free minutes
+        at least length long, sorted by when they start.
+        """
+        np = _numpy()
+        free = ~self.busy
+        if after is not None:
+            day = (after.date() - self.start).days
+            if day > 0:
+                free[:min(day, self.days)] = False
+            if 0 <= day < self.days:
+                free[day, :minutes_after(after.time())] = False
+
+        # Blocks start where a taken minute is followed by a free one, and
+        # end where a free minute is followed by a taken one
+        padded = np.zeros((self.days, MINUTES_PER_DAY + 2), dtype=np.int8)
+        padded[:, 1:-1] = free
+        edges = np.diff(padded, axis=1)
+        block_rows, block_starts = np.nonzero(edges == 1)
+        _, block_ends = np.nonzero(edges == -1)
+        long_enough = block_ends - block_starts >= max(length, 1)
+        return (block_rows[long_enough], block_starts[long_enough],
+                block_ends[long_enough])
+
+    def earliest_fit(self, length, after: datetime.datetime=None) \
+            -> datetime.datetime:
+        """Return when the earliest free block of the given length starts,
+        or None if there isn't one.
+
+        Parameters
+        ----------
+        length: datetime.timedelta or int
+            The length of the block, as a timedelta or in minutes.
+        after: datetime.datetime=None
+            Only look for blocks starting at or after this time.
+        """
+        rows, starts, _ = self._free_blocks(_length_in_minutes(length),
+                                            after)
+        if len(rows) == 0:
+            return None
+        return self._datetime(rows[0], starts[0])
+
+    def all_fits(self, length, after: datetime.datetime=None) \
+            -> list[tuple[datetime.datetime, datetime.datetime]]:
+        """Return the start and end of each free block at least the given
+        length long, sorted by start.
+
+        Parameters
+        ----------
+        length: datetime.timedelta or int
+            The length of the blocks, as a timedelta or in minutes.
+        after: datetime.datetime=None
+            Only look for blocks starting at or after this time.
+        """
+        rows, starts, ends = self._free_blocks(_length_in_minutes(length),
+                                               after)
+        # A block running to midnight ends at the start of the next day
+        return [(self._datetime(row, start),
+                 self._datetime(row, end) if end < MINUTES_PER_DAY
+                 else datetime.datetime.combine(self.date(row + 1),
+                                                datetime.time()))
+                for row, start, end in zip(rows.tolist(), starts.tolist(),
+                                           ends.tolist())]
+
+    def free_minutes(self) -> dict[datetime.date, int]:
+        """Return the number of free minutes of each day"""
+        totals = (~self.busy).sum(axis=1)
+        return {self.date(day): total
+                for day, total in enumerate(totals.tolist())}
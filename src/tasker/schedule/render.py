@@ -0,0 +1,105 @@
+"""Writes schedules to text streams as they are rendered"""
+import json
+
+from .. import trace
+
+# The formats write_schedules can write
+FORMATS = ["text", "latex", "json"]
+
+
+def write_text(stream, schedule: "Schedule") -> None:
+    """Write the schedule as a formatted list to the given stream, without
+    a trailing newline.
+
+    Parameters
+    ----------
+    stream: TextIO
+        The stream to write to.
+    schedule: Schedule
+        The schedule to write.
+    """
+    with trace.phase("schedule.render"):
+        write = stream.write
+        task_id = 0
+        separator = ""
+        for t in schedule.tasks_with_filled_gaps():
+            if t.name == "???":
+                write(f"{separator}  : {t}")
+            else:
+                write(f"{separator}{task_id:2}: {t}")
+                task_id += 1
+            separator = "\n"
+
+
+def write_latex(stream, schedule: "Schedule", indent: int=0) -> None:
+    """Write the schedule as a LaTeX list to the given stream, without a
+    trailing newline.
+
+    Parameters
+    ----------
+    stream: TextIO
+        The stream to write to.
+    schedule: Schedule
+        The schedule to write.
+    indent: int=0
+        The number of tabs to indent the LaTeX list by.
+    """
+    with trace.phase("schedule.render"):
+        write = stream.write
+        tabs = "\t" * indent
+        write(f"{tabs}\\begin{{itemize}}\n")
+        for t in schedule.tasks_with_filled_gaps():
+            write(f"{tabs}\t\\item {t.start_formatted}--{t.end_formatted} "
+                  f"\\(\\rightarrow\\) {t.name}\n")
+        write(f"{tabs}\\end{{itemize}}")
+
+
+def write_json(stream, schedule: "Schedule") -> None:
+    """Write the schedule as JSON to the given stream"""
+    with trace.phase("schedule.render"):
+        json.dump(schedule.to_dict(), stream)
+
+
+def write_schedules(stream, schedules, fmt: str="text",
+                    date_format: str="%A %Y-%m-%d") -> None:
+    """Write each schedule to the given stream as soon as it's rendered,
+    so any number of days can be written without holding them in memory.
+
+    Parameters
+    ----------
+    stream: TextIO
+        The stream to write to.
+    schedules: Iterable[tuple[datetime.date, Schedule]]
+        The date and schedule of each day, such as from
+        Database.schedules_between.
+    fmt: str="text"
+        "text" for formatted lists under a heading per day, "latex" for a
+        LaTeX list under a heading per day, or "json" for a JSON list of
+        each schedule's to_dict with its date.
+    date_format: str="%A %Y-%m-%d"
+        The strftime format of the heading of each day in text and LaTeX.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}, expected one of "
+                         f"{', '.join(FORMATS)}")
+
+    write = stream.write
+    if fmt == "json":
+        write("[")
+        separator = "\n"
+        for d, schedule in schedules:
+            write(separator)
+            json.dump({'date': d.isoformat(), **schedule.to_dict()}, stream)
+            separator = ",\n"
+        write("\n]\n")
+        return
+
+    for d, schedule in schedules:
+        if fmt == "text":
+            write(f"{d.strftime(date_format)}\n")
+            write_text(stream, schedule)
+            write("\n")
+        else:
+            write(f"\\paragraph{{{d.strftime(date_format)}}}\n")
+            write_latex(stream, schedule)
+            write("\n\n")
@@ -1,33 +1,100 @@
 """A Schedule as an object"""
-import bisect
+from array import array
 import datetime
+import heapq
+import io
 
-from .task import Task
+from .. import trace
+from .interval_tree import IntervalTree
+from .render import write_latex, write_text
+from .task import Task, time_from_string, to_minutes
 
 
 class ScheduleFailure(Exception):
-    def __init__(self, tasks, next_task, error_msg):
+    def __init__(self, tasks, next_task, error_msg, conflicts=[]):
         self._tasks = tasks
         self._next_task = next_task
         self._error_msg = error_msg
+        self._conflicts = conflicts
 
     def __str__(self):
         err_msg = "Successfully Added Tasks\n"
         err_msg += "\n".join(str(t) for t in self._tasks)
-        err_msg += f"Next Task to Add:\n{self._next_task}\n"
+        err_msg += f"\nNext Task to Add:\n{self._next_task}\n"
         err_msg += f"Error Message:\n{self._error_msg}"
+        if len(self._conflicts) > 0:
+            err_msg += "\nOverlapping Tasks:\n"
+            err_msg += "\n".join(f"{a} overlaps {b}"
+                                 for a, b in self._conflicts)
         return err_msg
 
 
 class Schedule:
+    """The tasks of a day, and the ??? gaps between them.
+
+    The gaps are kept up to date as tasks are added, removed, and retimed
+    through this class's methods, only looking at the tasks next to the
+    change, so showing the schedule after an edit doesn't go through the
+    whole day again. Changes made to tasks directly can't be seen, and
+    changes made to the tasks tree directly cause the gaps to be found
+    from scratch.
+    """
     def __init__(self, day_start: datetime.time, day_end: datetime.time,
             tasks: list[Task]=[]) -> None:
-        self.day_start = day_start
-        self.day_end = day_end
-        self.tasks = []
+        self._day_start = day_start
+        self._day_end = day_end
+        self._day_start_minute = to_minutes(day_start)
+        self._day_end_minute = to_minutes(day_end)
+        self._tasks = IntervalTree()
+        # The ??? Task after each task, by the task's identity, with None
+        # for the gap at the start of the day. These are up to date when
+        # _gaps_version matches the version of the tasks tree.
+        self._gaps = {}
+        self._gaps_version = None
+        # The formatted list string, until anything changes
+        self._formatted = None
         for t in tasks:
             self.add_task(t)
 
+    @property
+    def tasks(self) -> IntervalTree:
+        """The tasks of this schedule sorted by start time. This can be
+        indexed and iterated like a list.
+        """
+        return self._tasks
+
+    @tasks.setter
+    def tasks(self, tasks: list[Task]) -> None:
+        self._tasks = IntervalTree(sorted(tasks))
+        self._changed()
+
+    @property
+    def day_start(self) -> datetime.time:
+        """The start of the day"""
+        return self._day_start
+
+    @day_start.setter
+    def day_start(self, day_start: datetime.time) -> None:
+        self._day_start = day_start
+        self._day_start_minute = to_minutes(day_start)
+        self._changed()
+
+    @property
+    def day_end(self) -> datetime.time:
+        """The end of the day"""
+        return self._day_end
+
+    @day_end.setter
+    def day_end(self, day_end: datetime.time) -> None:
+        self._day_end = day_end
+        self._day_end_minute = to_minutes(day_end)
+        self._changed()
+
+    def _changed(self) -> None:
+        """Forget the gaps and anything rendered from them"""
+        self._gaps_version = None
+        self._formatted = None
+
     def to_dict(self) -> dict:
         """This class as a dictionary for JSON encoding"""
         return {'day_start': self.day_start.isoformat(),
@@ -37,10 +104,93 @@ class Schedule:
     @classmethod
     def from_dict(cls, d:dict) -> "Database":
         """This class from a dictionary for JSON encoding"""
-        return cls(day_start=datetime.time.fromisoformat(d['day_start']),
-                   day_end=datetime.time.fromisoformat(d['day_end']),
+        return cls(day_start=time_from_string(d['day_start']),
+                   day_end=time_from_string(d['day_end']),
                    tasks=[Task.from_dict(t) for t in d['tasks']])
 
+    def copy(self) -> "Schedule":
+        """Return a copy of this schedule whose tasks can be changed without
+        changing this schedule.
+        """
+        schedule = Schedule(day_start=self.day_start, day_end=self.day_end)
+        schedule.tasks = [t.copy() for t in self.tasks]
+        return schedule
+
+    def to_columns(self) -> tuple[list[str], array, array]:
+        """Return the names, starts, and ends of the tasks, sorted by start,
+        with the starts and ends as arrays of minutes since midnight. This
+        takes a fraction of the memory of the tasks themselves.
+        """
+        names = []
+        starts = array('H')
+        ends = array('H')
+        for t in self._tasks:
+            names.append(t.name)
+            starts.append(t.start_minute)
+            ends.append(t.end_minute)
+        return names, starts, ends
+
+    @classmethod
+    def from_columns(cls, day_start: datetime.time, day_end: datetime.time,
+                     names: list[str], starts: array, ends: array) \
+            -> "Schedule":
+        """Return a schedule from the columns of its tasks, as given by
+        to_columns.
+        """
+        schedule = cls(day_start=day_start, day_end=day_end)
+        schedule.tasks = [Task.from_minutes(name, start, end)
+                          for name, start, end in zip(names, starts, ends)]
+        return schedule
+
+    def _update_gap(self, index: int) -> None:
+        """Find the gap after the task at the given index, with -1 for the
+        gap at the start of the day.
+        """
+        if index < 0:
+            key = None
+            start = self._day_start_minute
+        else:
+            previous_task = self._tasks[index]
+            key = id(previous_task)
+            start = previous_task.end_minute
+        if index + 1 < len(self._tasks):
+            end = self._tasks[index + 1].start_minute
+        else:
+            end = self._day_end_minute
+
+        gap = self._gaps.get(key)
+        if start < end or (index < 0 and len(self._tasks) == 0):
+            # Keep the same ??? Task if it hasn't changed
+            if gap is None or gap.start_minute != start \
+                    or gap.end_minute != end:
+                self._gaps[key] = Task.from_minutes("???", start, end)
+        elif gap is not None:
+            del self._gaps[key]
+
+    def _in_sync(self) -> bool:
+        """Rather the gaps are up to date, and so can be updated around a
+        change instead of being found from scratch.
+        """
+        return self._gaps_version == self._tasks.version
+
+    def _update_gaps(self) -> None:
+        """Find every gap if they aren't up to date"""
+        if self._in_sync():
+            return
+        self._gaps = {}
+        key = None
+        start = self._day_start_minute
+        for t in self._tasks:
+            if start < t.start_minute:
+                self._gaps[key] = Task.from_minutes("???", start,
+                                                    t.start_minute)
+            key = id(t)
+            start = t.end_minute
+        if start < self._day_end_minute or len(self._tasks) == 0:
+            self._gaps[key] = Task.from_minutes("???", start,
+                                                self._day_end_minute)
+        self._gaps_version = self._tasks.version
+
     def tasks_with_filled_gaps(self) -> list[Task]:
         """Return a list of Tasks with ??? Tasks in between specified tasks
 
@@ -50,42 +200,31 @@ class Schedule:
             The tasks for the day, with ??? Tasks in between the specified
             tasks.
         """
-        tasks = []
-
-        try:
-            if len(self.tasks) == 0:
-                tasks.append(Task("???", start=self.day_start, 
-                            end=self.day_end))
-            else:
-                # Add gap between day start and first task
-                if self.tasks[0].start > self.day_start:
-                    tasks.append(Task("???", start=self.day_start, 
-                                end=self.tasks[0].start))
-                # First (and only?) task
-                tasks.append(self.tasks[0])
-
-                # Remaining tasks
-                if len(self.tasks) > 1:
-                    for i, t in enumerate(self.tasks):
-                        # Skip the first one, we already covered it
-                        if i == 0:
-                            continue
-                        # Determine if there's a gap
-                        previous_task = self.tasks[i-1]
-                        if previous_task.end != t.start:
-                            tasks.append(Task("???", start=previous_task.end, 
-                                              end=t.start))
-                        # This task
-                        tasks.append(t)
-
-                # Add gap between day end and last task
-                if self.day_end > self.tasks[-1].end:
-                    tasks.append(Task("???", start=self.tasks[-1].end,
-                        end=self.day_end))
+        with trace.phase("schedule.gaps"):
+            self._update_gaps()
+            tasks = []
+
+            gap = self._gaps.get(None)
+            if gap is not None:
+                tasks.append(gap)
+            previous_task = None
+            for t in self._tasks:
+                if previous_task is not None \
+                        and previous_task.end_minute > t.start_minute:
+                    raise ScheduleFailure(
+                            tasks, t,
+                            f"Task: {t.name} -- starts ({t.start}) before "
+                            f"{previous_task.name} ends "
+                            f"({previous_task.end}).",
+                            self.conflicts())
+                # This task, and the gap after it
+                tasks.append(t)
+                gap = self._gaps.get(id(t))
+                if gap is not None:
+                    tasks.append(gap)
+                previous_task = t
 
             return tasks
-        except ValueError as exp:
-            raise ScheduleFailure(tasks, t, str(exp))
 
     def __str__(self) -> str:
         return self.as_formatted_list_string()
@@ -103,15 +242,9 @@ class Schedule:
         str
             The schedule as a LaTeX list
         """
-        list_str = "\t" * indent + "\\begin{itemize}\n"
-        for t in self.tasks_with_filled_gaps():
-            list_str += "\t" * indent
-            list_str += f"\t\\item {t.start_formatted}--{t.end_formatted} "\
-                        f"\\(\\rightarrow\\) "\
-                        f"{t.name}\n"
-        list_str += "\t" * indent + "\\end{itemize}"
-
-        return list_str
+        stream = io.StringIO()
+        write_latex(stream, self, indent)
+        return stream.getvalue()
 
     def as_formatted_list_string(self) -> str:
         """Return the schedule as a formatted list string.
@@ -121,19 +254,97 @@ class Schedule:
         str
             The schedule as a formatted list string.
         """
-        task_strings = []
+        if self._formatted is not None and self._in_sync():
+            return self._formatted
 
-        task_id = 0
-        for t in self.tasks_with_filled_gaps():
-            if t.name == "???":
-                task_strings.append(
-                        f"  : {t}")
-            else:
-                task_strings.append(
-                        f"{task_id:2}: {t}")
-                task_id += 1
-
-        return "\n".join(task_strings)
+        stream = io.StringIO()
+        write_text(stream, self)
+        self._formatted = stream.getvalue()
+        return self._formatted
 
     def add_task(self, task: Task) -> None:
-        bisect.insort(self.tasks, task)
+        """Add the given task after any tasks with the same start"""
+        in_sync = self._in_sync()
+        self._tasks.add(task)
+        self._formatted = None
+        if in_sync:
+            index = self._tasks.index(task)
+            self._update_gap(index - 1)
+            self._update_gap(index)
+            self._gaps_version = self._tasks.version
+
+    def remove_task(self, task: Task) -> None:
+        """Remove the given task"""
+        in_sync = self._in_sync()
+        if in_sync:
+            index = self._tasks.index(task)
+        self._tasks.remove(task)
+        self._formatted = None
+        if in_sync:
+            self._gaps.pop(id(task), None)
+            self._update_gap(index - 1)
+            self._gaps_version = self._tasks.version
+
+    def delete_task(self, index: int) -> Task:
+        """Remove and return the task at the given index"""
+        task = self._tasks[index]
+        self.remove_task(task)
+        return task
+
+    def retime_task(self, index: int, start: datetime.time=None,
+                    end: datetime.time=None) -> Task:
+        """Change the start and/or end of the task at the given index,
+        returning the task.
+
+        Raises
+        ------
+        ValueError
+            If the task would end before it starts, or a time isn't on the
+            minute.
+        """
+        task = self._tasks[index]
+        start = task.start if start is None else start
+        end = task.end if end is None else end
+        # Checked before the task is taken out, so a bad time leaves it be
+        start_minute, end_minute = to_minutes(start), to_minutes(end)
+        if end < start:
+            raise ValueError(f"Task: {task.name} -- end ({end}) can not be "
+                             f"before start ({start}).")
+        self.remove_task(task)
+        task.start_minute = start_minute
+        task.end_minute = end_minute
+        self.add_task(task)
+        return task
+
+    def overlapping(self, start: datetime.time, end: datetime.time) \
+            -> list[Task]:
+        """Return the tasks, sorted by start, which overlap the time range
+        [start, end).
+        """
+        return self._tasks.overlapping(to_minutes(start), to_minutes(end))
+
+    def conflicts(self) -> list[tuple[Task, Task]]:
+        """Return every pair of tasks which overlap, in one pass over the
+        tasks.
+
+        Returns
+        -------
+        list[tuple[Task, Task]]
+            Each pair of overlapping tasks, the one which starts first
+            first.
+        """
+        conflicts = []
+        # The tasks which haven't ended by the current start, by end
+        active = []
+        for i, t in enumerate(self._tasks):
+            while len(active) > 0 and active[0][0] <= t.start_minute:
+                heapq.heappop(active)
+            if t.start_minute == t.end_minute:
+                # A task without a length only overlaps the tasks it is
+                # strictly inside of, and nothing after it
+                conflicts.extend((other, t) for _, _, other in active
+                                 if other.start_minute < t.start_minute)
+                continue
+            conflicts.extend((other, t) for _, _, other in active)
+            heapq.heappush(active, (t.end_minute, i, t))
+        return conflicts
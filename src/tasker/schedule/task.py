@@ -1,16 +1,89 @@
 """A Task object within a Schedule"""
 import datetime
+import functools
+import sys
+
+
+def to_minutes(t: datetime.time) -> int:
+    """Return the minutes since midnight of the given time.
+
+    Raises
+    ------
+    ValueError
+        If the time has seconds, which minutes can't keep.
+    """
+    if t.second > 0 or t.microsecond > 0:
+        raise ValueError(f"{t.isoformat()} isn't on the minute, tasks start "
+                         f"and end on whole minutes")
+    return t.hour * 60 + t.minute
+
+
+def minutes_after(t: datetime.time) -> int:
+    """Return the minutes since midnight of the first whole minute at or
+    after the given time, such as the first minute still to come from now.
+    """
+    return t.hour * 60 + t.minute + (t.second > 0 or t.microsecond > 0)
+
+
+def time_from_string(value: str) -> datetime.time:
+    """Return the given ISO time as it's loaded, dropping any seconds, as
+    times saved before tasks kept whole minutes may have them.
+    """
+    return datetime.time.fromisoformat(value).replace(second=0,
+                                                      microsecond=0)
+
+
+@functools.lru_cache(maxsize=24 * 60)
+def to_time(minutes: int) -> datetime.time:
+    """Return the time the given number of minutes after midnight"""
+    return datetime.time(minutes // 60, minutes % 60)
 
 
 class Task:
-    def __init__(self, name: str, start: datetime.datetime, 
-            end: datetime.datetime) -> None:
-        self.name = name
+    """A named block of time, stored as minutes since midnight.
+
+    The start and end are given and returned as datetime.time objects, but
+    are kept as start_minute and end_minute, which is what a Schedule
+    compares.
+    """
+    __slots__ = ("name", "start_minute", "end_minute")
+
+    def __init__(self, name: str, start: datetime.time,
+            end: datetime.time) -> None:
+        self.name = sys.intern(name)
         if end < start:
             raise ValueError(f"Task: {name} -- end ({end}) can not be "\
                              f"before start ({start}).")
-        self.start = start
-        self.end = end
+        self.start_minute = to_minutes(start)
+        self.end_minute = to_minutes(end)
+
+    @classmethod
+    def from_minutes(cls, name: str, start_minute: int, end_minute: int) \
+            -> "Task":
+        """Return a task from its start and end in minutes since midnight"""
+        if end_minute < start_minute:
+            return cls(name, to_time(start_minute), to_time(end_minute))
+        task = cls.__new__(cls)
+        task.name = sys.intern(name)
+        task.start_minute = start_minute
+        task.end_minute = end_minute
+        return task
+
+    @property
+    def start(self) -> datetime.time:
+        return to_time(self.start_minute)
+
+    @start.setter
+    def start(self, start: datetime.time) -> None:
+        self.start_minute = to_minutes(start)
+
+    @property
+    def end(self) -> datetime.time:
+        return to_time(self.end_minute)
+
+    @end.setter
+    def end(self, end: datetime.time) -> None:
+        self.end_minute = to_minutes(end)
 
     def __str__(self):
         return f"{self.start_formatted}--{self.end_formatted}"\
@@ -22,11 +95,11 @@ class Task:
 
     @property
     def start_formatted(self) -> str:
-        return self.hour_minute_formatted(self.start)
+        return f"{self.start_minute // 60:02}:{self.start_minute % 60:02}"
 
     @property
     def end_formatted(self) -> str:
-        return self.hour_minute_formatted(self.end)
+        return f"{self.end_minute // 60:02}:{self.end_minute % 60:02}"
 
     def to_dict(self) -> dict:
         """This class as a dictionary for JSON encoding"""
@@ -38,20 +111,25 @@ class Task:
     def from_dict(cls, d: dict) -> "Task":
         """This class from a dictionary for JSON encoding"""
         return cls(name=d['name'],
-                   start=datetime.time.fromisoformat(d['start']),
-                   end=datetime.time.fromisoformat(d['end']))
+                   start=time_from_string(d['start']),
+                   end=time_from_string(d['end']))
 
     @classmethod
     def from_database_task(cls, database_task: "database.Task") -> "Task":
-        return cls(name=database_task.name,
-                   start=database_task.usual_start,
-                   end=database_task.usual_end)
+        return cls.from_minutes(database_task.name,
+                                database_task.usual_start_minute,
+                                database_task.usual_end_minute)
+
+    def copy(self) -> "Task":
+        """Return a copy of this task"""
+        return Task.from_minutes(self.name, self.start_minute,
+                                 self.end_minute)
 
     def __lt__(self, other) -> bool:
         """Determine if this task starts before another task"""
-        return self.start < other.start
+        return self.start_minute < other.start_minute
 
     @property
     def length(self) -> datetime.timedelta:
         """The timedelta between the start and end times"""
-        return self.end - self.start
+        return datetime.timedelta(minutes=self.end_minute - self.start_minute)
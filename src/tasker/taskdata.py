@@ -0,0 +1,343 @@
+"""Reads Taskwarrior's data files without running task"""
+import json
+import os
+import re
+import time
+
+from .export_cache import read_taskrc, taskwarrior_data_dir
+
+
+# Attributes Taskwarrior stores as epoch seconds and exports as dates
+DATE_ATTRIBUTES = {"entry", "start", "end", "due", "until", "wait",
+                   "modified", "scheduled"}
+
+# Attributes Taskwarrior exports as numbers
+NUMERIC_ATTRIBUTES = {"imask"}
+
+# Statuses of tasks which are given an id
+LIVE_STATUSES = {"pending", "waiting", "recurring"}
+
+# Taskwarrior's default urgency coefficients
+URGENCY_COEFFICIENTS = {
+    "next": 15.0,
+    "due": 12.0,
+    "blocking": 8.0,
+    "priority.H": 6.0,
+    "priority.M": 3.9,
+    "priority.L": 1.8,
+    "scheduled": 5.0,
+    "active": 4.0,
+    "age": 2.0,
+    "annotations": 1.0,
+    "tags": 1.0,
+    "project": 1.0,
+    "blocked": -5.0,
+    "waiting": -3.0,
+}
+
+# The number of days after which a task's age stops adding urgency
+URGENCY_AGE_MAX = 365.0
+
+# Matches one key:"value" pair of a line in a data file
+_ATTRIBUTE_PATTERN = re.compile(r'([^\s:\[\]]+):"((?:[^"\\]|\\.)*)"')
+
+# Matches the filters read_tasks can evaluate itself
+_FILTER_PATTERN = re.compile(
+        r'^(?:[+-]\w+|(?:status|project|priority):[^\s]*|\d+)$')
+
+
+# Matches virtual tags such as +OVERDUE, which Taskwarrior works out rather
+# than stores. Every virtual tag is in upper case, and tags in upper case
+# are left to task in case a new virtual tag is added.
+_VIRTUAL_TAG_PATTERN = re.compile(r'^[+-][A-Z]+$')
+
+
+class UnsupportedFilter(ValueError):
+    """Raised for filters only the task binary can evaluate"""
+
+
+def decode_value(value: str) -> str:
+    """Return the value of an attribute as written in a data file"""
+    if "\\" in value:
+        value = json.loads(f'"{value}"')
+    if "&" in value:
+        value = value.replace("&open;", "[").replace("&close;", "]")\
+                     .replace("&dquot;", '"')
+    return value
+
+
+def parse_line(line: str) -> dict[str, str]:
+    """Return the attributes of a task from a line of a data file"""
+    return {key: decode_value(value)
+            for key, value in _ATTRIBUTE_PATTERN.findall(line)}
+
+
+def format_date(epoch: str) -> str:
+    """Return the given epoch seconds in Taskwarrior's export format"""
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(int(epoch)))
+
+
+def parse_filters(filters: list[str]) -> list:
+    """Return the given filters as a list of predicates on raw task
+    attributes.
+
+    Raises
+    ------
+    UnsupportedFilter
+        If any of the filters needs the task binary to evaluate.
+    """
+    predicates = []
+    ids = set()
+    for f in filters:
+        if _FILTER_PATTERN.match(f) is None \
+                or _VIRTUAL_TAG_PATTERN.match(f) is not None:
+            raise UnsupportedFilter(f)
+
+        if f.isdigit():
+            ids.add(int(f))
+        elif f[0] == "+":
+            predicates.append(lambda t, tag=f[1:]: tag in t['tags'])
+        elif f[0] == "-":
+            predicates.append(lambda t, tag=f[1:]: tag not in t['tags'])
+        else:
+            key, value = f.split(":", 1)
+            if key == "project":
+                # Projects match their sub projects too
+                predicates.append(
+                    lambda t, v=value: t.get("project", "") == v
+                            or t.get("project", "").startswith(v + "."))
+            else:
+                predicates.append(
+                    lambda t, k=key, v=value: t.get(k, "") == v)
+
+    if len(ids) > 0:
+        predicates.append(lambda t: t['id'] in ids)
+    return predicates
+
+
+def needs_completed(filters: list[str]) -> bool:
+    """Return if the given filters can match tasks in completed.data"""
+    statuses = [f.split(":", 1)[1] for f in filters
+                if f.startswith("status:")]
+    return len(statuses) == 0 \
+            or any(s not in LIVE_STATUSES for s in statuses)
+
+
+def read_records(path: str):
+    """Yield the raw attributes of each task in the given data file"""
+    try:
+        fin = open(path, 'r', encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with fin:
+        for line in fin:
+            if line.startswith("["):
+                yield parse_line(line)
+
+
+def raw_tags(record: dict[str, str]) -> list[str]:
+    """Return the tags of a raw task, in either data file format"""
+    tags = [t for t in record.get("tags", "").split(",") if t]
+    for key in record:
+        if key.startswith("tag_") and key[4:] not in tags:
+            tags.append(key[4:])
+    return tags
+
+
+def raw_depends(record: dict[str, str]) -> list[str]:
+    """Return the uuids a raw task depends on, in either data file format"""
+    depends = [d for d in record.get("depends", "").split(",") if d]
+    for key in record:
+        if key.startswith("dep_") and key[4:] not in depends:
+            depends.append(key[4:])
+    return depends
+
+
+def urgency(task: dict, now: float, blocking: bool, blocked: bool) \
+        -> float:
+    """Return Taskwarrior's default urgency for a raw task.
+
+    Parameters
+    ----------
+    task: dict
+        The task's attributes, with dates still in epoch seconds.
+    now: float
+        The current time in epoch seconds.
+    blocking: bool
+        Rather a pending task depends on this task.
+    blocked: bool
+        Rather this task depends on a pending task.
+
+    Returns
+    -------
+    float
+        The urgency of the task.
+    """
+    c = URGENCY_COEFFICIENTS
+    value = 0.0
+
+    tags = task['tags']
+    if "next" in tags:
+        value += c["next"]
+    if len(tags) > 0:
+        value += c["tags"] * (0.8 if len(tags) == 1
+                              else 0.9 if len(tags) == 2 else 1.0)
+    if len(task['annotations']) > 0:
+        count = len(task['annotations'])
+        value += c["annotations"] * (0.8 if count == 1
+                                     else 0.9 if count == 2 else 1.0)
+    if task.get("project"):
+        value += c["project"]
+    if task.get("priority") in ("H", "M", "L"):
+        value += c[f"priority.{task['priority']}"]
+    if task.get("start"):
+        value += c["active"]
+    if task.get("scheduled") and int(task["scheduled"]) < now:
+        value += c["scheduled"]
+    if task.get("status") == "waiting":
+        value += c["waiting"]
+    if blocking:
+        value += c["blocking"]
+    if blocked:
+        value += c["blocked"]
+
+    if task.get("due"):
+        days_overdue = (now - int(task["due"])) / 86400.0
+        if days_overdue >= 7.0:
+            value += c["due"]
+        elif days_overdue >= -14.0:
+            value += c["due"] * ((days_overdue + 14.0) * 0.8 / 21.0 + 0.2)
+        else:
+            value += c["due"] * 0.2
+
+    if task.get("entry"):
+        age = (now - int(task["entry"])) / 86400.0
+        value += c["age"] * min(age / URGENCY_AGE_MAX, 1.0)
+
+    return round(value, 6)
+
+
+def to_export(record: dict[str, str], id: int, now: float,
+              blocking: bool, blocked: bool, date_attributes: set[str],
+              numeric_attributes: set[str]) -> dict:
+    """Return a raw task in the shape task export gives it"""
+    task = {'id': id}
+    annotations = []
+    for key, value in record.items():
+        if key.startswith("annotation_"):
+            annotations.append({'entry': format_date(key[11:]),
+                                'description': value})
+        elif key.startswith("tag_") or key.startswith("dep_") \
+                or key in ("tags", "depends"):
+            continue
+        elif key in date_attributes:
+            task[key] = format_date(value)
+        elif key in numeric_attributes:
+            task[key] = float(value) if "." in value else int(value)
+        else:
+            task[key] = value
+
+    tags = raw_tags(record)
+    if len(tags) > 0:
+        task['tags'] = tags
+    if len(annotations) > 0:
+        task['annotations'] = sorted(annotations, key=lambda a: a['entry'])
+    depends = raw_depends(record)
+    if len(depends) > 0:
+        task['depends'] = depends
+
+    raw = dict(record)
+    raw['tags'] = tags
+    raw['annotations'] = annotations
+    task['urgency'] = urgency(raw, now, blocking, blocked)
+    return task
+
+
+def read_tasks(filters: list[str]=[], data_dir: str=None,
+               include_completed: bool=None):
+    """Return an iterator over the tasks matching the given filters,
+    read straight from Taskwarrior's data files in the same shape as task
+    export.
+
+    Only Taskwarrior 2's pending.data and completed.data are understood,
+    and only tag, status, project, priority, and id filters.
+
+    Parameters
+    ----------
+    filters: list[str]=[]
+        The list of filters to use.
+    data_dir: str=None
+        Taskwarrior's data directory, the default None finds it with
+        taskwarrior_data_dir.
+    include_completed: bool=None
+        Rather to read completed.data as well, the default None reads it
+        only if the filters could match a completed or deleted task.
+
+    Raises
+    ------
+    UnsupportedFilter
+        If any of the filters needs the task binary to evaluate.
+    FileNotFoundError
+        If there is no pending.data, such as with Taskwarrior 3.
+    """
+    predicates = parse_filters(filters)
+    if data_dir is None:
+        data_dir = taskwarrior_data_dir()
+    if include_completed is None:
+        include_completed = needs_completed(filters)
+
+    pending_path = os.path.join(data_dir, "pending.data")
+    if not os.path.isfile(pending_path):
+        raise FileNotFoundError(pending_path)
+
+    return _read_tasks(predicates, data_dir, include_completed)
+
+
+def _read_tasks(predicates: list, data_dir: str, include_completed: bool):
+    """Yield the tasks matching the given predicates, see read_tasks"""
+    # User defined attributes can be dates or numbers too
+    date_attributes = set(DATE_ATTRIBUTES)
+    numeric_attributes = set(NUMERIC_ATTRIBUTES)
+    for key, value in read_taskrc().items():
+        if key.startswith("uda.") and key.endswith(".type"):
+            if value == "date":
+                date_attributes.add(key[4:-5])
+            elif value == "numeric":
+                numeric_attributes.add(key[4:-5])
+
+    # Blocking and blocked tasks can only be known once every pending task
+    # has been seen, so only completed.data is truly streamed.
+    pending = list(read_records(os.path.join(data_dir, "pending.data")))
+    live = {r.get("uuid") for r in pending
+            if r.get("status") in LIVE_STATUSES}
+    depended_on = set()
+    for r in pending:
+        if r.get("status") in LIVE_STATUSES:
+            depended_on.update(raw_depends(r))
+
+    now = time.time()
+
+    def matching(records, in_pending: bool):
+        next_id = 1
+        for record in records:
+            is_live = record.get("status") in LIVE_STATUSES
+            if in_pending and is_live:
+                id, next_id = next_id, next_id + 1
+            else:
+                id = 0
+            check = dict(record)
+            check['id'] = id
+            check['tags'] = raw_tags(record)
+            if all(p(check) for p in predicates):
+                yield to_export(
+                        record, id, now,
+                        blocking=is_live and record.get("uuid") in depended_on,
+                        blocked=any(d in live for d in raw_depends(record)),
+                        date_attributes=date_attributes,
+                        numeric_attributes=numeric_attributes)
+
+    yield from matching(pending, in_pending=True)
+    if include_completed:
+        yield from matching(
+                read_records(os.path.join(data_dir, "completed.data")),
+                in_pending=False)
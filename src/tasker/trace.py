@@ -0,0 +1,170 @@
+"""Measures where the time of a tasker command goes.
+
+Tracing is turned on by setting TASKER_TRACE, or with a command's --profile
+option. Each phase records its wall time and the change in the number of
+allocated memory blocks, and each task subprocess its duration. When the
+command exits a report is printed to stderr, or, if TASKER_TRACE or
+--profile is a path, appended to that file as a line of JSON.
+
+While tracing is off phase returns a shared context manager that does
+nothing, so the instrumented code pays next to nothing for it.
+"""
+import contextlib
+import os
+import sys
+import time
+
+# The values of TASKER_TRACE that print the report instead of saving it
+STDERR_DESTINATIONS = {"1", "stderr", "true", "yes"}
+
+# The values of TASKER_TRACE that leave tracing off
+OFF_VALUES = {"", "0", "false", "no"}
+
+
+class Tracer:
+    """Collects the phases and subprocesses of a command.
+
+    Parameters
+    ----------
+    destination: str="stderr"
+        "stderr" to print the report, or the path of a file to append it
+        to as a line of JSON.
+    """
+    def __init__(self, destination: str="stderr") -> None:
+        self.destination = destination
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._stack = []
+        # Count, seconds, and allocated blocks by phase
+        self.phases = {}
+        self.subprocesses = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Record the time and allocations of the code run inside, nested
+        phases being named after the phases around them.
+        """
+        self._stack.append(name)
+        key = "/".join(self._stack)
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            blocks = sys.getallocatedblocks() - blocks
+            self._stack.pop()
+            count, total, allocated = self.phases.get(key, (0, 0.0, 0))
+            self.phases[key] = (count + 1, total + seconds,
+                                allocated + blocks)
+
+    @contextlib.contextmanager
+    def subprocess(self, command: list[str]):
+        """Record the duration of the subprocess run inside"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_subprocess(command, time.perf_counter() - start)
+
+    def add_subprocess(self, command: list[str], seconds: float) -> None:
+        """Record a subprocess which took the given seconds"""
+        self.subprocesses.append((" ".join(command), seconds))
+
+    def report(self) -> dict:
+        """Return everything recorded, JSON encodable"""
+        return {
+            'command': [os.path.basename(sys.argv[0])] + sys.argv[1:],
+            'started': self.started,
+            'seconds': time.perf_counter() - self._start,
+            'phases': {name: {'count': count, 'seconds': seconds,
+                              'allocated_blocks': blocks}
+                       for name, (count, seconds, blocks)
+                       in self.phases.items()},
+            'subprocesses': {
+                'count': len(self.subprocesses),
+                'seconds': sum(s for _, s in self.subprocesses),
+                'runs': [{'command': command, 'seconds': seconds}
+                         for command, seconds in self.subprocesses]},
+        }
+
+    def write(self) -> None:
+        """Print the report to stderr, or append it to the destination"""
+        report = self.report()
+        if self.destination != "stderr":
+            import json
+            with open(self.destination, 'a') as fout:
+                fout.write(json.dumps(report) + "\n")
+            return
+
+        lines = [f"tasker trace: {' '.join(report['command'])} took "
+                 f"{report['seconds'] * 1000:.1f} ms",
+                 f"{'phase':40} {'count':>6} {'ms':>9} {'blocks':>9}"]
+        for name, p in report['phases'].items():
+            lines.append(f"{name:40} {p['count']:6} "
+                         f"{p['seconds'] * 1000:9.2f} "
+                         f"{p['allocated_blocks']:9}")
+        subprocesses = report['subprocesses']
+        lines.append(f"{'subprocesses':40} {subprocesses['count']:6} "
+                     f"{subprocesses['seconds'] * 1000:9.2f}")
+        for run in subprocesses['runs']:
+            lines.append(f"    {run['seconds'] * 1000:9.2f} ms "
+                         f"{run['command']}")
+        print("\n".join(lines), file=sys.stderr)
+
+
+# The tracer of this command, None while tracing is off
+TRACER = None
+
+# What phase and subprocess give while tracing is off
+_NOTHING = contextlib.nullcontext()
+
+
+def enable(destination: str="stderr") -> Tracer:
+    """Start tracing, reporting to the given destination when the command
+    exits. Calling this again changes the destination.
+    """
+    global TRACER
+    if destination.lower() in STDERR_DESTINATIONS:
+        destination = "stderr"
+    if TRACER is None:
+        import atexit
+        TRACER = Tracer(destination)
+        atexit.register(lambda: TRACER.write())
+    TRACER.destination = destination
+    return TRACER
+
+
+def enabled() -> bool:
+    """Rather tracing is on"""
+    return TRACER is not None
+
+
+def phase(name: str):
+    """Return a context manager recording the code run inside as the
+    given phase, if tracing is on.
+    """
+    if TRACER is None:
+        return _NOTHING
+    return TRACER.phase(name)
+
+
+def subprocess(command: list[str]):
+    """Return a context manager recording the subprocess run inside, if
+    tracing is on.
+    """
+    if TRACER is None:
+        return _NOTHING
+    return TRACER.subprocess(command)
+
+
+def add_subprocess(command: list[str], seconds: float) -> None:
+    """Record a subprocess which took the given seconds, if tracing is on.
+    Use this when the time spent on a subprocess isn't all in one block.
+    """
+    if TRACER is not None:
+        TRACER.add_subprocess(command, seconds)
+
+
+if os.environ.get("TASKER_TRACE", "").lower() not in OFF_VALUES:
+    enable(os.environ["TASKER_TRACE"])
@@ -1,8 +1,21 @@
 """Utility methods"""
+import codecs
+import collections
 import datetime
+import heapq
 import json
-import subprocess
+import re
 import os
+import subprocess
+import time
+
+from . import trace
+from .export_cache import ExportCache, data_fingerprint, refers_to_time
+
+
+# The backends run_task_export can read tasks with
+EXPORT_BACKENDS = ["task", "native"]
+
 
 def complete_task(id: int) -> str:
     """Return the output of completing the given task id.
@@ -21,44 +34,450 @@ def complete_task(id: int) -> str:
     command = ["task", f"{id}", "done"]
 
     # Run command
-    completed_process = subprocess.run(command, capture_output=True)
+    with trace.subprocess(command):
+        completed_process = subprocess.run(command, capture_output=True)
 
     # Return result
     return completed_process.stdout.decode("utf-8")
 
 
-def run_task_export(filters: list[str]) -> list:
+# Matches the task id that a line of "task ... done" output is about.
+_TASK_ID_PATTERN = re.compile(r"\b[Tt]ask (\d+)\b")
+
+
+def complete_tasks(ids: list[int]) -> dict[int, str]:
+    """Return the output of completing all of the given task ids with a
+    single task command.
+
+    Parameters
+    ----------
+    ids: list[int]
+        The ids of the tasks to complete.
+
+    Returns
+    -------
+    dict[int, str]
+        The output of task for each of the given task ids, in the order the
+        ids were given. Use completion_succeeded to check each output.
+        Output which doesn't name any of the ids is all given with the
+        first id.
+    """
+    outputs = {id: "" for id in ids}
+    if len(outputs) == 0:
+        return outputs
+
+    # Prepare command
+    # Bulk confirmation would block on a prompt the user can't see, and
+    # turning off garbage collection keeps ids stable between batches.
+    command = ["task", "rc.confirmation=off", "rc.bulk=0", "rc.gc=off"]
+    command.extend(f"{id}" for id in outputs)
+    command.append("done")
+
+    # Run command
+    with trace.subprocess(command):
+        completed_process = subprocess.run(command, capture_output=True)
+    output = completed_process.stdout.decode("utf-8")
+    output += completed_process.stderr.decode("utf-8")
+
+    # Split the output up by the task id each line is about; lines without
+    # an id (e.g. project summaries) belong to the previous task.
+    current_id = None
+    for line in output.splitlines(keepends=True):
+        match = _TASK_ID_PATTERN.search(line)
+        if match is not None and int(match.group(1)) in outputs:
+            current_id = int(match.group(1))
+        if current_id is not None:
+            outputs[current_id] += line
+
+    # If task failed without saying which ids were at fault, complete them
+    # one by one so each failure is reported against the right task.
+    if completed_process.returncode != 0 and len(outputs) > 1 \
+            and not any(outputs.values()):
+        for id in outputs:
+            outputs[id] = complete_tasks([id])[id]
+    elif not any(outputs.values()):
+        # None of the output could be put against an id, so it's given once,
+        # with the first id, rather than repeated for every id
+        outputs[next(iter(outputs))] = output
+
+    return outputs
+
+
+def completion_succeeded(id: int, output: str) -> bool:
+    """Return if the output of task says the given task id was completed.
+
+    Parameters
+    ----------
+    id: int
+        The id of the task that was completed.
+    output: str
+        The output of task for the given task id.
+
+    Returns
+    -------
+    bool
+        Rather the task was completed.
+    """
+    return f"Completed task {id} " in output
+
+
+class TaskCompleter:
+    """Queues task ids and completes them with as few task commands as
+    possible.
+
+    Parameters
+    ----------
+    flush_every: int=0
+        Complete the queued tasks once this many have been queued. The
+        default of 0 only completes them when flush is called.
+    """
+    def __init__(self, flush_every: int=0) -> None:
+        self.flush_every = flush_every
+        self.queued = []
+        self.failed = []
+
+    def add(self, id: int) -> dict[int, str]:
+        """Queue the given task id, returning the output of any tasks
+        completed because the queue became full.
+        """
+        self.queued.append(id)
+        if self.flush_every > 0 and len(self.queued) >= self.flush_every:
+            return self.flush()
+        return {}
+
+    def flush(self) -> dict[int, str]:
+        """Complete all queued task ids, returning the output for each."""
+        ids, self.queued = self.queued, []
+        outputs = complete_tasks(ids)
+        self.failed.extend(id for id, output in outputs.items()
+                           if not completion_succeeded(id, output))
+        return outputs
+
+
+class BackgroundTaskCompleter(TaskCompleter):
+    """A TaskCompleter which runs task in a background thread, so the
+    caller can carry on while tasks are completed.
+
+    Batches are completed one at a time, in the order they were queued, so
+    task never runs twice at once and the output comes back in order.
+
+    Parameters
+    ----------
+    flush_every: int=1
+        Start completing the queued tasks once this many have been queued.
+        The default of 1, as does 0, starts on each task as soon as it's
+        queued.
+    """
+    def __init__(self, flush_every: int=1) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        super().__init__(flush_every=max(flush_every, 1))
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        # The batches being completed, oldest first
+        self._pending = collections.deque()
+
+    def add(self, id: int) -> dict[int, str]:
+        """Queue the given task id, returning the output of any batches
+        which have finished since last asked.
+        """
+        self.queued.append(id)
+        if len(self.queued) >= self.flush_every:
+            self._submit()
+        return self.finished()
+
+    def _submit(self) -> None:
+        """Start completing the queued task ids"""
+        if len(self.queued) > 0:
+            ids, self.queued = self.queued, []
+            self._pending.append(
+                    (ids, self._executor.submit(complete_tasks, ids)))
+
+    def _collect(self, ids: list[int], future) -> dict[int, str]:
+        """Return the output of a finished batch, recording failures"""
+        try:
+            outputs = future.result()
+        except Exception as exp:
+            outputs = {id: f"Could not complete task {id}: {exp}\n"
+                       for id in ids}
+        self.failed.extend(id for id, output in outputs.items()
+                           if not completion_succeeded(id, output))
+        return outputs
+
+    def finished(self) -> dict[int, str]:
+        """Return the output of the batches which have finished, stopping
+        at the first which hasn't so the output stays in order.
+        """
+        outputs = {}
+        while len(self._pending) > 0 and self._pending[0][1].done():
+            outputs.update(self._collect(*self._pending.popleft()))
+        return outputs
+
+    def flush(self) -> dict[int, str]:
+        """Complete all queued task ids, waiting for every batch to finish
+        and returning the output for each.
+        """
+        self._submit()
+        outputs = {}
+        while len(self._pending) > 0:
+            outputs.update(self._collect(*self._pending.popleft()))
+        return outputs
+
+    def close(self) -> dict[int, str]:
+        """Complete all queued task ids and stop the background thread,
+        returning the output of the batches not yet returned.
+        """
+        try:
+            return self.flush()
+        finally:
+            self._executor.shutdown()
+
+
+def default_export_backend() -> str:
+    """Return the backend named by TASKER_EXPORT_BACKEND, or "task"."""
+    backend = os.environ.get("TASKER_EXPORT_BACKEND", "task")
+    if backend not in EXPORT_BACKENDS:
+        raise ValueError(f"Unknown export backend: {backend}, expected "
+                         f"one of {', '.join(EXPORT_BACKENDS)}")
+    return backend
+
+
+def iter_json_array(stream, chunk_size: int=64 * 1024, chunks: list=None):
+    """Yield each value of a JSON array as it is read from the given
+    binary stream.
+
+    Commas and brackets between values are skipped, so a stream of values
+    without the surrounding array, as older versions of task export give,
+    is read too.
+
+    Parameters
+    ----------
+    stream
+        A binary stream with a read1 or read method.
+    chunk_size: int=64 * 1024
+        The most bytes to read from the stream at once.
+    chunks: list=None
+        If given, each chunk of bytes read from the stream is appended to
+        this list.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    read = getattr(stream, "read1", stream.read)
+    buffer = ""
+    position = 0
+    at_end = False
+    while True:
+        # Skip over the separators between values
+        while position < len(buffer) and buffer[position] in " \t\r\n[],":
+            position += 1
+
+        # Decode the next value, reading more of the stream if it's
+        # incomplete
+        if position < len(buffer):
+            try:
+                value, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if at_end:
+                    raise
+            else:
+                yield value
+                continue
+        elif at_end:
+            return
+
+        chunk = read(chunk_size)
+        if chunks is not None:
+            chunks.append(chunk)
+        at_end = len(chunk) == 0
+        buffer = buffer[position:] + utf8.decode(chunk, final=at_end)
+        position = 0
+
+
+def iter_task_export(filters: list[str], use_cache: bool=True,
+                     backend: str=None):
+    """Yield each task of exporting with the given filters as soon as it
+    has been parsed.
+
+    Parameters
+    ----------
+    filters: list[str]
+        The list of filters to use.
+    use_cache: bool=True
+        Rather to reuse the output of a previous export with the same
+        filters when none of Taskwarrior's data files have changed since.
+        Exports with filters which refer to time, see refers_to_time, are
+        never cached.
+    backend: str=None
+        "task" to run task export, or "native" to read Taskwarrior's data
+        files directly, falling back to task for filters or data files it
+        doesn't understand. The default None uses default_export_backend.
+    """
+    if backend is None:
+        backend = default_export_backend()
+
+    # Read the data files directly
+    if backend == "native":
+        from .taskdata import UnsupportedFilter, read_tasks
+        try:
+            tasks = read_tasks(filters)
+        except (UnsupportedFilter, FileNotFoundError):
+            pass
+        else:
+            yield from tasks
+            return
+
+    # Check for a previous export
+    use_cache = use_cache and not refers_to_time(filters)
+    if use_cache:
+        cache = ExportCache()
+        fingerprint = data_fingerprint()
+        export = cache.get(filters, fingerprint)
+        if export is not None:
+            with trace.phase("util.export_cache"):
+                tasks = json.loads(export)
+            yield from tasks
+            return
+
+    # Prepare command
+    command = ["task"]
+    command.extend(filters)
+    command.append("export")
+
+    # Run command, keeping a copy of the output for the cache. Only the
+    # time spent starting task, reading its output, and waiting for it is
+    # traced, not the time the caller spends on each task.
+    start = time.perf_counter()
+    seconds = 0.0
+    process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    chunks = [] if use_cache else None
+    finished = False
+    try:
+        for task in iter_json_array(process.stdout, chunks=chunks):
+            seconds += time.perf_counter() - start
+            start = None
+            yield task
+            start = time.perf_counter()
+        finished = True
+    finally:
+        # The caller stopped while it had a task, which isn't task's time
+        if start is None:
+            start = time.perf_counter()
+        # Stop task only if the caller stopped early, or reading failed,
+        # otherwise let it finish writing and exit on its own
+        if not finished and process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+        trace.add_subprocess(command,
+                             seconds + time.perf_counter() - start)
+
+    # Remember the export for next time
+    if use_cache and returncode == 0:
+        cache.put(filters, fingerprint, b"".join(chunks).decode("utf-8"))
+
+
+def run_task_export(filters: list[str], use_cache: bool=True,
+                    backend: str=None) -> list:
     """Returns JSON of exporting with the given filters
     
     Parameters
     ----------
     filters: list[str]
         The list of filters to use.
+    use_cache: bool=True
+        Rather to reuse the output of a previous export with the same
+        filters when none of Taskwarrior's data files have changed since.
+    backend: str=None
+        The backend to read tasks with, see iter_task_export.
     
     Returns
     -------
     list
         The list of tasks that match the given filter.
     """
-    # Prepare command
-    command = ["task"]
-    command.extend(filters)
-    command.append("export")
+    return list(iter_task_export(filters, use_cache=use_cache,
+                                 backend=backend))
 
-    # Run command
-    completed_process = subprocess.run(command, capture_output=True)
 
-    # Return JSON
-    return json.loads(completed_process.stdout.decode("utf-8"))
+def sort_by_due(tasks, limit: int=None) -> list:
+    """Return the given tasks sorted by due date, tasks without a due date
+    first.
+
+    Parameters
+    ----------
+    tasks
+        An iterable of tasks, such as from iter_task_export.
+    limit: int=None
+        Only return this many of the tasks due soonest. This keeps just
+        limit tasks in memory rather than all of them.
+
+    Returns
+    -------
+    list
+        The sorted tasks.
+    """
+    if limit is None:
+        return sorted(tasks, key=_due_key)
+    return heapq.nsmallest(limit, tasks, key=_due_key)
+
+
+def _due_key(task: dict) -> str:
+    """Key for sorting tasks by due date"""
+    return task.get("due", "")
+
+
+def isoparse(date_string: str) -> datetime.datetime:
+    """Return the given ISO 8601 string as a datetime, only importing
+    dateutil once a date is actually parsed.
+    """
+    from dateutil.parser import isoparse
+    return isoparse(date_string)
+
+
+# Matches a date as task export gives it, e.g. 20240131T235959Z
+_EXPORT_DATE_PATTERN = re.compile(
+        r"(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})Z")
+
+
+def parse_due_dates(tasks: list[dict]) -> list[datetime.datetime]:
+    """Return the due date of each of the given tasks, None for tasks
+    without one.
+
+    Dates in task export's format are parsed without dateutil, and each
+    distinct date string is only parsed once, so this is much faster than
+    calling isoparse on each task.
+    """
+    parsed = {}
+    dues = []
+    for t in tasks:
+        due = t.get('due')
+        if not due:
+            dues.append(None)
+            continue
+        if due not in parsed:
+            match = _EXPORT_DATE_PATTERN.fullmatch(due)
+            if match is not None:
+                parsed[due] = datetime.datetime(
+                        *map(int, match.groups()),
+                        tzinfo=datetime.timezone.utc)
+            else:
+                parsed[due] = isoparse(due)
+        dues.append(parsed[due])
+    return dues
 
 
-def time_till_due(due:datetime.datetime) -> datetime.timedelta:
+def time_till_due(due:datetime.datetime,
+                  now:datetime.datetime=None) -> datetime.timedelta:
     """Return the timedelta of now and the given due date.
     
     Parameters
     ----------
     due: datetime.datetime
         The due date
+    now: datetime.datetime=None
+        The current time, the default None gets it. Pass it in when going
+        through many tasks to only get it once. A naive time is taken to
+        be local.
 
     Returns
     -------
@@ -66,10 +485,14 @@ def time_till_due(due:datetime.datetime) -> datetime.timedelta:
         The timedelta between now and the given due date.
     """
     # Get the current time
-    now = datetime.datetime.now()
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
 
-    # Put now in the same timezone as due
-    now = now.replace(tzinfo=due.tzinfo)
+    # Compare like with like, a naive due date being local time
+    if due.tzinfo is None:
+        now = now.astimezone().replace(tzinfo=None)
+    elif now.tzinfo is None:
+        now = now.astimezone()
 
     # Return the time delta
     return due - now
@@ -0,0 +1,87 @@
+"""Notices changes to files by polling their modification times.
+
+Nothing but os.stat is used, so watching needs no services or extra
+packages. The time between polls doubles while nothing changes, up to a
+limit, so a watcher left running idles at next to no CPU, and goes back
+to polling quickly as soon as something does change.
+"""
+import os
+import time
+
+
+def file_stamps(paths: list[str]) -> list:
+    """Return the modification time and size of each of the given files,
+    None for files that don't exist.
+    """
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stamps.append(None)
+        else:
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+def database_files(database: "LazyDatabase") -> list[str]:
+    """Return the files the given database is loaded from"""
+    storage = database.storage
+    paths = [storage.path]
+    if hasattr(storage, "journal_path"):
+        paths.append(storage.journal_path)
+    else:
+        paths.append(storage.path + "-wal")
+    return paths
+
+
+class Watcher:
+    """Polls fingerprints of groups of files, backing off while none of
+    them change.
+
+    Parameters
+    ----------
+    fingerprints: dict[str, Callable[[], list]]
+        A function for each group returning something that changes when
+        any file of the group does, such as file_stamps.
+    interval: float=1.0
+        The seconds between polls after a change.
+    max_interval: float=30.0
+        The most seconds between polls while nothing changes.
+    """
+    def __init__(self, fingerprints: dict, interval: float=1.0,
+                 max_interval: float=30.0) -> None:
+        self.fingerprints = fingerprints
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self._sleep = interval
+        self._last = {name: fingerprint()
+                      for name, fingerprint in fingerprints.items()}
+
+    def poll(self) -> set[str]:
+        """Return the names of the groups changed since the last poll"""
+        changed = set()
+        for name, fingerprint in self.fingerprints.items():
+            current = fingerprint()
+            if current != self._last[name]:
+                self._last[name] = current
+                changed.add(name)
+        return changed
+
+    def wait(self, deadline: float=None) -> set[str]:
+        """Sleep until a group changes, returning the names of the changed
+        groups, or until the given time.time, returning an empty set.
+        """
+        while True:
+            sleep = self._sleep
+            if deadline is not None:
+                sleep = min(sleep, max(0.0, deadline - time.time()))
+            time.sleep(sleep)
+
+            changed = self.poll()
+            if len(changed) > 0:
+                self._sleep = self.interval
+                return changed
+            self._sleep = min(self._sleep * 2, self.max_interval)
+            if deadline is not None and time.time() >= deadline:
+                return changed
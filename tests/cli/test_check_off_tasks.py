@@ -0,0 +1,55 @@
+import datetime
+import io
+
+import pytest
+
+from tasker.cli.check_off_tasks import InvalidDecision, parse_decisions, \
+                                       review
+from tasker.util import TaskCompleter, time_till_due
+
+
+def export_date(when: datetime.datetime) -> str:
+    return when.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def test_parse_decisions():
+    ids, rules = parse_decisions(["3, 4 # these two\n", "Overdue\n",
+                                  "# nothing\n", "12 nodue\n"])
+    assert ids == {3, 4, 12}
+    assert rules == {"overdue", "nodue"}
+
+
+@pytest.mark.parametrize("word", ["bogus", "-3", "0", "3.5"])
+def test_parse_decisions_rejects(word):
+    with pytest.raises(InvalidDecision, match="Line 2"):
+        parse_decisions(["1\n", f"{word}\n"])
+
+
+@pytest.mark.parametrize("zone", ["Asia/Tokyo", "America/New_York", "UTC"])
+def test_overdue_within_utc_offset(timezone, zone):
+    """Tasks due within the UTC offset of now are only overdue if they are
+    actually past due.
+    """
+    timezone(zone)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    tasks = [{'id': 1, 'description': "soon",
+              'due': export_date(now + datetime.timedelta(minutes=30))},
+             {'id': 2, 'description': "late",
+              'due': export_date(now - datetime.timedelta(minutes=30))},
+             {'id': 3, 'description': "undated"}]
+    completer = TaskCompleter()
+    out = io.StringIO()
+
+    assert review(tasks, set(), {"overdue"}, completer, out) == set()
+    assert completer.queued == [2]
+    assert out.getvalue().splitlines()[0].endswith("-- kept")
+
+
+def test_time_till_due_naive_now_is_local(timezone):
+    timezone("Asia/Tokyo")
+    due = datetime.datetime(2024, 1, 1, 12, tzinfo=datetime.timezone.utc)
+    # 12:00 UTC is 21:00 in Tokyo
+    now = datetime.datetime(2024, 1, 1, 20)
+    assert time_till_due(due, now=now) == datetime.timedelta(hours=1)
+    assert time_till_due(due.replace(tzinfo=None), now=now) \
+        == datetime.timedelta(hours=-8)
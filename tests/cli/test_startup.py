@@ -0,0 +1,36 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+
+# Modules only some runs of a console script need, which are imported when
+# first used rather than on start up
+DEFERRED = ["argparse", "sqlite3", "numpy", "dateutil", "concurrent.futures",
+            "socket", "mmap", "tempfile"]
+
+
+def console_scripts() -> list[str]:
+    """Return the module of each console script in setup.py"""
+    with open(os.path.join(REPO_DIR, "setup.py"), 'r') as fin:
+        return re.findall(r"'\w+ = ([\w.]+):\w+'", fin.read())
+
+
+@pytest.mark.parametrize("module", console_scripts())
+def test_heavy_imports_are_deferred(module):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.join(REPO_DIR, "src")
+    completed_process = subprocess.run(
+            [sys.executable, "-c",
+             f"import sys\n"
+             f"before = set(sys.modules)\n"
+             f"import {module}\n"
+             f"print(' '.join(sorted(set(sys.modules) - before)))"],
+            capture_output=True, env=env, check=True)
+    imported = set(completed_process.stdout.decode("utf-8").split())
+
+    assert sorted(imported & set(DEFERRED)) == []
@@ -0,0 +1,100 @@
+import datetime
+import os
+
+import pytest
+
+from tasker import database, export_cache, watch as watch_module
+from tasker.cli import todays_schedule
+from tasker.schedule import Schedule
+from tasker.schedule.task import Task
+
+
+@pytest.fixture
+def watched(monkeypatch):
+    """Stub out what watch reads, returning the deadlines it waits for and
+    the number of times it proposed and filled a schedule.
+    """
+    calls = {'proposed': 0, 'filled': 0, 'deadlines': []}
+
+    def proposed_schedule(date):
+        calls['proposed'] += 1
+        return Schedule(datetime.time(0, 0), datetime.time(23, 59))
+
+    def fill_schedule(schedule, date, budget, default_estimate=None):
+        calls['filled'] += 1
+        task = Task("filled", datetime.time(0, 0), datetime.time(0, 30))
+        schedule.add_task(task)
+        return [(task, None)]
+
+    def wait(self, deadline=None):
+        calls['deadlines'].append(deadline)
+        if len(calls['deadlines']) > 1:
+            raise KeyboardInterrupt
+        return set()
+
+    monkeypatch.setattr(todays_schedule.daemon, "proposed_schedule",
+                        proposed_schedule)
+    monkeypatch.setattr(todays_schedule, "fill_schedule", fill_schedule)
+    monkeypatch.setattr(watch_module, "database_files", lambda db: [])
+    monkeypatch.setattr(export_cache, "data_fingerprint", lambda: None)
+    monkeypatch.setattr(watch_module.Watcher, "wait", wait)
+    return calls
+
+
+def test_watch_refills_once_fill_starts(watched):
+    todays_schedule.watch(fill=True)
+
+    # The filled task started at midnight, so it's filled again at once
+    midnight = datetime.datetime.combine(datetime.date.today(),
+                                         datetime.time()).timestamp()
+    assert watched['deadlines'][0] == midnight
+    assert watched['filled'] == 2
+    assert watched['proposed'] == 1
+    # Proposed through taskerd when it's running
+    assert not database.DATABASE.loaded
+
+
+def test_watch_rejects_profile():
+    with pytest.raises(SystemExit):
+        todays_schedule.parse_arguments(["--watch", "--profile"])
+
+
+@pytest.mark.parametrize("date, is_today", [
+        (datetime.date.today(), True),
+        (datetime.datetime.now(), True),
+        (datetime.date.today() + datetime.timedelta(days=1), False)])
+def test_fill_schedule_takes_dates(monkeypatch, date, is_today):
+    from tasker.schedule import autofill
+
+    calls = []
+    monkeypatch.setattr(autofill, "pending_candidates",
+                        lambda default_minutes=None: [])
+    monkeypatch.setattr(autofill, "autofill",
+                        lambda schedule, candidates, after, budget:
+                        calls.append(after) or [])
+
+    todays_schedule.fill_schedule(Schedule(datetime.time(0, 0),
+                                           datetime.time(23, 59)),
+                                  date, budget=0.0)
+
+    # Only today is filled from now on
+    assert (calls[0] is not None) == is_today
+
+
+@pytest.mark.parametrize("date", [datetime.date(2024, 1, 1),
+                                  datetime.datetime(2024, 1, 1, 9, 30)])
+def test_main_saves_to_history(monkeypatch, tmp_path, date):
+    from tasker.database import ScheduleHistory, history_path
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(todays_schedule.daemon, "proposed_schedule",
+                        lambda date: Schedule(datetime.time(0, 0),
+                                              datetime.time(23, 59)))
+    monkeypatch.setattr("builtins.input", lambda prompt: "quit")
+    monkeypatch.setattr(todays_schedule.os, "get_terminal_size",
+                        lambda *a: os.terminal_size((80, 24)))
+
+    todays_schedule.main(date=date)
+
+    with ScheduleHistory(history_path()) as history:
+        assert list(history.dates()) == [datetime.date(2024, 1, 1)]
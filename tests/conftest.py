@@ -0,0 +1,14 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def timezone(monkeypatch):
+    """Return a function which sets the local timezone for the test"""
+    def set_timezone(name: str) -> None:
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+    yield set_timezone
+    monkeypatch.undo()
+    time.tzset()
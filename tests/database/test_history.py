@@ -0,0 +1,95 @@
+import datetime
+import os
+
+from tasker.database.history import ScheduleHistory
+from tasker.schedule import Schedule, Task
+
+DAY = datetime.date(2024, 3, 1)
+
+
+def schedule(name: str) -> Schedule:
+    return Schedule(datetime.time(8, 0), datetime.time(17, 0),
+                    [Task(name, datetime.time(9, 0), datetime.time(10, 0))])
+
+
+def names(history: ScheduleHistory, date: datetime.date):
+    saved = history.get(date)
+    return None if saved is None else [t.name for t in saved.tasks]
+
+
+def test_put_and_get(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    with ScheduleHistory(path) as history:
+        assert history.get(DAY) is None
+        history.put(DAY, schedule("a"))
+        history.put(DAY + datetime.timedelta(days=2), schedule("b"))
+        # Saving a date again replaces it
+        history.put(DAY, schedule("c"))
+
+        assert names(history, DAY) == ["c"]
+        assert DAY + datetime.timedelta(days=1) not in history
+        assert DAY + datetime.timedelta(days=2) in history
+
+    with ScheduleHistory(path) as history:
+        assert names(history, DAY) == ["c"]
+        assert list(history.dates()) \
+            == [DAY, DAY + datetime.timedelta(days=2)]
+
+
+def test_earlier_dates_move_the_index(tmp_path):
+    with ScheduleHistory(str(tmp_path / "history.jsonl")) as history:
+        history.put(DAY, schedule("a"))
+        # Read through the memory mapped index before it moves
+        assert names(history, DAY) == ["a"]
+        history.put(DAY - datetime.timedelta(days=10), schedule("b"))
+
+        assert names(history, DAY) == ["a"]
+        assert names(history, DAY - datetime.timedelta(days=10)) == ["b"]
+        assert [d for d, _ in history.between(
+                    DAY - datetime.timedelta(days=30),
+                    DAY + datetime.timedelta(days=30))] \
+            == [DAY - datetime.timedelta(days=10), DAY]
+
+
+def test_between_reads_days_in_range(tmp_path):
+    with ScheduleHistory(str(tmp_path / "history.jsonl")) as history:
+        for i in range(10):
+            history.put(DAY + datetime.timedelta(days=i), schedule(f"{i}"))
+
+        between = list(history.between(DAY + datetime.timedelta(days=3),
+                                       DAY + datetime.timedelta(days=5)))
+
+    assert [(d, [t.name for t in s.tasks]) for d, s in between] == [
+            (DAY + datetime.timedelta(days=i), [f"{i}"]) for i in (3, 4, 5)]
+
+
+def test_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    with ScheduleHistory(path) as history:
+        history.put(DAY, schedule("a"))
+        history.put(DAY + datetime.timedelta(days=1), schedule("b"))
+    os.remove(path + ".idx")
+
+    with ScheduleHistory(path) as history:
+        assert names(history, DAY) == ["a"]
+        assert names(history, DAY + datetime.timedelta(days=1)) == ["b"]
+
+
+def test_interrupted_save_is_dropped(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    with ScheduleHistory(path) as history:
+        history.put(DAY, schedule("a"))
+    # A line appended after the index was written, and half of another
+    with open(path, 'ab') as fout:
+        fout.write(b'{"date": "2024-03-02", "day_start": "08:00:00", '
+                   b'"day_end": "17:00:00", "tasks": []}\n'
+                   b'{"date": "2024-03-03", "day_st')
+
+    with ScheduleHistory(path) as history:
+        assert names(history, DAY) == ["a"]
+        assert names(history, DAY + datetime.timedelta(days=1)) == []
+        assert DAY + datetime.timedelta(days=2) not in history
+        history.put(DAY + datetime.timedelta(days=2), schedule("c"))
+
+    with open(path, 'rb') as fin:
+        assert len(fin.read().splitlines()) == 3
@@ -0,0 +1,98 @@
+import datetime
+import random
+
+import pytest
+
+from tasker.database.day import Day
+from tasker.database.recurrence import Recurrence
+
+
+def days(start: datetime.date, end: datetime.date):
+    while start <= end:
+        yield start
+        start += datetime.timedelta(days=1)
+
+
+def test_last_weekday_at_month_end():
+    recurrence = Recurrence([], {'monthly': [[-1, "FRIDAY"]]})
+    # Months ending on, and just after, a Friday, including December
+    assert recurrence.occurs_on(datetime.date(2024, 5, 31))
+    assert recurrence.occurs_on(datetime.date(2024, 6, 28))
+    assert not recurrence.occurs_on(datetime.date(2024, 6, 21))
+    assert recurrence.occurs_on(datetime.date(2024, 12, 27))
+    assert list(recurrence.between(datetime.date(2024, 12, 1),
+                                   datetime.date(2025, 1, 31))) \
+        == [datetime.date(2024, 12, 27), datetime.date(2025, 1, 31)]
+
+
+def test_february_29():
+    # The 29th of February 2024 is the fifth, and last, Thursday
+    fifth = Recurrence([], {'monthly': [[5, "THURSDAY"]]})
+    last = Recurrence([], {'monthly': [[-1, "THURSDAY"]]})
+    assert fifth.occurs_on(datetime.date(2024, 2, 29))
+    assert last.occurs_on(datetime.date(2024, 2, 29))
+    assert list(fifth.between(datetime.date(2023, 2, 1),
+                              datetime.date(2023, 2, 28))) == []
+    assert list(last.between(datetime.date(2023, 2, 1),
+                             datetime.date(2023, 2, 28))) \
+        == [datetime.date(2023, 2, 23)]
+
+
+def test_fifth_weekday_on_the_31st():
+    # Only months of 31 days starting on a Tuesday have a fifth Thursday
+    # on the 31st
+    recurrence = Recurrence([], {'monthly': [[5, "THURSDAY"]]})
+    assert list(recurrence.between(datetime.date(2024, 1, 1),
+                                   datetime.date(2024, 12, 31))) == [
+            datetime.date(2024, 2, 29), datetime.date(2024, 5, 30),
+            datetime.date(2024, 8, 29), datetime.date(2024, 10, 31)]
+
+
+@pytest.mark.parametrize("anchor", ["2024-01-03", "2024-01-07"])
+def test_interval_counts_from_anchor_week(anchor):
+    # Any day of the anchor's week starts the count
+    recurrence = Recurrence([Day.MONDAY],
+                            {'interval': 2, 'anchor': anchor})
+    assert recurrence.occurs_on(datetime.date(2024, 1, 1))
+    assert not recurrence.occurs_on(datetime.date(2024, 1, 8))
+    assert recurrence.occurs_on(datetime.date(2024, 1, 15))
+    # Weeks before the anchor keep the same count
+    assert recurrence.occurs_on(datetime.date(2023, 12, 18))
+    assert not recurrence.occurs_on(datetime.date(2023, 12, 25))
+
+
+def test_next_on_or_after():
+    recurrence = Recurrence([Day.WEDNESDAY],
+                            {'interval': 3, 'anchor': "2024-01-01",
+                             'until': "2024-02-29"})
+    assert recurrence.next_on_or_after(datetime.date(2024, 1, 4)) \
+        == datetime.date(2024, 1, 24)
+    assert recurrence.next_on_or_after(datetime.date(2024, 2, 15)) is None
+
+
+def test_between_matches_occurs_on():
+    rng = random.Random(0)
+    weekdays = [Day.MONDAY, Day.TUESDAY, Day.WEDNESDAY, Day.THURSDAY,
+                Day.FRIDAY, Day.SATURDAY, Day.SUNDAY]
+    for _ in range(30):
+        rule = {'interval': rng.randrange(1, 5),
+                'anchor': f"2023-{rng.randrange(1, 13):02}-15",
+                'monthly': [[rng.choice([-5, -2, -1, 1, 3, 5]),
+                             rng.choice(weekdays).to_string()]],
+                'except': ["2024-02-29", "2024-03-31"],
+                'start': "2023-11-10"}
+        recurrence = Recurrence(rng.sample(weekdays, rng.randrange(0, 3)),
+                                rule)
+        start, end = datetime.date(2023, 10, 1), datetime.date(2024, 6, 30)
+
+        assert list(recurrence.between(start, end)) \
+            == [d for d in days(start, end) if recurrence.occurs_on(d)]
+
+
+@pytest.mark.parametrize("rule", [{'interval': 0},
+                                  {'monthly': [[6, "MONDAY"]]},
+                                  {'monthly': [[1, "DAILY"]]},
+                                  {'weekly': 1}])
+def test_malformed_rules(rule):
+    with pytest.raises(ValueError):
+        Recurrence([Day.MONDAY], rule)
@@ -0,0 +1,98 @@
+import datetime
+import sqlite3
+
+from tasker.database.database import Database
+from tasker.database.day import Day
+from tasker.database.storage import JSONStorage, SQLiteStorage
+from tasker.database.task import Task
+
+MONDAY = datetime.date(2024, 1, 1)
+
+
+def task(name: str, hour: int, recur: list[Day], rule: dict=None) -> Task:
+    return Task(name, datetime.time(hour, 0), datetime.time(hour, 30),
+                recur=recur, rule=rule)
+
+
+def week(database) -> list[dict]:
+    return [database.proposed_schedule(MONDAY + datetime.timedelta(days=i))
+            .to_dict() for i in range(7)]
+
+
+def fill(database) -> None:
+    database.add_task(task("standup", 9, [Day.MONDAY, Day.WEDNESDAY]))
+    database.add_task(task("gym", 7, [Day.DAILY]))
+    database.add_task(task("review", 15, [Day.FRIDAY],
+                           rule={'interval': 2, 'anchor': "2024-01-01"}))
+    database.add_task(task("lunch", 12, [Day.SATURDAY, Day.SUNDAY]))
+
+
+def test_incremental_saves_match_memory(tmp_path):
+    path = str(tmp_path / "data.sqlite")
+    expected = Database()
+    fill(expected)
+    expected.edit_task(1, task("run", 6, [Day.TUESDAY, Day.THURSDAY]))
+    expected.delete_task(0)
+
+    storage = SQLiteStorage(path)
+    database = storage.load()
+    fill(database)
+    storage.save(database)
+    database.edit_task(1, task("run", 6, [Day.TUESDAY, Day.THURSDAY]))
+    database.delete_task(0)
+    storage.save(database)
+    storage.close()
+
+    loaded = SQLiteStorage(path).load()
+    assert [t.to_dict() for t in loaded.tasks] \
+        == [t.to_dict() for t in expected.tasks]
+    # Read through the weekday index rather than the tasks
+    assert week(SQLiteStorage(path).load()) == week(expected)
+
+
+def test_json_round_trip(tmp_path):
+    expected = Database()
+    fill(expected)
+    JSONStorage(str(tmp_path / "in.json")).compact(expected)
+
+    storage = SQLiteStorage(str(tmp_path / "data.sqlite"))
+    storage.import_json(str(tmp_path / "in.json"))
+    storage.export_json(str(tmp_path / "out.json"))
+
+    assert JSONStorage(str(tmp_path / "out.json")).load().to_dict() \
+        == expected.to_dict()
+
+
+def test_file_without_rules_is_upgraded(tmp_path):
+    path = str(tmp_path / "data.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute(
+            "CREATE TABLE tasks (position INTEGER PRIMARY KEY, name TEXT "
+            "NOT NULL, recur TEXT NOT NULL, recur_mask INTEGER NOT NULL, "
+            "usual_start INTEGER NOT NULL, usual_end INTEGER NOT NULL)")
+    connection.execute("INSERT INTO tasks VALUES "
+                       "(0, 'gym', 'DAILY', 127, 25200, 27000)")
+    connection.commit()
+    connection.close()
+
+    database = SQLiteStorage(path).load()
+
+    assert [t.to_dict() for t in database.tasks] \
+        == [task("gym", 7, [Day.DAILY]).to_dict()]
+
+
+def test_times_with_seconds_load(tmp_path):
+    path = str(tmp_path / "data.sqlite")
+    storage = SQLiteStorage(path)
+    storage.connection.execute("INSERT INTO tasks VALUES "
+                               "(0, 'gym', 'DAILY', 127, 25230, 27045, NULL)")
+    storage.connection.execute("INSERT INTO settings VALUES "
+                               "('day_start', '06:00:30')")
+    storage.connection.commit()
+    storage.close()
+
+    database = SQLiteStorage(path).load()
+
+    assert database.day_start == datetime.time(6, 0)
+    assert [(t.usual_start, t.usual_end) for t in database.tasks] \
+        == [(datetime.time(7, 0), datetime.time(7, 30))]
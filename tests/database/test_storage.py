@@ -0,0 +1,108 @@
+import datetime
+import json
+
+from tasker.database.day import Day
+from tasker.database.storage import JSONStorage
+from tasker.database.task import Task
+
+
+def task(name: str, hour: int) -> Task:
+    return Task(name, datetime.time(hour, 0), datetime.time(hour, 30),
+                recur=[Day.MONDAY])
+
+
+def names(database) -> list[str]:
+    return [t.name for t in database.tasks]
+
+
+def test_journal_replay(tmp_path):
+    path = str(tmp_path / "data.json")
+    storage = JSONStorage(path, journal=True)
+    database = storage.load()
+    database.add_task(task("a", 8))
+    database.add_task(task("b", 9))
+    storage.save(database)
+    database.edit_task(0, task("c", 10))
+    database.delete_task(1)
+    storage.save(database)
+
+    # Only the journal has been written
+    assert not (tmp_path / "data.json").exists()
+    assert len((tmp_path / "data.json.journal").read_text().splitlines()) \
+        == 4
+    assert names(JSONStorage(path, journal=True).load()) == ["c"]
+
+
+def test_snapshot_empties_journal(tmp_path):
+    path = str(tmp_path / "data.json")
+    storage = JSONStorage(path, journal=True, compact_every=3)
+    database = storage.load()
+    for i in range(4):
+        database.add_task(task(f"{i}", 8 + i))
+        storage.save(database)
+
+    # The third change was compacted into the snapshot
+    with open(path) as fin:
+        assert json.load(fin)['sequence'] == 3
+    assert len((tmp_path / "data.json.journal").read_text().splitlines()) \
+        == 1
+    assert names(JSONStorage(path, journal=True).load()) \
+        == ["0", "1", "2", "3"]
+
+
+def test_changes_in_snapshot_are_not_replayed(tmp_path):
+    path = str(tmp_path / "data.json")
+    storage = JSONStorage(path, journal=True)
+    database = storage.load()
+    database.add_task(task("a", 8))
+    storage.save(database)
+    journal = (tmp_path / "data.json.journal").read_bytes()
+
+    # A crash after writing the snapshot but before removing the journal
+    storage.compact(database)
+    (tmp_path / "data.json.journal").write_bytes(journal)
+
+    assert names(JSONStorage(path, journal=True).load()) == ["a"]
+
+
+def test_journal_truncated_mid_record(tmp_path):
+    path = str(tmp_path / "data.json")
+    storage = JSONStorage(path, journal=True)
+    database = storage.load()
+    database.add_task(task("a", 8))
+    database.add_task(task("b", 9))
+    storage.save(database)
+
+    # An interrupted save leaves half of its last change
+    journal = tmp_path / "data.json.journal"
+    lines = journal.read_bytes().splitlines(keepends=True)
+    journal.write_bytes(lines[0] + lines[1][:len(lines[1]) // 2])
+
+    storage = JSONStorage(path, journal=True)
+    database = storage.load()
+    assert names(database) == ["a"]
+
+    # The next save cuts off the half change before appending
+    database.add_task(task("c", 10))
+    storage.save(database)
+    assert names(JSONStorage(path, journal=True).load()) == ["a", "c"]
+    assert all(json.loads(line)
+               for line in journal.read_text().splitlines())
+
+
+def test_times_with_seconds_load(tmp_path):
+    # Times saved before tasks kept whole minutes may have seconds
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(
+            {'day_start': "07:00:30", 'day_end': "22:00:00",
+             'tasks': [{'name': "a", 'recur': ["MONDAY"],
+                        'usual_start': "09:15:45",
+                        'usual_end': "10:00:00.5"}]}))
+
+    database = JSONStorage(str(path)).load()
+
+    assert database.day_start == datetime.time(7, 0)
+    assert database.tasks[0].usual_start == datetime.time(9, 15)
+    assert database.tasks[0].usual_end == datetime.time(10, 0)
+    schedule = database.proposed_schedule(datetime.date(2024, 1, 1))
+    assert [t.start for t in schedule.tasks] == [datetime.time(9, 15)]
@@ -0,0 +1,74 @@
+import itertools
+import random
+import types
+
+from tasker.schedule import autofill
+from tasker.schedule.autofill import Candidate, _pack, plan
+
+
+def candidates(*specs) -> list[Candidate]:
+    """Return a candidate for each minutes and urgency, named by order"""
+    return [Candidate(id=i, name=f"{i}", minutes=minutes, urgency=urgency)
+            for i, (minutes, urgency) in enumerate(specs)]
+
+
+def value(chosen: list[Candidate]) -> float:
+    return sum(c.value for c in chosen)
+
+
+def test_pack_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(50):
+        items = candidates(*((rng.randrange(5, 60, 5), rng.uniform(0, 10))
+                             for _ in range(rng.randrange(1, 9))))
+        capacity = rng.randrange(0, 180, 5)
+
+        chosen = _pack(items, capacity, deadline=float("inf"))
+
+        assert sum(c.minutes for c in chosen) <= capacity
+        best = max(value(subset)
+                   for n in range(len(items) + 1)
+                   for subset in itertools.combinations(items, n)
+                   if sum(c.minutes for c in subset) <= capacity)
+        assert abs(value(chosen) - best) < 1e-9
+
+
+def test_pack_fills_capacity_exactly():
+    items = candidates((25, 1), (35, 1), (40, 1.5), (20, 1))
+    chosen = _pack(items, 60, deadline=float("inf"))
+    assert sorted(c.minutes for c in chosen) == [20, 40]
+
+
+def test_pack_gives_up_at_deadline():
+    assert _pack(candidates((30, 1)), 60, deadline=float("-inf")) is None
+
+
+def fake_clock(monkeypatch, times) -> None:
+    """Make autofill read the given perf_counter times in turn"""
+    times = iter(times)
+    monkeypatch.setattr(autofill, "time", types.SimpleNamespace(
+            perf_counter=lambda: next(times)))
+
+
+# Greedily the most urgent task fills the gap, but the two next most urgent
+# are worth more together
+GREEDY = ((40, 5.0), (30, 4.0), (30, 4.0))
+
+
+def test_plan_packs_within_budget(monkeypatch):
+    fake_clock(monkeypatch, itertools.repeat(0.0))
+    planned = plan([[0, 60]], candidates(*GREEDY), budget=1.0)
+    assert sorted(c.name for c in planned[0]) == ["1", "2"]
+
+
+def test_plan_keeps_greedy_when_budget_runs_out(monkeypatch):
+    # The budget runs out part way through packing the gap
+    fake_clock(monkeypatch, itertools.chain([0.0, 0.5, 0.5],
+                                            itertools.repeat(2.0)))
+    planned = plan([[0, 60]], candidates(*GREEDY), budget=1.0)
+    assert [c.name for c in planned[0]] == ["0"]
+
+
+def test_plan_without_budget_is_greedy():
+    planned = plan([[0, 30], [60, 120]], candidates(*GREEDY), budget=0)
+    assert [[c.name for c in gap] for gap in planned] == [["1"], ["0"]]
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from tasker.schedule.interval_tree import IntervalTree
+from tasker.schedule.task import Task
+
+
+def task(name: str, start: int, end: int) -> Task:
+    return Task.from_minutes(name, start, end)
+
+
+def brute_overlapping(tasks: list, start: int, end: int) -> list:
+    return [t for t in tasks if t.start_minute < end and t.end_minute > start]
+
+
+def test_empty_tree():
+    tree = IntervalTree()
+    assert len(tree) == 0
+    assert list(tree) == []
+    assert tree.overlapping(0, 24 * 60) == []
+    with pytest.raises(IndexError):
+        tree[0]
+
+
+def test_insert_keeps_start_order():
+    a, b, c = task("a", 60, 120), task("b", 0, 30), task("c", 60, 90)
+    tree = IntervalTree()
+    for t in (a, b, c):
+        tree.add(t)
+
+    # Tasks with the same start stay in the order they were added
+    assert list(tree) == [b, a, c]
+    assert [tree[i] for i in range(3)] == [b, a, c]
+    assert tree[-1] is c
+    assert tree.index(a) == 1
+    assert a in tree
+
+
+def test_delete():
+    tasks = [task(f"{i}", i * 10, i * 10 + 5) for i in range(10)]
+    tree = IntervalTree(tasks)
+    version = tree.version
+
+    tree.remove(tasks[3])
+    del tree[0]
+
+    assert list(tree) == tasks[1:3] + tasks[4:]
+    assert tasks[3] not in tree
+    assert tree.version == version + 2
+    with pytest.raises(KeyError):
+        tree.remove(tasks[3])
+
+
+def test_overlapping_intervals():
+    long = task("long", 0, 600)
+    short = task("short", 100, 110)
+    touching = task("touching", 110, 120)
+    tree = IntervalTree([long, short, touching])
+
+    assert tree.overlapping(105, 106) == [long, short]
+    # Ranges are half open, so a task ending at the start doesn't overlap
+    assert tree.overlapping(110, 111) == [long, touching]
+    assert tree.overlapping(600, 700) == []
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(0)
+    tasks = []
+    tree = IntervalTree()
+    for i in range(300):
+        start = rng.randrange(0, 1400)
+        t = task(f"{i}", start, start + rng.randrange(0, 120))
+        tasks.append(t)
+        tree.add(t)
+        if rng.random() < 0.3:
+            removed = tasks.pop(rng.randrange(len(tasks)))
+            tree.remove(removed)
+
+    tasks.sort(key=lambda t: t.start_minute)
+    assert [t.start_minute for t in tree] == [t.start_minute for t in tasks]
+    for _ in range(200):
+        start = rng.randrange(0, 1440)
+        end = start + rng.randrange(1, 240)
+        assert sorted(map(id, tree.overlapping(start, end))) \
+            == sorted(map(id, brute_overlapping(tasks, start, end)))
+
+
+def test_task_is_only_added_once():
+    a, b = task("a", 0, 30), task("b", 60, 90)
+    tree = IntervalTree([a])
+    version = tree.version
+
+    with pytest.raises(ValueError):
+        tree.add(a)
+    with pytest.raises(ValueError):
+        IntervalTree([b, b])
+
+    assert list(tree) == [a]
+    assert tree.version == version
+    tree.remove(a)
+    assert list(tree) == []
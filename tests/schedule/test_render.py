@@ -0,0 +1,75 @@
+import datetime
+import io
+import json
+
+import pytest
+
+from tasker.schedule import Schedule, Task, write_schedules
+
+MONDAY = datetime.date(2024, 1, 1)
+
+
+def schedule() -> Schedule:
+    return Schedule(datetime.time(8, 0), datetime.time(12, 0),
+                    [Task("a", datetime.time(9, 0), datetime.time(10, 0))])
+
+
+def render(schedules, fmt: str) -> str:
+    stream = io.StringIO()
+    write_schedules(stream, schedules, fmt=fmt)
+    return stream.getvalue()
+
+
+def test_text():
+    assert render([(MONDAY, schedule())], "text") == (
+            "Monday 2024-01-01\n"
+            "  : 08:00--09:00-> ???\n"
+            " 0: 09:00--10:00-> a\n"
+            "  : 10:00--12:00-> ???\n")
+    # The same list without the heading or a trailing newline
+    assert str(schedule()) == ("  : 08:00--09:00-> ???\n"
+                               " 0: 09:00--10:00-> a\n"
+                               "  : 10:00--12:00-> ???")
+
+
+def test_latex():
+    assert render([(MONDAY, schedule())], "latex") == (
+            "\\paragraph{Monday 2024-01-01}\n"
+            "\\begin{itemize}\n"
+            "\t\\item 08:00--09:00 \\(\\rightarrow\\) ???\n"
+            "\t\\item 09:00--10:00 \\(\\rightarrow\\) a\n"
+            "\t\\item 10:00--12:00 \\(\\rightarrow\\) ???\n"
+            "\\end{itemize}\n\n")
+    assert schedule().as_latex_list(1).startswith("\t\\begin{itemize}\n"
+                                                  "\t\t\\item ")
+
+
+def test_json():
+    days = [(MONDAY + datetime.timedelta(days=i), schedule())
+            for i in range(3)]
+
+    rendered = json.loads(render(days, "json"))
+
+    assert [d['date'] for d in rendered] \
+        == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert Schedule.from_dict(rendered[0]).to_dict() \
+        == schedule().to_dict()
+    assert json.loads(render([], "json")) == []
+
+
+def test_days_are_written_as_they_come():
+    stream = io.StringIO()
+
+    def days():
+        yield MONDAY, schedule()
+        # The first day is written before the second is made
+        assert stream.getvalue().startswith("Monday")
+        yield MONDAY + datetime.timedelta(days=1), schedule()
+
+    write_schedules(stream, days())
+    assert "Tuesday 2024-01-02\n" in stream.getvalue()
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        render([], "html")
@@ -0,0 +1,69 @@
+import datetime
+import random
+
+from tasker.schedule.schedule import Schedule
+from tasker.schedule.task import Task, to_time
+
+
+def rows(tasks: list) -> list:
+    return [(t.name, t.start_minute, t.end_minute) for t in tasks]
+
+
+def from_scratch(schedule: Schedule) -> list:
+    """Return the filled tasks of a new schedule with the same tasks"""
+    return rows(Schedule(schedule.day_start, schedule.day_end,
+                         list(schedule.tasks)).tasks_with_filled_gaps())
+
+
+def test_gaps_of_empty_day():
+    schedule = Schedule(datetime.time(8, 0), datetime.time(17, 0))
+    assert rows(schedule.tasks_with_filled_gaps()) \
+        == [("???", 8 * 60, 17 * 60)]
+
+
+def test_gaps_follow_edits():
+    rng = random.Random(0)
+    schedule = Schedule(datetime.time(6, 0), datetime.time(22, 0))
+    schedule.tasks_with_filled_gaps()
+    # Each task stays within its own hour, so none overlap
+    by_hour = {}
+    for step in range(500):
+        hour = rng.randrange(6, 22)
+        task = by_hour.get(hour)
+        start = hour * 60 + rng.randrange(0, 30)
+        end = start + rng.randrange(0, 31)
+        if task is None:
+            by_hour[hour] = task = Task.from_minutes(f"{step}", start, end)
+            schedule.add_task(task)
+        elif rng.random() < 0.5:
+            schedule.remove_task(by_hour.pop(hour))
+        else:
+            schedule.retime_task(schedule.tasks.index(task),
+                                 start=to_time(start), end=to_time(end))
+        assert rows(schedule.tasks_with_filled_gaps()) \
+            == from_scratch(schedule)
+
+
+def test_unchanged_gaps_are_kept():
+    schedule = Schedule(datetime.time(8, 0), datetime.time(17, 0))
+    schedule.add_task(Task("a", datetime.time(9, 0), datetime.time(10, 0)))
+    first_gap = schedule.tasks_with_filled_gaps()[0]
+
+    schedule.add_task(Task("b", datetime.time(12, 0), datetime.time(13, 0)))
+
+    filled = schedule.tasks_with_filled_gaps()
+    assert filled[0] is first_gap
+    assert rows(filled) == from_scratch(schedule)
+
+
+def test_gaps_found_again_after_direct_change():
+    schedule = Schedule(datetime.time(8, 0), datetime.time(17, 0))
+    schedule.add_task(Task("a", datetime.time(9, 0), datetime.time(10, 0)))
+    schedule.tasks_with_filled_gaps()
+
+    # Changing the tree directly can't be followed, but is noticed
+    schedule.tasks.add(Task("b", datetime.time(8, 0), datetime.time(9, 0)))
+
+    assert rows(schedule.tasks_with_filled_gaps()) == [
+        ("b", 8 * 60, 9 * 60), ("a", 9 * 60, 10 * 60),
+        ("???", 10 * 60, 17 * 60)]
@@ -0,0 +1,37 @@
+import datetime
+
+import pytest
+
+from tasker.schedule.schedule import Schedule
+from tasker.schedule.task import Task, minutes_after, to_minutes
+
+
+def test_to_minutes():
+    assert to_minutes(datetime.time(0, 0)) == 0
+    assert to_minutes(datetime.time(13, 45)) == 13 * 60 + 45
+
+
+@pytest.mark.parametrize("t", [datetime.time(9, 30, 15),
+                               datetime.time(9, 30, 0, 1)])
+def test_to_minutes_rejects_seconds(t):
+    with pytest.raises(ValueError, match="whole minutes"):
+        to_minutes(t)
+    with pytest.raises(ValueError):
+        Task("a", datetime.time(9, 0), t)
+
+
+def test_minutes_after_rounds_up():
+    assert minutes_after(datetime.time(9, 30)) == 9 * 60 + 30
+    assert minutes_after(datetime.time(9, 30, 15)) == 9 * 60 + 31
+    assert minutes_after(datetime.time(23, 59, 0, 1)) == 24 * 60
+
+
+def test_retime_with_seconds_keeps_task():
+    schedule = Schedule(datetime.time(8, 0), datetime.time(17, 0))
+    schedule.add_task(Task("a", datetime.time(9, 0), datetime.time(10, 0)))
+
+    with pytest.raises(ValueError):
+        schedule.retime_task(0, start=datetime.time(9, 15, 30))
+
+    assert [(t.name, t.start, t.end) for t in schedule.tasks] \
+        == [("a", datetime.time(9, 0), datetime.time(10, 0))]
@@ -0,0 +1,20 @@
+import pytest
+
+from tasker.export_cache import refers_to_time
+
+
+@pytest.mark.parametrize("filters", [
+        ["status:pending", "+OVERDUE"], ["-DUE"], ["due.before:now"],
+        ["due:today"], ["scheduled.before:3d"], ["due.after:eow"],
+        ["urgency.over:5"], ["(", "due", "<", "tomorrow", ")"],
+        ["wait.before:monday"]])
+def test_refers_to_time(filters):
+    assert refers_to_time(filters)
+
+
+@pytest.mark.parametrize("filters", [
+        ["status:pending"], ["+Reminder", "-home"], ["project:work", "3"],
+        ["due.before:2024-01-01"], ["due:2024-01-01T09:00:00Z"]])
+def test_does_not_refer_to_time(filters):
+    assert not refers_to_time(filters)
+
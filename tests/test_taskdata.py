@@ -0,0 +1,26 @@
+import pytest
+
+from tasker.taskdata import UnsupportedFilter, parse_filters
+
+
+@pytest.mark.parametrize("tag", ["+OVERDUE", "+PENDING", "+DUE", "+TODAY",
+                                 "-BLOCKED", "-WAITING"])
+def test_virtual_tags_are_unsupported(tag):
+    with pytest.raises(UnsupportedFilter):
+        parse_filters(["status:pending", tag])
+
+
+def test_tags():
+    has_tag, lacks_tag = parse_filters(["+Reminder", "-home"])
+    assert has_tag({'tags': ["Reminder", "work"]})
+    assert not has_tag({'tags': ["work"]})
+    assert lacks_tag({'tags': ["work"]})
+    assert not lacks_tag({'tags': ["home"]})
+
+
+def test_ids_and_attributes():
+    predicates = parse_filters(["3", "5", "project:work"])
+    matches = lambda t: all(p(t) for p in predicates)
+    assert matches({'id': 3, 'tags': [], 'project': "work.reports"})
+    assert not matches({'id': 4, 'tags': [], 'project': "work"})
+    assert not matches({'id': 5, 'tags': [], 'project': "workshop"})
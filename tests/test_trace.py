@@ -0,0 +1,19 @@
+import time
+
+from tasker import trace, util
+
+
+def test_export_subprocess_excludes_caller_time(monkeypatch, tmp_path):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    script = tmp_path / "task"
+    script.write_text("#!/bin/sh\necho '[{\"id\": 1}, {\"id\": 2}]'\n")
+    script.chmod(0o755)
+    tracer = trace.Tracer()
+    monkeypatch.setattr(trace, "TRACER", tracer)
+
+    for _ in util.iter_task_export([], use_cache=False, backend="task"):
+        time.sleep(0.2)
+
+    (command, seconds), = tracer.subprocesses
+    assert command == "task export"
+    assert seconds < 0.2
@@ -0,0 +1,127 @@
+import os
+import stat
+import time
+
+import pytest
+
+from tasker import util
+from tasker.export_cache import ExportCache, data_fingerprint
+
+
+@pytest.fixture
+def fake_task(tmp_path, monkeypatch):
+    """Return a function which puts a task script with the given body on
+    PATH, with Taskwarrior's data and the export cache in tmp_path.
+    """
+    monkeypatch.setenv("TASKDATA", str(tmp_path / "taskdata"))
+    monkeypatch.setenv("TASKRC", str(tmp_path / "taskrc"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (tmp_path / "taskdata").mkdir()
+    (tmp_path / "taskdata" / "pending.data").write_text("")
+
+    def install(body: str) -> None:
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        path = bin_dir / "task"
+        path.write_text("#!/bin/sh\n" + body)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}"
+                                   f"{os.environ['PATH']}")
+    return install
+
+
+def test_export_waits_for_task_to_exit(fake_task):
+    # task closes its output before it has finished
+    fake_task("echo '[{\"id\": 1}, {\"id\": 2}]'\n"
+              "exec >&-\n"
+              "sleep 0.2\n")
+
+    tasks = list(util.iter_task_export(["status:pending"], backend="task"))
+
+    assert [t['id'] for t in tasks] == [1, 2]
+    # Only exports task finished successfully are cached
+    assert ExportCache().get(["status:pending"], data_fingerprint()) \
+        is not None
+
+
+def test_export_stops_task_when_caller_stops(fake_task):
+    fake_task("echo '[{\"id\": 1},'\n"
+              "sleep 5\n"
+              "echo '{\"id\": 2}]'\n")
+
+    start = time.monotonic()
+    tasks = util.iter_task_export(["status:pending"], backend="task")
+    assert next(tasks)['id'] == 1
+    tasks.close()
+
+    assert time.monotonic() - start < 4
+    assert ExportCache().get(["status:pending"], data_fingerprint()) is None
+
+
+# Logs each call to task and completes every id it's given
+COMPLETE_ALL = ("echo \"$@\" >> {log}\n"
+                "for arg in \"$@\"; do\n"
+                "  case $arg in\n"
+                "    [0-9]*) echo \"Completed task $arg 'x'.\";;\n"
+                "  esac\n"
+                "done\n")
+
+
+def test_background_completer_starts_each_task(fake_task, tmp_path):
+    log = tmp_path / "calls"
+    fake_task(COMPLETE_ALL.format(log=log))
+
+    completer = util.BackgroundTaskCompleter()
+    outputs = completer.add(1)
+    # Each task is completed without waiting for flush or close
+    deadline = time.monotonic() + 5
+    while 1 not in outputs and time.monotonic() < deadline:
+        time.sleep(0.01)
+        outputs.update(completer.finished())
+
+    assert list(outputs) == [1]
+    assert completer.failed == []
+    assert completer.close() == {}
+    assert log.read_text().splitlines() == [
+        "rc.confirmation=off rc.bulk=0 rc.gc=off 1 done"]
+
+
+def test_background_completer_flushes_every(fake_task, tmp_path):
+    log = tmp_path / "calls"
+    fake_task(COMPLETE_ALL.format(log=log))
+
+    completer = util.BackgroundTaskCompleter(flush_every=2)
+    outputs = {}
+    for id in (1, 2, 3):
+        outputs.update(completer.add(id))
+    outputs.update(completer.close())
+
+    assert list(outputs) == [1, 2, 3]
+    assert log.read_text().splitlines() == [
+        "rc.confirmation=off rc.bulk=0 rc.gc=off 1 2 done",
+        "rc.confirmation=off rc.bulk=0 rc.gc=off 3 done"]
+
+
+def test_complete_tasks_output_without_ids(fake_task):
+    # task succeeds, but says so in a way that doesn't name the tasks
+    fake_task("echo 'Erledigt 3 Aufgaben.'\n")
+
+    outputs = util.complete_tasks([1, 2, 3])
+
+    assert outputs == {1: "Erledigt 3 Aufgaben.\n", 2: "", 3: ""}
+
+
+def test_time_relative_exports_are_not_cached(fake_task, tmp_path):
+    # Exports a task whose id is the number of times task has run
+    count = tmp_path / "count"
+    fake_task(f"echo x >> {count}\n"
+              f"echo \"[{{\\\"id\\\": $(wc -l < {count})}}]\"\n")
+
+    for filters in (["+OVERDUE"], ["status:pending"]):
+        util.run_task_export(filters, backend="task")
+    ids = [util.run_task_export(filters, backend="task")[0]['id']
+           for filters in (["+OVERDUE"], ["status:pending"])]
+
+    # Only the filter that doesn't refer to time is answered from the cache
+    assert ids == [3, 2]
+    assert ExportCache().get(["+OVERDUE"], data_fingerprint()) is None